@@ -0,0 +1,29 @@
+"""
+Cooperative cancellation for work that cancelling an asyncio task cannot stop.
+
+Provider SDK calls running in threads and moviepy renders do not notice when
+the job's task is cancelled. The worker sets a per-job event in this context
+variable; blocking code checks it between chunks, images and frames and
+raises JobCancelledError.
+"""
+import contextvars
+import threading
+from typing import Optional
+
+current_cancel_event: contextvars.ContextVar[Optional[threading.Event]] = contextvars.ContextVar(
+    "current_cancel_event", default=None
+)
+
+
+class JobCancelledError(Exception):
+    """Raised inside a job's work once the job has been cancelled."""
+
+
+def cancel_requested() -> bool:
+    event = current_cancel_event.get()
+    return event is not None and event.is_set()
+
+
+def raise_if_cancelled() -> None:
+    if cancel_requested():
+        raise JobCancelledError("Job was cancelled")
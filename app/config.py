@@ -4,28 +4,143 @@ from dotenv import load_dotenv
 # Load environment variables from .env file
 load_dotenv()
 
-# API Keys
+# API Keys. Each is only needed by the content types that use its provider
+# (see app/providers.py); clients are created on first use.
 ANTHROPIC_KEY = os.getenv('ANTHROPIC_KEY')
 OPENAI_KEY = os.getenv('OPENAI_KEY')
-if not ANTHROPIC_KEY and not OPENAI_KEY:
-    raise ValueError("Either ANTHROPIC_KEY or OPENAI_KEY must be set in environment variables")
-
 STABILITY_KEY = os.getenv('STABILITY_KEY')
-if not STABILITY_KEY:
-    raise ValueError("STABILITY_KEY not found in environment variables")
-
 ELEVENLABS_KEY = os.getenv('ELEVENLABS_KEY')
-if not ELEVENLABS_KEY:
-    raise ValueError("ELEVENLABS_KEY not found in environment variables")
+# Threads for provider SDK calls that block (Stability's gRPC client); further calls wait for a thread
+PROVIDER_THREADS = int(os.getenv("PROVIDER_THREADS", "8"))
 
 # Configuration
 TEST_MODE = os.getenv('TEST_MODE', 'False').lower() == 'true'
 OUTPUT_DIR = os.getenv('OUTPUT_DIR', 'output')
 
+# Job Store Configuration
+JOB_STORE_BACKEND = os.getenv("JOB_STORE_BACKEND", "sqlite").lower()  # sqlite or memory
+JOB_STORE_PATH = os.getenv("JOB_STORE_PATH", os.path.join(OUTPUT_DIR, "jobs.db"))
+JOB_CACHE_SIZE = int(os.getenv("JOB_CACHE_SIZE", "1024"))  # Finished jobs kept in the in-memory LRU
+# WAL needs shared memory between the processes using the database; use DELETE when workers on
+# other machines open it over a network filesystem
+SQLITE_JOURNAL_MODE = os.getenv("SQLITE_JOURNAL_MODE", "WAL").upper()
+
+def _parse_mapping(value: str) -> dict:
+    """Parse "key=value,key=value" settings into a dict of strings."""
+    pairs = [item.split("=", 1) for item in value.split(",") if "=" in item]
+    return {key.strip(): val.strip() for key, val in pairs}
+
+# Job Queue Configuration
+# Each content type runs on a worker pool ("job class") with its own concurrency,
+# so a burst of video renders cannot starve cheap text jobs.
+JOB_CLASSES = {
+    "article": "text",
+    "tweet_thread": "text",
+    "book_chapter": "text",
+    "podcast": "audio",
+    "story": "video",
+    "educational": "video",
+}
+WORKER_CONCURRENCY = {
+    job_class: int(count)
+    for job_class, count in _parse_mapping(os.getenv("WORKER_CONCURRENCY", "text=4,audio=2,video=1")).items()
+}
+# "process": the API spawns a separate worker process, "inline": workers run in the API event loop,
+# "external": the API only enqueues and workers are started separately with `python -m app.worker`
+WORKER_MODE = os.getenv("WORKER_MODE", "process").lower()
+# With several API processes (uvicorn --workers N) only the one holding this lock starts the worker process
+WORKER_LOCK_PATH = os.getenv("WORKER_LOCK_PATH", os.path.join(OUTPUT_DIR, ".worker.lock"))
+# Job classes this host's workers serve, e.g. "text" for a small text-only pool (empty: all of them).
+# Only the generators of the served content types are ever imported.
+WORKER_PROFILE = {name.strip() for name in os.getenv("WORKER_PROFILE", "").split(",") if name.strip()}
+WORKER_POLL_INTERVAL = float(os.getenv("WORKER_POLL_INTERVAL", "0.5"))  # Seconds between queue polls when idle
+# A claimed job's lease: renewed by its worker every third of this, re-queued if it lapses (a dead node)
+QUEUE_LEASE_SECONDS = float(os.getenv("QUEUE_LEASE_SECONDS", "60"))
+WORKER_ID = os.getenv("WORKER_ID", "")  # Lease owner name; defaults to <hostname>:<pid>
+# Video renders run in a pool of long-lived processes, at most this many at once (default: one per video worker)
+RENDER_PROCESSES = int(os.getenv("RENDER_PROCESSES", str(max(WORKER_CONCURRENCY.get("video", 1), 1))))
+
+# Admission control: most queued (not yet started) jobs per content type; requests beyond it get 429
+QUEUE_LIMITS = {
+    content_type: int(limit)
+    for content_type, limit in _parse_mapping(os.getenv(
+        "QUEUE_LIMITS",
+        "article=1000,tweet_thread=1000,book_chapter=500,podcast=100,story=50,educational=50"
+    )).items()
+}
+# Combined cap on queued jobs outside the fast lane (0 = none). Fast-lane classes are only held to
+# their own per-type limits, so a video backlog never causes cheap text jobs to be rejected.
+QUEUE_MAX_TOTAL = int(os.getenv("QUEUE_MAX_TOTAL", "0"))
+FAST_LANE_CLASSES = {name.strip() for name in os.getenv("FAST_LANE_CLASSES", "text").split(",") if name.strip()}
+# Seconds a job of each class is assumed to take until real throughput has been observed (for Retry-After)
+JOB_SECONDS_ESTIMATE = {
+    job_class: float(seconds)
+    for job_class, seconds in _parse_mapping(os.getenv("JOB_SECONDS_ESTIMATE", "text=15,audio=90,video=300")).items()
+}
+
+BATCH_MAX_SIZE = int(os.getenv("BATCH_MAX_SIZE", "500"))  # Most requests accepted by one /generate/batch call
+
+# Synchronous generation (/generate?mode=sync): text jobs run in the API process and return their content.
+# Runs that take longer than the timeout, or find every slot busy, continue on the queue (202 + job_id).
+SYNC_TIMEOUT_SECONDS = float(os.getenv("SYNC_TIMEOUT_SECONDS", "30"))
+SYNC_MAX_CONCURRENT = int(os.getenv("SYNC_MAX_CONCURRENT", "4"))
+
+# Request deduplication: an identical request attaches to a queued/running job, or reuses a
+# completed one finished within the freshness window (0 disables reuse of completed jobs)
+RESULT_REUSE_HOURS = float(os.getenv("RESULT_REUSE_HOURS", "24"))
+IDEMPOTENCY_KEY_TTL_HOURS = float(os.getenv("IDEMPOTENCY_KEY_TTL_HOURS", "24"))
+
+# Output Retention
+# Hours a finished job's files are kept, per content type (0 keeps them forever)
+RETENTION_TTL_HOURS = {
+    content_type: float(hours)
+    for content_type, hours in _parse_mapping(os.getenv(
+        "RETENTION_TTL_HOURS",
+        "article=720,tweet_thread=720,book_chapter=720,podcast=336,story=168,educational=168"
+    )).items()
+}
+# Total bytes allowed under OUTPUT_DIR and static/videos; least recently accessed jobs are evicted first (0 = no quota)
+OUTPUT_QUOTA_BYTES = int(os.getenv("OUTPUT_QUOTA_BYTES", "0"))
+RETENTION_INTERVAL_SECONDS = float(os.getenv("RETENTION_INTERVAL_SECONDS", "600"))  # 0 disables the retention manager
+PUBLIC_VIDEO_DIR = "static/videos"  # Published copies served by the /static mount
+
+# Content-addressed artifact store: job directories hold hardlinks to blobs stored once per content hash,
+# and regenerating an artifact from the same inputs is a link. Must be on the same filesystem as OUTPUT_DIR.
+BLOB_STORE_ENABLED = os.getenv("BLOB_STORE_ENABLED", "true").lower() == "true"
+BLOB_STORE_DIR = os.getenv("BLOB_STORE_DIR", os.path.join(OUTPUT_DIR, ".blobs"))
+
+# LLM response cache (app/llm_cache.py), a SQLite file shared by the API and the workers.
+# LLM_CACHE_MODE (prefer, bypass or only) applies to jobs whose request does not set `cache`.
+LLM_CACHE_ENABLED = os.getenv("LLM_CACHE_ENABLED", "true").lower() == "true"
+LLM_CACHE_PATH = os.getenv("LLM_CACHE_PATH", os.path.join(OUTPUT_DIR, "llm_cache.db"))
+LLM_CACHE_TTL_HOURS = float(os.getenv("LLM_CACHE_TTL_HOURS", "168"))  # 0 = responses never expire
+LLM_CACHE_MAX_MB = float(os.getenv("LLM_CACHE_MAX_MB", "100"))  # Least recently used responses are evicted beyond this
+LLM_CACHE_MODE = os.getenv("LLM_CACHE_MODE", "prefer").lower()
+
+# Job Progress Events (SSE / WebSocket)
+EVENT_POLL_INTERVAL = float(os.getenv("EVENT_POLL_INTERVAL", "0.25"))  # How often the API checks for events from workers
+EVENT_RETENTION_HOURS = float(os.getenv("EVENT_RETENTION_HOURS", "24"))  # Events older than this are pruned
+TEXT_STREAM_POLL_INTERVAL = float(os.getenv("TEXT_STREAM_POLL_INTERVAL", "0.05"))  # How often /jobs/{job_id}/stream checks for new text
+
+# Metrics (/metrics): worker processes write snapshots here for the API to merge
+METRICS_DIR = os.getenv("METRICS_DIR", os.path.join(OUTPUT_DIR, ".metrics"))
+METRICS_FLUSH_INTERVAL = float(os.getenv("METRICS_FLUSH_INTERVAL", "5"))  # Seconds between worker snapshots
+
 # LLM Provider Configuration
 LLM_PROVIDER = os.getenv("LLM_PROVIDER", "openai").lower()
 OLLAMA_API_BASE_URL = os.getenv("OLLAMA_API_BASE_URL", "http://localhost:11434")
 OLLAMA_MODEL_NAME = os.getenv("OLLAMA_MODEL_NAME", "llama2")
+# One pooled client per process: connections are kept alive between prompts
+OLLAMA_TIMEOUT = float(os.getenv("OLLAMA_TIMEOUT", "60"))
+OLLAMA_MAX_CONNECTIONS = int(os.getenv("OLLAMA_MAX_CONNECTIONS", "10"))
+OLLAMA_KEEPALIVE_EXPIRY = float(os.getenv("OLLAMA_KEEPALIVE_EXPIRY", "60"))  # Idle seconds before a connection is closed
+OLLAMA_HTTP2 = os.getenv("OLLAMA_HTTP2", "false").lower() == "true"  # Needs the h2 package (httpx[http2])
+OLLAMA_WARMUP = os.getenv("OLLAMA_WARMUP", "true").lower() == "true"  # Load the model when a process starts
+# How long Ollama keeps the model loaded after a request ("30m", seconds, or -1 for always), sent with every request
+OLLAMA_KEEP_ALIVE = os.getenv("OLLAMA_KEEP_ALIVE", "30m")
+OLLAMA_NUM_CTX = int(os.getenv("OLLAMA_NUM_CTX", "0"))  # Context window in tokens (0 = the model's default)
+# Requests each process sends Ollama at once; match the server's OLLAMA_NUM_PARALLEL (0 = no limit)
+OLLAMA_NUM_PARALLEL = int(os.getenv("OLLAMA_NUM_PARALLEL", "4"))
 
 # OpenAI Configuration
 OPENAI_MODEL = os.getenv("OPENAI_MODEL", "gpt-4-turbo-preview")
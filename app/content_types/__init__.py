@@ -0,0 +1,70 @@
+"""
+Content types and the stages that produce them.
+
+Each content type is declared in one of the modules in this package, which is
+imported the first time a job of that type runs. A worker serving only text
+content types therefore never loads the image, speech or video generators.
+"""
+import importlib
+from dataclasses import dataclass
+from typing import AsyncIterator, Awaitable, Callable, Dict, Iterable, List, Optional
+
+from ..config import JOB_CLASSES
+from ..jobs.pipeline import Stage
+from ..models import ContentRequest
+
+
+@dataclass
+class ContentType:
+    name: str
+    # Stage graph for one job: (request, output_dir) -> stages
+    build_stages: Callable[[ContentRequest, str], List[Stage]]
+    output_filename: str
+    media_type: str
+    # Runs after the stages and before the job is marked completed: (job_id) -> None
+    on_complete: Optional[Callable[[str], Awaitable[None]]] = None
+    # Text file the stages write as the LLM streams it, relayed by GET /jobs/{job_id}/stream
+    stream_filename: Optional[str] = None
+
+
+# Content type -> module in this package that declares it
+_MODULES = {
+    "article": "text",
+    "tweet_thread": "text",
+    "book_chapter": "text",
+    "podcast": "podcast",
+    "story": "media",
+    "educational": "media",
+}
+
+_loaded: Dict[str, ContentType] = {}
+
+
+def get_content_type(name: str) -> ContentType:
+    """The declaration of content type `name`, importing its module on first use."""
+    content_type = _loaded.get(name)
+    if content_type is None:
+        if name not in _MODULES:
+            raise ValueError(f"Unsupported content type: {name}")
+        module = importlib.import_module(f".{_MODULES[name]}", __name__)
+        for declared in module.CONTENT_TYPES:
+            _loaded[declared.name] = declared
+        content_type = _loaded[name]
+    return content_type
+
+
+async def write_stream(path: str, chunks: AsyncIterator[str]) -> str:
+    """Append each chunk to `path` as it arrives, so readers can follow the file; returns the whole text."""
+    parts = []
+    with open(path, "w", encoding="utf-8") as f:
+        async for chunk in chunks:
+            f.write(chunk)
+            f.flush()
+            parts.append(chunk)
+    return "".join(parts)
+
+
+def served_content_types(job_classes: Iterable[str]) -> List[str]:
+    """Content types a worker serving `job_classes` runs."""
+    job_classes = set(job_classes)
+    return [content_type for content_type in _MODULES if JOB_CLASSES.get(content_type) in job_classes]
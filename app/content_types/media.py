@@ -0,0 +1,98 @@
+import asyncio
+import os
+from typing import List
+
+from ..config import PUBLIC_VIDEO_DIR
+from ..generators.story import generate_story
+from ..generators.educational import generate_educational_content
+from ..jobs.blobs import cached_file, file_digests
+from ..jobs.catalog import publish_video, VIDEO_FILENAME
+from ..jobs.pipeline import Stage
+from ..jobs.store import get_job_store
+from ..models import ContentRequest
+from . import ContentType
+
+
+def build_media_stages(request: ContentRequest, output_dir: str) -> List[Stage]:
+    """
+    Stage graph for the story/educational video pipeline. Script, images,
+    voice-over, music and render run as a stage graph: everything that does
+    not depend on another stage runs concurrently.
+    """
+
+    async def script(_):
+        if request.content_type == "story":
+            content = await generate_story(request.topic)
+        else: # educational
+            content = await generate_educational_content(
+                request.topic,
+                request.educational_style,
+                request.difficulty_level
+            )
+        with open(os.path.join(output_dir, "content.txt"), 'w') as f:
+            f.write(content)
+        return content
+
+    # The media generators pull in numpy, PIL, pydub and moviepy, so they are
+    # imported when a media stage first runs rather than when the worker starts
+    async def images(deps):
+        from ..generators.image import generate_images
+        return await generate_images(
+            deps["script"],
+            request.topic,
+            output_dir,
+            content_type=request.content_type
+        )
+
+    async def voice_over(deps):
+        from ..generators.audio import generate_voice_over
+        voice_over_path = os.path.join(output_dir, "voice_over.mp3")
+        await generate_voice_over(deps["script"], voice_over_path)
+        return voice_over_path
+
+    async def background_music(_):
+        from ..generators.audio import generate_background_music
+        background_music_path = os.path.join(output_dir, "background_music.wav")
+        await generate_background_music(60, background_music_path)
+        return background_music_path
+
+    async def video(deps):
+        from ..generators.video import create_video_async
+        video_path = os.path.join(output_dir, VIDEO_FILENAME) # Main output for these types
+        # The same inputs render the same video, so a stored render is reused
+        inputs = deps["images"] + [deps["voice_over"], deps["background_music"]]
+        key = {
+            "artifact": "video",
+            "inputs": await asyncio.to_thread(file_digests, inputs),
+            "video_prompt": request.video_prompt,
+            "content_type": request.content_type
+        }
+        await cached_file(key, video_path, lambda: create_video_async(
+            deps["images"],
+            deps["voice_over"],
+            deps["background_music"],
+            video_path,
+            video_prompt=request.video_prompt,
+            content_type=request.content_type
+        ))
+        return video_path
+
+    return [
+        Stage("script", script),
+        Stage("images", images, deps=("script",)),
+        Stage("voice_over", voice_over, deps=("script",)),
+        Stage("background_music", background_music),
+        Stage("video", video, deps=("images", "voice_over", "background_music")),
+    ]
+
+
+async def publish(job_id: str) -> None:
+    """Publish once, before the job is marked completed, so /videos never touches the filesystem."""
+    job_store = get_job_store()
+    await publish_video(job_store, job_store.get(job_id), PUBLIC_VIDEO_DIR)
+
+
+CONTENT_TYPES = [
+    ContentType("story", build_media_stages, VIDEO_FILENAME, "video/mp4", on_complete=publish),
+    ContentType("educational", build_media_stages, VIDEO_FILENAME, "video/mp4", on_complete=publish),
+]
@@ -0,0 +1,75 @@
+import os
+from typing import List
+
+from ..generators.podcast import (
+    stream_podcast_from_topic,
+    stream_free_podcast,
+    generate_dialogue_content
+)
+from ..jobs.pipeline import Stage
+from ..models import ContentRequest
+from . import ContentType, write_stream
+
+PODCAST_FILENAME = "podcast_audio.mp3"
+SCRIPT_FILENAME = "podcast_script.txt"
+
+
+def podcast_stages(request: ContentRequest, output_dir: str) -> List[Stage]:
+    """Script (or dialogue), then speech."""
+    if not request.podcast_options:
+        raise ValueError("Podcast options not provided for podcast content type.")
+    options = request.podcast_options
+
+    async def script(_):
+        # The script is also written to SCRIPT_FILENAME (as it is generated, for LLM scripts)
+        script_path = os.path.join(output_dir, SCRIPT_FILENAME)
+        if options.podcast_type == "dialogue":
+            # Use provided dialogues, or generate them from the topic
+            if options.dialogues:
+                dialogues = [(d.speaker, d.text) for d in options.dialogues]
+            elif not request.topic:
+                raise ValueError("Topic is required for automatic dialogue generation")
+            else:
+                dialogues = await generate_dialogue_content(
+                    topic=request.topic,
+                    num_exchanges=options.num_exchanges
+                )
+            with open(script_path, "w", encoding="utf-8") as f:
+                f.write("\n".join(f"Speaker {speaker}: {text}" for speaker, text in dialogues))
+            return dialogues
+        if options.podcast_type == "custom_text":
+            with open(script_path, "w", encoding="utf-8") as f:
+                f.write(options.custom_text or "")
+            return options.custom_text
+        if options.podcast_type == "topic_based":
+            return await write_stream(script_path, stream_podcast_from_topic(request.topic))
+        return await write_stream(script_path, stream_free_podcast())
+
+    async def audio(deps):
+        # Imported here: the speech generator pulls in numpy, scipy and pydub
+        from ..generators.audio import generate_voice_over, generate_dialogue
+        output_path = os.path.join(output_dir, PODCAST_FILENAME)
+        if options.podcast_type == "dialogue":
+            await generate_dialogue(
+                dialogues=[tuple(line) for line in deps["script"]],
+                output_path=output_path,
+                voice1=options.voice1,
+                voice2=options.voice2
+            )
+        else:
+            await generate_voice_over(
+                text=deps["script"],
+                output_path=output_path,
+                voice_name=request.voice_name
+            )
+        return output_path
+
+    return [
+        Stage("script", script),
+        Stage("audio", audio, deps=("script",)),
+    ]
+
+
+CONTENT_TYPES = [
+    ContentType("podcast", podcast_stages, PODCAST_FILENAME, "audio/mpeg", stream_filename=SCRIPT_FILENAME),
+]
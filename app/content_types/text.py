@@ -0,0 +1,84 @@
+import json
+import os
+from typing import List
+
+from ..generators.article import stream_article
+from ..generators.social import generate_tweet_thread
+from ..generators.book import stream_book_chapter
+from ..jobs.pipeline import Stage
+from ..models import ContentRequest, ArticleOptions, TweetOptions, BookChapterOptions
+from . import ContentType, write_stream
+
+ARTICLE_FILENAME = "article.txt"
+TWEET_THREAD_FILENAME = "tweet_thread.json"
+BOOK_CHAPTER_FILENAME = "book_chapter.txt"
+
+
+def article_stages(request: ContentRequest, output_dir: str) -> List[Stage]:
+    async def text(_):
+        if not request.article_options:
+            # Providing default empty options if None, or raise error if it must be provided
+            request.article_options = ArticleOptions() # Or raise ValueError
+
+        # Written as it is generated, so clients can follow it on /jobs/{job_id}/stream
+        path = os.path.join(output_dir, ARTICLE_FILENAME)
+        await write_stream(path, stream_article(
+            topic=request.topic,
+            desired_length_words=request.desired_length_words or 0,
+            style_tone=request.style_tone,
+            custom_instructions=request.article_options.custom_instructions
+        ))
+        return path
+
+    return [Stage("text", text)]
+
+
+def tweet_thread_stages(request: ContentRequest, output_dir: str) -> List[Stage]:
+    async def text(_):
+        if not request.tweet_options:
+            request.tweet_options = TweetOptions() # Or raise ValueError
+
+        tweet_list = await generate_tweet_thread(
+            topic=request.topic,
+            num_tweets=request.tweet_options.num_tweets,
+            style_tone=request.style_tone,
+            call_to_action=request.tweet_options.call_to_action,
+            custom_instructions=None # Assuming not yet added to TweetOptions in this example
+        )
+        if isinstance(tweet_list, list) and tweet_list and tweet_list[0].startswith("Error:"):
+            raise ValueError(f"Tweet thread generation failed: {tweet_list[0]}")
+        path = os.path.join(output_dir, TWEET_THREAD_FILENAME)
+        with open(path, 'w') as f:
+            json.dump(tweet_list, f, indent=2)
+        return path
+
+    return [Stage("text", text)]
+
+
+def book_chapter_stages(request: ContentRequest, output_dir: str) -> List[Stage]:
+    async def text(_):
+        if not request.book_chapter_options:
+            request.book_chapter_options = BookChapterOptions() # Or raise ValueError
+
+        path = os.path.join(output_dir, BOOK_CHAPTER_FILENAME)
+        await write_stream(path, stream_book_chapter(
+            plot_summary=request.book_chapter_options.plot_summary,
+            chapter_topic=request.book_chapter_options.chapter_topic or request.topic,
+            previous_chapter_summary=request.book_chapter_options.previous_chapter_summary,
+            characters=request.book_chapter_options.characters,
+            genre=request.book_chapter_options.genre,
+            style_tone=request.style_tone,
+            desired_length_words=request.desired_length_words or 0,
+            custom_instructions=None # Assuming not yet added to BookChapterOptions
+        ))
+        return path
+
+    return [Stage("text", text)]
+
+
+CONTENT_TYPES = [
+    ContentType("article", article_stages, ARTICLE_FILENAME, "text/plain", stream_filename=ARTICLE_FILENAME),
+    ContentType("tweet_thread", tweet_thread_stages, TWEET_THREAD_FILENAME, "application/json"),
+    ContentType("book_chapter", book_chapter_stages, BOOK_CHAPTER_FILENAME, "text/plain",
+                stream_filename=BOOK_CHAPTER_FILENAME),
+]
@@ -1,8 +1,8 @@
-from anthropic import Anthropic
-from ..config import ANTHROPIC_KEY, TEST_MODE
-
-anthropic_client = Anthropic(api_key=ANTHROPIC_KEY)
+from ..config import TEST_MODE
+from ..metrics import timed
+from ..providers import get_async_anthropic_client
 
+@timed("anthropic", "story")
 async def generate_story_anthropic(character_description: str) -> str:
     """Generate a story using Anthropic's Claude."""
     if TEST_MODE:
@@ -20,7 +20,7 @@ After many days of travel, Arthur found a magical forest. The trees sparkled in
 
 \n\nAssistant: I'll create a short story based on the character description."""
     
-    response = anthropic_client.completions.create(
+    response = await get_async_anthropic_client().completions.create(
         prompt=story_prompt,
         model="claude-2",
         max_tokens_to_sample=1000,
@@ -29,6 +29,7 @@ After many days of travel, Arthur found a magical forest. The trees sparkled in
     
     return response.completion
 
+@timed("anthropic", "educational")
 async def generate_educational_content_anthropic(
     topic: str,
     style: str = "lecture",
@@ -54,7 +55,7 @@ Conclusion: Summary of main points."""
 
 \n\nAssistant: I'll create educational content about {topic}."""
     
-    response = anthropic_client.completions.create(
+    response = await get_async_anthropic_client().completions.create(
         prompt=prompt,
         model="claude-2",
         max_tokens_to_sample=1000,
@@ -63,6 +64,7 @@ Conclusion: Summary of main points."""
     
     return response.completion
 
+@timed("anthropic", "podcast_script")
 async def generate_podcast_script_anthropic(
     topic: str,
     style: str = "professional",
@@ -87,7 +89,7 @@ Thanks for listening! Don't forget to subscribe for more content."""
 
 \n\nAssistant: I'll create a podcast script about {topic}."""
     
-    response = anthropic_client.completions.create(
+    response = await get_async_anthropic_client().completions.create(
         prompt=prompt,
         model="claude-2",
         max_tokens_to_sample=1000,
@@ -1,20 +1,15 @@
-from typing import Optional
-from app.llm_clients import generate_text_completion
+from typing import AsyncIterator, Optional, Tuple
+from app.llm_clients import generate_text_completion, stream_text_completion, stream_words
 from app.config import TEST_MODE
 from app.utils import load_prompt # Import the new utility
 
-async def generate_article(
+def _article_prompt(
     topic: str,
-    desired_length_words: int = 0, # 0 for model default
-    style_tone: Optional[str] = None,
-    custom_instructions: Optional[str] = None
-) -> str:
-    """
-    Generates an article on a given topic using the configured LLM.
-    """
-    if TEST_MODE:
-        return f"Test Mode: Article about '{topic}' with style '{style_tone}'. Length: {desired_length_words} words. Instructions: {custom_instructions}"
-
+    desired_length_words: int,
+    style_tone: Optional[str],
+    custom_instructions: Optional[str]
+) -> Tuple[str, int]:
+    """The article prompt (or a load_prompt "Error: ..." string) and its token budget."""
     # Construct optional sections for the prompt template
     custom_instructions_section = ""
     if custom_instructions:
@@ -32,9 +27,6 @@ async def generate_article(
         custom_instructions_section=custom_instructions_section
     )
 
-    if prompt.startswith("Error:"): # Check for errors from load_prompt
-        return prompt # Propagate error
-
     # Determine max_tokens based on desired_length_words (e.g., 1.5 words per token as a rough estimate)
     # Or use a sensible default if desired_length_words is 0.
     # The current `generate_text_completion` takes `max_tokens`.
@@ -46,6 +38,23 @@ async def generate_article(
         calculated_max_tokens = int(desired_length_words * 1.5) # Adjusted factor for safety, 1 word is often > 1 token
     else:
         calculated_max_tokens = 2000 # Default for moderate length article, was 1500 in comment
+    return prompt, calculated_max_tokens
+
+async def generate_article(
+    topic: str,
+    desired_length_words: int = 0, # 0 for model default
+    style_tone: Optional[str] = None,
+    custom_instructions: Optional[str] = None
+) -> str:
+    """
+    Generates an article on a given topic using the configured LLM.
+    """
+    if TEST_MODE:
+        return f"Test Mode: Article about '{topic}' with style '{style_tone}'. Length: {desired_length_words} words. Instructions: {custom_instructions}"
+
+    prompt, calculated_max_tokens = _article_prompt(topic, desired_length_words, style_tone, custom_instructions)
+    if prompt.startswith("Error:"): # Check for errors from load_prompt
+        return prompt # Propagate error
 
     article_text = await generate_text_completion(
         prompt=prompt,
@@ -58,6 +67,24 @@ async def generate_article(
 
     return article_text
 
+async def stream_article(
+    topic: str,
+    desired_length_words: int = 0,
+    style_tone: Optional[str] = None,
+    custom_instructions: Optional[str] = None
+) -> AsyncIterator[str]:
+    """Like generate_article, but yields the text as it is generated. Failures raise."""
+    if TEST_MODE:
+        for word in stream_words(await generate_article(topic, desired_length_words, style_tone, custom_instructions)):
+            yield word
+        return
+
+    prompt, calculated_max_tokens = _article_prompt(topic, desired_length_words, style_tone, custom_instructions)
+    if prompt.startswith("Error:"):
+        raise ValueError(prompt)
+    async for text in stream_text_completion(prompt=prompt, temperature=0.7, max_tokens=calculated_max_tokens):
+        yield text
+
 # Example usage (optional)
 # if __name__ == "__main__":
 #     import asyncio
@@ -1,13 +1,13 @@
 import os
 import numpy as np
 from scipy.io import wavfile
-from elevenlabs import ElevenLabs
-from ..config import ELEVENLABS_KEY, TEST_MODE, ELEVENLABS_VOICES, DEFAULT_VOICE
-import asyncio
+from ..config import TEST_MODE, ELEVENLABS_VOICES, DEFAULT_VOICE
+from ..cancellation import raise_if_cancelled
+from ..jobs.blobs import cached_file
+from ..metrics import timed
+from ..providers import get_async_elevenlabs_client
 from pydub import AudioSegment
 
-eleven_client = ElevenLabs(api_key=ELEVENLABS_KEY)
-
 def create_mock_audio(duration=5, sample_rate=44100):
     """Create a simple sine wave audio file."""
     t = np.linspace(0, duration, int(sample_rate * duration))
@@ -15,20 +15,34 @@ def create_mock_audio(duration=5, sample_rate=44100):
     audio = (audio * 32767).astype(np.int16)  # Convert to 16-bit PCM
     return audio, sample_rate
 
+async def _synthesize_speech(text: str, voice_id: str) -> bytes:
+    """Stream speech from ElevenLabs, stopping between chunks if the job is cancelled."""
+    audio_stream = get_async_elevenlabs_client().text_to_speech.convert(
+        text=text,
+        voice_id=voice_id
+    )
+    chunks = []
+    try:
+        async for chunk in audio_stream:
+            raise_if_cancelled()
+            chunks.append(chunk)
+    finally:
+        # Closing the stream early aborts the HTTP response
+        aclose = getattr(audio_stream, "aclose", None)
+        if aclose is not None:
+            await aclose()
+    return b''.join(chunks)
+
 async def generate_voice_over(text: str, output_path: str, voice_name: str = None):
     """
-    Generate voice-over for the text.
+    Generate voice-over for the text. Speech already generated for the same
+    text and voice is linked from the blob store instead.
     
     Args:
         text (str): The text to convert to speech
         output_path (str): Where to save the audio file
         voice_name (str, optional): Name of the voice to use
     """
-    if TEST_MODE:
-        audio, sample_rate = create_mock_audio(duration=10)  # 10 seconds of audio
-        wavfile.write(output_path, sample_rate, audio)
-        return
-    
     # Get the voice ID
     voice_name = voice_name.lower() if voice_name else DEFAULT_VOICE
     if voice_name not in ELEVENLABS_VOICES:
@@ -36,15 +50,17 @@ async def generate_voice_over(text: str, output_path: str, voice_name: str = Non
         voice_name = DEFAULT_VOICE
     
     voice_id = ELEVENLABS_VOICES[voice_name]
+    key = {"artifact": "voice_over", "text": text, "voice_id": voice_id, "test_mode": TEST_MODE}
+    await cached_file(key, output_path, lambda: _generate_voice_over(text, output_path, voice_id))
+
+@timed("elevenlabs", "voice_over")
+async def _generate_voice_over(text: str, output_path: str, voice_id: str):
+    if TEST_MODE:
+        audio, sample_rate = create_mock_audio(duration=10)  # 10 seconds of audio
+        wavfile.write(output_path, sample_rate, audio)
+        return
     
-    # Generate audio using the text-to-speech endpoint
-    audio_stream = eleven_client.text_to_speech.convert(
-        text=text,
-        voice_id=voice_id
-    )
-    
-    # Convert generator to bytes
-    audio_data = b''.join(chunk for chunk in audio_stream)
+    audio_data = await _synthesize_speech(text, voice_id)
     
     # Save the audio
     with open(output_path, 'wb') as f:
@@ -61,6 +77,11 @@ async def generate_dialogue(dialogues: list, output_path: str, voice1: str = "ra
         voice1 (str): Voice to use for speaker 1
         voice2 (str): Voice to use for speaker 2
     """
+    key = {"artifact": "dialogue", "dialogues": [list(line) for line in dialogues],
+           "voices": [voice1, voice2], "test_mode": TEST_MODE}
+    await cached_file(key, output_path, lambda: _generate_dialogue(dialogues, output_path, voice1, voice2))
+
+async def _generate_dialogue(dialogues: list, output_path: str, voice1: str, voice2: str):
     if TEST_MODE:
         audio, sample_rate = create_mock_audio(duration=len(dialogues) * 5)  # 5 seconds per dialogue
         wavfile.write(output_path, sample_rate, audio)
@@ -99,7 +120,11 @@ async def generate_dialogue(dialogues: list, output_path: str, voice1: str = "ra
             os.rmdir(temp_dir)
 
 async def generate_background_music(duration: int, output_path: str):
-    """Generate background music."""
+    """Generate background music (linked from the blob store if a bed of this length exists)."""
+    key = {"artifact": "background_music", "duration": duration, "test_mode": TEST_MODE}
+    await cached_file(key, output_path, lambda: _generate_background_music(duration, output_path))
+
+async def _generate_background_music(duration: int, output_path: str):
     if TEST_MODE:
         audio, sample_rate = create_mock_audio(duration=duration)
         wavfile.write(output_path, sample_rate, audio)
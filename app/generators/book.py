@@ -1,30 +1,19 @@
-from typing import Optional, List
-from app.llm_clients import generate_text_completion
+from typing import AsyncIterator, Optional, List, Tuple
+from app.llm_clients import generate_text_completion, stream_text_completion, stream_words
 from app.config import TEST_MODE
 from app.utils import load_prompt # Import the new utility
 
-async def generate_book_chapter(
-    plot_summary: Optional[str] = None,
-    chapter_topic: Optional[str] = None,
-    previous_chapter_summary: Optional[str] = None,
-    characters: Optional[List[str]] = None,
-    genre: Optional[str] = None,
-    style_tone: Optional[str] = None, # Added from ContentRequest common params
-    desired_length_words: int = 0, # Added from ContentRequest common params
-    custom_instructions: Optional[str] = None # Added for consistency
-) -> str:
-    """
-    Generates a book chapter using the configured LLM.
-    This is a basic version and can be significantly enhanced.
-    """
-    if TEST_MODE:
-        return (f"Test Mode: Book chapter. Genre: {genre}, Style: {style_tone}.\n"
-                f"Chapter Topic: {chapter_topic}\nPlot Summary: {plot_summary}\n"
-                f"Characters: {', '.join(characters) if characters else 'N/A'}\n"
-                f"Previous Chapter Summary: {previous_chapter_summary}\n"
-                f"Desired Length: {desired_length_words} words.\n"
-                f"Custom Instructions: {custom_instructions}")
-
+def _chapter_prompt(
+    plot_summary: Optional[str],
+    chapter_topic: Optional[str],
+    previous_chapter_summary: Optional[str],
+    characters: Optional[List[str]],
+    genre: Optional[str],
+    style_tone: Optional[str],
+    desired_length_words: int,
+    custom_instructions: Optional[str]
+) -> Tuple[str, int]:
+    """The chapter prompt (or a load_prompt "Error: ..." string) and its token budget."""
     # Construct optional sections
     characters_section_str = ""
     if characters:
@@ -57,9 +46,6 @@ async def generate_book_chapter(
         custom_instructions_section=custom_instructions_section_str
     )
 
-    if prompt.startswith("Error:"): # Check for errors from load_prompt
-        return prompt # Propagate error
-
     calculated_max_tokens = 0
     if desired_length_words > 0:
         calculated_max_tokens = int(desired_length_words * 1.6) # Slightly higher factor for prose
@@ -68,6 +54,36 @@ async def generate_book_chapter(
         # Anthropic's Claude-2 has a 100k token context window, but max_tokens_to_sample is often less for one-off completion.
         # Let's set a large default, but be mindful of LLM limits for single call.
         calculated_max_tokens = 3000 # Default tokens, might be ~2000 words. Can be increased.
+    return prompt, calculated_max_tokens
+
+async def generate_book_chapter(
+    plot_summary: Optional[str] = None,
+    chapter_topic: Optional[str] = None,
+    previous_chapter_summary: Optional[str] = None,
+    characters: Optional[List[str]] = None,
+    genre: Optional[str] = None,
+    style_tone: Optional[str] = None, # Added from ContentRequest common params
+    desired_length_words: int = 0, # Added from ContentRequest common params
+    custom_instructions: Optional[str] = None # Added for consistency
+) -> str:
+    """
+    Generates a book chapter using the configured LLM.
+    This is a basic version and can be significantly enhanced.
+    """
+    if TEST_MODE:
+        return (f"Test Mode: Book chapter. Genre: {genre}, Style: {style_tone}.\n"
+                f"Chapter Topic: {chapter_topic}\nPlot Summary: {plot_summary}\n"
+                f"Characters: {', '.join(characters) if characters else 'N/A'}\n"
+                f"Previous Chapter Summary: {previous_chapter_summary}\n"
+                f"Desired Length: {desired_length_words} words.\n"
+                f"Custom Instructions: {custom_instructions}")
+
+    prompt, calculated_max_tokens = _chapter_prompt(
+        plot_summary, chapter_topic, previous_chapter_summary, characters, genre, style_tone,
+        desired_length_words, custom_instructions
+    )
+    if prompt.startswith("Error:"): # Check for errors from load_prompt
+        return prompt # Propagate error
 
     chapter_text = await generate_text_completion(
         prompt=prompt,
@@ -80,6 +96,35 @@ async def generate_book_chapter(
 
     return chapter_text
 
+async def stream_book_chapter(
+    plot_summary: Optional[str] = None,
+    chapter_topic: Optional[str] = None,
+    previous_chapter_summary: Optional[str] = None,
+    characters: Optional[List[str]] = None,
+    genre: Optional[str] = None,
+    style_tone: Optional[str] = None,
+    desired_length_words: int = 0,
+    custom_instructions: Optional[str] = None
+) -> AsyncIterator[str]:
+    """Like generate_book_chapter, but yields the text as it is generated. Failures raise."""
+    if TEST_MODE:
+        chapter_text = await generate_book_chapter(
+            plot_summary, chapter_topic, previous_chapter_summary, characters, genre, style_tone,
+            desired_length_words, custom_instructions
+        )
+        for word in stream_words(chapter_text):
+            yield word
+        return
+
+    prompt, calculated_max_tokens = _chapter_prompt(
+        plot_summary, chapter_topic, previous_chapter_summary, characters, genre, style_tone,
+        desired_length_words, custom_instructions
+    )
+    if prompt.startswith("Error:"):
+        raise ValueError(prompt)
+    async for text in stream_text_completion(prompt=prompt, temperature=0.75, max_tokens=calculated_max_tokens):
+        yield text
+
 # Example usage (optional)
 # if __name__ == "__main__":
 #     import asyncio
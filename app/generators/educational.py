@@ -1,8 +1,8 @@
-from anthropic import Anthropic
-from ..config import ANTHROPIC_KEY, TEST_MODE
-
-anthropic_client = Anthropic(api_key=ANTHROPIC_KEY)
+from ..config import TEST_MODE
+from ..metrics import timed
+from ..providers import get_async_anthropic_client
 
+@timed("anthropic", "educational")
 async def generate_educational_content(
     topic: str,
     style: str = "lecture",
@@ -28,7 +28,7 @@ Let's break down the key concepts of {topic} for {difficulty} level learners."""
 
 \n\nAssistant: I'll create an educational {style} about {topic}."""
     
-    response = anthropic_client.completions.create(
+    response = await get_async_anthropic_client().completions.create(
         prompt=prompt,
         model="claude-2",
         max_tokens_to_sample=1000,
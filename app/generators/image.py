@@ -2,10 +2,11 @@ import os
 import io
 from PIL import Image
 import stability_sdk.interfaces.gooseai.generation.generation_pb2 as generation
-from stability_sdk import client as stability_client
-from ..config import STABILITY_KEY, TEST_MODE
-
-stability_client = stability_client.StabilityInference(key=STABILITY_KEY)
+from ..config import TEST_MODE
+from ..cancellation import raise_if_cancelled
+from ..jobs.blobs import cached_file
+from ..metrics import timed
+from ..providers import get_stability_client, run_blocking
 
 def create_mock_image(width=512, height=512, color=(100, 100, 200), text="Test Image"):
     """Create a simple test image with text."""
@@ -45,28 +46,42 @@ async def generate_images(
     
     return image_paths
 
+# Generation settings; with a fixed seed the same prompt always gives the same image
+IMAGE_SETTINGS = {"seed": 123, "steps": 30, "cfg_scale": 7.0, "width": 512, "height": 512}
+
 async def generate_image(prompt: str, output_path: str):
-    """Generate a single image from a prompt."""
+    """Generate a single image from a prompt (linked from the blob store if it was generated before)."""
+    key = {"artifact": "image", "prompt": prompt, "test_mode": TEST_MODE, **IMAGE_SETTINGS}
+    await cached_file(key, output_path, lambda: _generate_image(prompt, output_path))
+
+@timed("stability", "image")
+async def _generate_image(prompt: str, output_path: str):
     if TEST_MODE:
         img = create_mock_image(text=prompt[:20])
         img.save(output_path)
         return
     
-    # Generate image using Stability AI API
-    answers = stability_client.generate(
+    # The gRPC client blocks, so the request runs on a provider thread
+    await run_blocking(_request_image, prompt, output_path)
+
+def _request_image(prompt: str, output_path: str):
+    """Generate an image with Stability AI and save it, unless the job is cancelled first."""
+    raise_if_cancelled()
+    answers = get_stability_client().generate(
         prompt=prompt,
-        seed=123,
-        steps=30,
-        cfg_scale=7.0,
-        width=512,
-        height=512,
         samples=1,
-        sampler=generation.SAMPLER_K_DPMPP_2M
+        sampler=generation.SAMPLER_K_DPMPP_2M,
+        **IMAGE_SETTINGS
     )
     
-    for resp in answers:
-        for artifact in resp.artifacts:
-            if artifact.type == generation.ARTIFACT_IMAGE:
-                img = Image.open(io.BytesIO(artifact.binary))
-                img.save(output_path)
-                return 
\ No newline at end of file
+    try:
+        for resp in answers:
+            raise_if_cancelled()
+            for artifact in resp.artifacts:
+                if artifact.type == generation.ARTIFACT_IMAGE:
+                    img = Image.open(io.BytesIO(artifact.binary))
+                    img.save(output_path)
+                    return
+    finally:
+        # Closing the response generator cancels the gRPC stream if it is still open
+        answers.close()
@@ -1,8 +1,8 @@
-from openai import AsyncOpenAI
-from ..config import OPENAI_KEY, OPENAI_MODEL, OPENAI_TEMPERATURE, OPENAI_MAX_TOKENS
-
-client = AsyncOpenAI(api_key=OPENAI_KEY)
+from ..config import OPENAI_MODEL, OPENAI_TEMPERATURE, OPENAI_MAX_TOKENS
+from ..metrics import timed
+from ..providers import get_async_openai_client
 
+@timed("openai", "completion")
 async def generate_content_with_openai(prompt: str, system_prompt: str = None) -> str:
     """
     Generate content using OpenAI's API.
@@ -20,7 +20,7 @@ async def generate_content_with_openai(prompt: str, system_prompt: str = None) -
             messages.append({"role": "system", "content": system_prompt})
         messages.append({"role": "user", "content": prompt})
 
-        response = await client.chat.completions.create(
+        response = await get_async_openai_client().chat.completions.create(
             model=OPENAI_MODEL,
             messages=messages,
             temperature=OPENAI_TEMPERATURE,
@@ -2,16 +2,29 @@ import asyncio
 # from anthropic import Anthropic # Removed
 # from ..config import ANTHROPIC_KEY, TEST_MODE # ANTHROPIC_KEY removed, TEST_MODE kept
 from ..config import TEST_MODE # Keep TEST_MODE
-from ..llm_clients import generate_text_completion # Import new function
+from ..llm_clients import generate_text_completion, stream_text_completion, stream_words # Import new function
 import os
-from typing import List, Tuple
-from openai import OpenAI
-from ..config import OPENAI_KEY
+from typing import AsyncIterator, List, Tuple
+from ..providers import get_async_openai_client
 
 # # Initialize Anthropic client # Removed
 # anthropic_client = Anthropic(api_key=ANTHROPIC_KEY)
 
-client = OpenAI(api_key=OPENAI_KEY)
+def _topic_prompt(topic: str) -> str:
+    return f"""Create a natural, engaging podcast script about {topic}. 
+    Write it as a single, flowing narrative without any labels or formatting.
+    The script should be approximately 3-5 minutes in reading length.
+    Start with a brief introduction, then dive into the main content, and end with a conclusion.
+    Make it conversational and engaging, as if you're speaking directly to the listener.
+    Do not include any labels like 'Host:', 'Introduction:', or 'Conclusion:'.
+    Just write the natural flow of the conversation."""
+
+FREE_PODCAST_PROMPT = """Create a natural, engaging podcast script on any interesting topic of your choice.
+    Write it as a single, flowing narrative without any labels or formatting.
+    The script should be suitable for a general audience and approximately 3-5 minutes in reading length.
+    Make it conversational and engaging, as if you're speaking directly to the listener.
+    Do not include any labels like 'Host:', 'Introduction:', or 'Conclusion:'.
+    Just write the natural flow of the conversation."""
 
 async def generate_podcast_from_custom_text(text: str) -> str:
     """Generates podcast content directly from custom text."""
@@ -24,13 +37,7 @@ async def generate_podcast_from_topic(topic: str) -> str:
     if TEST_MODE:
         return f"Test mode: Podcast for topic: {topic}"
 
-    prompt = f"""Create a natural, engaging podcast script about {topic}. 
-    Write it as a single, flowing narrative without any labels or formatting.
-    The script should be approximately 3-5 minutes in reading length.
-    Start with a brief introduction, then dive into the main content, and end with a conclusion.
-    Make it conversational and engaging, as if you're speaking directly to the listener.
-    Do not include any labels like 'Host:', 'Introduction:', or 'Conclusion:'.
-    Just write the natural flow of the conversation."""
+    prompt = _topic_prompt(topic)
 
     try:
         # response = await asyncio.to_thread( # Replaced
@@ -58,12 +65,7 @@ async def generate_free_podcast() -> str:
     if TEST_MODE:
         return "Test mode: Freeform podcast generated."
 
-    prompt = """Create a natural, engaging podcast script on any interesting topic of your choice.
-    Write it as a single, flowing narrative without any labels or formatting.
-    The script should be suitable for a general audience and approximately 3-5 minutes in reading length.
-    Make it conversational and engaging, as if you're speaking directly to the listener.
-    Do not include any labels like 'Host:', 'Introduction:', or 'Conclusion:'.
-    Just write the natural flow of the conversation."""
+    prompt = FREE_PODCAST_PROMPT
 
     try:
         # response = await asyncio.to_thread( # Replaced
@@ -77,7 +79,8 @@ async def generate_free_podcast() -> str:
         generated_script = await generate_text_completion(
             prompt=prompt,
             temperature=0.7,
-            max_tokens=2000
+            max_tokens=2000,
+            cacheable=False # The topic is the model's choice, so each call should differ
         )
         if generated_script.startswith("Error:"): # Check if our new function returned an error
             raise Exception(generated_script)
@@ -86,6 +89,24 @@ async def generate_free_podcast() -> str:
         print(f"Error generating freeform podcast: {e}")
         return f"Error: Could not generate freeform podcast. Details: {e}"
 
+async def stream_podcast_from_topic(topic: str) -> AsyncIterator[str]:
+    """Like generate_podcast_from_topic, but yields the script as it is generated. Failures raise."""
+    if TEST_MODE:
+        for word in stream_words(await generate_podcast_from_topic(topic)):
+            yield word
+        return
+    async for text in stream_text_completion(prompt=_topic_prompt(topic), temperature=0.7, max_tokens=2000):
+        yield text
+
+async def stream_free_podcast() -> AsyncIterator[str]:
+    """Like generate_free_podcast, but yields the script as it is generated. Failures raise."""
+    if TEST_MODE:
+        for word in stream_words(await generate_free_podcast()):
+            yield word
+        return
+    async for text in stream_text_completion(prompt=FREE_PODCAST_PROMPT, temperature=0.7, max_tokens=2000, cacheable=False):
+        yield text
+
 def create_mock_dialogue() -> List[Tuple[int, str]]:
     """Create a mock dialogue for testing."""
     print("\n⚠️ WARNING: Using mock dialogue - this indicates a failure in the actual dialogue generation!")
@@ -154,8 +175,7 @@ async def generate_dialogue_content(topic: str, num_exchanges: int = 6) -> List[
         try:
             print(f"Attempt {retry_count + 1}/{max_retries} to generate dialogue...")
             
-            response = await asyncio.to_thread(
-                client.chat.completions.create,
+            response = await get_async_openai_client().chat.completions.create(
                 model="gpt-4",
                 messages=[
                     {
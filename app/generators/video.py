@@ -5,9 +5,48 @@ from moviepy.video.VideoClip import TextClip #CompositeVideoClip
 import numpy as np
 import os
 import asyncio
-from concurrent.futures import ThreadPoolExecutor
+import multiprocessing
+import tempfile
+import threading
+import time
+import uuid
+from concurrent.futures import ProcessPoolExecutor
+from concurrent.futures.process import BrokenProcessPool
+from proglog import TqdmProgressBarLogger
+from ..cancellation import JobCancelledError, raise_if_cancelled
+from ..config import RENDER_PROCESSES
+from ..metrics import current_content_type, PROVIDER_SECONDS, RENDER_JOBS
 
-def create_video(image_paths, voice_over_path, background_music_path, output_path, video_prompt=None, content_type=None, fps=1, dialogues=None):
+# How long a cancelled job waits for its render process to stop before its files are removed
+RENDER_CANCEL_GRACE_SECONDS = 10.0
+
+class RenderCrashedError(RuntimeError):
+    """Raised when the render process died (e.g. killed for memory) twice in a row."""
+
+class CancellableRenderLogger(TqdmProgressBarLogger):
+    """moviepy progress logger that aborts the render once the job is cancelled.
+
+    moviepy reports progress for every frame and audio chunk it writes; raising
+    from the callback unwinds the writer, which closes (and so stops) ffmpeg.
+    Renders in the pool are cancelled by creating the `cancel_path` marker file.
+    """
+
+    def __init__(self, cancel_path=None):
+        super().__init__()
+        self.cancel_path = cancel_path
+        self._checked_at = 0.0
+
+    def bars_callback(self, bar, attr, value, old_value=None):
+        super().bars_callback(bar, attr, value, old_value)
+        raise_if_cancelled()
+        # Audio is reported in small chunks, so the marker is looked up at most a few times a second
+        now = time.monotonic()
+        if self.cancel_path and now - self._checked_at > 0.25:
+            self._checked_at = now
+            if os.path.exists(self.cancel_path):
+                raise JobCancelledError("Render was cancelled")
+
+def create_video(image_paths, voice_over_path, background_music_path, output_path, video_prompt=None, content_type=None, fps=1, dialogues=None, cancel_path=None):
     """
     Create a video from images, voice-over, and background music.
     
@@ -20,6 +59,7 @@ def create_video(image_paths, voice_over_path, background_music_path, output_pat
         content_type (str, optional): Type of content ("story" or "educational")
         fps (int, optional): Frames per second. Defaults to 1.
         dialogues (list, optional): List of tuples containing (speaker_number, text) for dialogue visualization
+        cancel_path (str, optional): The render stops if this file appears
     """
     # Verify all input files exist
     for path in [voice_over_path, background_music_path] + image_paths:
@@ -102,7 +142,7 @@ def create_video(image_paths, voice_over_path, background_music_path, output_pat
         os.makedirs(os.path.dirname(output_path), exist_ok=True)
         
         # Write the result to a file
-        clip.write_videofile(output_path, codec='libx264', audio_codec='aac')
+        clip.write_videofile(output_path, codec='libx264', audio_codec='aac', logger=CancellableRenderLogger(cancel_path))
         
         return output_path
     
@@ -115,21 +155,93 @@ def create_video(image_paths, voice_over_path, background_music_path, output_pat
         if 'clip' in locals():
             clip.close()
 
+# Renders run in long-lived processes, so moviepy's Python frame loop never competes with
+# the worker's event loop for the GIL and concurrent renders use separate cores
+_render_pool = None
+_render_pool_lock = threading.Lock()
+_renders_in_flight = 0
+
+def _get_render_pool() -> ProcessPoolExecutor:
+    global _render_pool
+    with _render_pool_lock:
+        if _render_pool is None:
+            # "spawn": forking a process that holds an event loop, threads and database connections is unsafe
+            _render_pool = ProcessPoolExecutor(
+                max_workers=RENDER_PROCESSES,
+                mp_context=multiprocessing.get_context("spawn")
+            )
+        return _render_pool
+
+def _discard_render_pool(pool: ProcessPoolExecutor) -> None:
+    """Replace a pool whose process died; the next render starts a fresh one."""
+    global _render_pool
+    with _render_pool_lock:
+        if _render_pool is pool:
+            _render_pool = None
+    pool.shutdown(wait=False, cancel_futures=True)
+
+def shutdown_render_pool() -> None:
+    """Stop the render processes (at shutdown); renders still queued are cancelled."""
+    global _render_pool
+    with _render_pool_lock:
+        pool, _render_pool = _render_pool, None
+    if pool is not None:
+        pool.shutdown(wait=True, cancel_futures=True)
+
+def _track_render(delta: int) -> None:
+    global _renders_in_flight
+    with _render_pool_lock:
+        _renders_in_flight += delta
+        running = min(_renders_in_flight, RENDER_PROCESSES)
+        RENDER_JOBS.set(running, state="running")
+        RENDER_JOBS.set(_renders_in_flight - running, state="queued")
+
+def _render(*args):
+    """Runs in a render process; returns the output path and the render's duration."""
+    started = time.perf_counter()
+    output_path = create_video(*args)
+    return output_path, time.perf_counter() - started
+
 async def create_video_async(image_paths, voice_over_path, background_music_path, output_path, video_prompt=None, content_type=None, fps=1, dialogues=None):
     """
-    Asynchronous wrapper for create_video function.
+    Render a video in the render process pool.
+
+    If a render process crashes, the pool is replaced and the render retried
+    once. Cancelling the calling task stops the render and waits (briefly) for
+    its process to let go of the output files.
     """
-    loop = asyncio.get_event_loop()
-    with ThreadPoolExecutor() as pool:
-        return await loop.run_in_executor(
-            pool,
-            create_video,
-            image_paths,
-            voice_over_path,
-            background_music_path,
-            output_path,
-            video_prompt,
-            content_type,
-            fps,
-            dialogues
-        )
\ No newline at end of file
+    cancel_path = os.path.join(tempfile.gettempdir(), f"render-cancel-{uuid.uuid4().hex}")
+    args = (image_paths, voice_over_path, background_music_path, output_path,
+            video_prompt, content_type, fps, dialogues, cancel_path)
+    labels = {"provider": "moviepy", "operation": "render", "content_type": current_content_type.get()}
+    started = time.perf_counter()
+    try:
+        for attempt in (1, 2):
+            pool = _get_render_pool()
+            _track_render(1)
+            try:
+                future = pool.submit(_render, *args)
+                result, seconds = await asyncio.wrap_future(future)
+                PROVIDER_SECONDS.observe(seconds, outcome="ok", **labels)
+                return result
+            except BrokenProcessPool:
+                _discard_render_pool(pool)
+                if attempt == 2:
+                    raise RenderCrashedError("The render process crashed")
+                print("Render: render process crashed, retrying on a fresh pool")
+            except asyncio.CancelledError:
+                with open(cancel_path, "w"):
+                    pass
+                try:
+                    await asyncio.wait_for(asyncio.wrap_future(future), RENDER_CANCEL_GRACE_SECONDS)
+                except BaseException:
+                    pass  # Stopped (JobCancelledError), finished anyway, or still winding down
+                raise
+            finally:
+                _track_render(-1)
+    except BaseException:
+        PROVIDER_SECONDS.observe(time.perf_counter() - started, outcome="error", **labels)
+        raise
+    finally:
+        if os.path.exists(cancel_path):
+            os.remove(cancel_path)
@@ -0,0 +1,82 @@
+"""
+Import-time budget report.
+
+Imports the given modules in a fresh interpreter with `-X importtime` and
+reports the total, the packages that cost the most, and which heavy SDK or
+media packages were loaded at startup:
+
+    python -m app.import_budget                      # the worker, text jobs only
+    python -m app.import_budget app.main --budget 1.5
+
+Exits with status 1 when the total exceeds the budget.
+"""
+import argparse
+import os
+import subprocess
+import sys
+from dataclasses import dataclass, field
+from typing import Dict, List, Sequence
+
+# Packages only the media stages or a specific provider should load
+HEAVY_PACKAGES = (
+    "anthropic", "openai", "elevenlabs", "stability_sdk", "grpc",
+    "moviepy", "numpy", "scipy", "pydub", "PIL",
+)
+
+DEFAULT_MODULES = ("app.worker", "app.jobs.runner")
+
+
+@dataclass
+class ImportReport:
+    total_seconds: float
+    # Top-level package -> seconds spent importing its own modules
+    packages: Dict[str, float] = field(default_factory=dict)
+
+    @property
+    def heavy(self) -> List[str]:
+        return [name for name in HEAVY_PACKAGES if name in self.packages]
+
+
+def measure(modules: Sequence[str] = DEFAULT_MODULES) -> ImportReport:
+    """Import `modules` in a new interpreter and add up the reported times."""
+    code = "; ".join(f"import {module}" for module in modules)
+    result = subprocess.run(
+        [sys.executable, "-X", "importtime", "-c", code],
+        capture_output=True, text=True, env=os.environ.copy(),
+    )
+    if result.returncode != 0:
+        raise RuntimeError(f"{code!r} failed: {result.stderr.strip().splitlines()[-1]}")
+    total_us = 0
+    packages: Dict[str, float] = {}
+    for line in result.stderr.splitlines():
+        if not line.startswith("import time:") or "|" not in line:
+            continue
+        self_us, cumulative_us, name = line[len("import time:"):].split("|")
+        if not self_us.strip().isdigit():
+            continue  # Header line
+        package = name.strip().split(".")[0]
+        packages[package] = packages.get(package, 0.0) + int(self_us) / 1e6
+        if not name[1:].startswith(" "):
+            total_us += int(cumulative_us)  # Top-level import
+    return ImportReport(total_seconds=total_us / 1e6, packages=packages)
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description="Report the import time of the given modules.")
+    parser.add_argument("modules", nargs="*", default=list(DEFAULT_MODULES))
+    parser.add_argument("--budget", type=float, default=1.0, help="Seconds allowed (default: 1.0)")
+    parser.add_argument("--top", type=int, default=10, help="Packages to list (default: 10)")
+    args = parser.parse_args()
+
+    report = measure(args.modules)
+    print(f"Importing {', '.join(args.modules)}: {report.total_seconds:.3f}s (budget {args.budget:.3f}s)")
+    for package, seconds in sorted(report.packages.items(), key=lambda item: -item[1])[:args.top]:
+        print(f"  {seconds:8.3f}s  {package}")
+    print(f"Heavy packages loaded: {', '.join(report.heavy) or 'none'}")
+    if report.total_seconds > args.budget:
+        print("Over budget")
+        sys.exit(1)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,22 @@
+from .store import (
+    JobStore,
+    MemoryJobStore,
+    SQLiteJobStore,
+    CachedJobStore,
+    JobNotFoundError,
+    DuplicateJobError,
+    TERMINAL_STATUSES,
+    ACTIVE_STATUSES,
+    create_job_store,
+    get_job_store,
+)
+from .queue import (
+    JobQueue,
+    MemoryJobQueue,
+    SQLiteJobQueue,
+    QueueItem,
+    create_job_queue,
+    get_job_queue,
+)
+
+# This makes the store and queue available as: from app.jobs import get_job_store, get_job_queue
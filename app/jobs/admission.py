@@ -0,0 +1,116 @@
+import math
+import time
+from collections import deque
+from typing import Deque, Dict, Iterable, Set
+
+from ..models import JobEvent
+from .events import is_terminal_event
+from .queue import JobQueue
+from .store import JobStore
+
+
+class QueueFullError(Exception):
+    """Raised when admitting a job would push its queue past the configured limit."""
+
+    def __init__(self, message: str, retry_after: int):
+        super().__init__(message)
+        self.retry_after = retry_after
+
+
+class AdmissionController:
+    """
+    Decides whether new jobs may be queued.
+
+    Each content type has its own limit on queued (not yet started) jobs, and
+    job classes outside the fast lane also share `total_limit`. Rejections
+    carry a Retry-After estimate: the backlog that has to drain divided by the
+    throughput of the job's class. Throughput is measured from finished-job
+    events over a sliding window, falling back to `job_seconds` per job and
+    worker until enough jobs have finished.
+    """
+
+    def __init__(
+        self,
+        store: JobStore,
+        queue: JobQueue,
+        job_classes: Dict[str, str],
+        limits: Dict[str, int],
+        concurrency: Dict[str, int],
+        job_seconds: Dict[str, float],
+        total_limit: int = 0,
+        fast_lane: Iterable[str] = ("text",),
+        window_seconds: float = 900.0
+    ):
+        self.store = store
+        self.queue = queue
+        self.job_classes = job_classes
+        self.limits = limits
+        self.concurrency = concurrency
+        self.job_seconds = job_seconds
+        self.total_limit = total_limit
+        self.fast_lane: Set[str] = set(fast_lane)
+        self.window_seconds = window_seconds
+        self._finished: Dict[str, Deque[float]] = {}
+
+    def observe(self, event: JobEvent) -> None:
+        """EventBroker observer: record when jobs finish, per job class."""
+        if not is_terminal_event(event) or event.data.get("status") in ("expired", "cancelled"):
+            return
+        job_class = self.job_classes.get(event.data.get("content_type"))
+        if job_class is not None:
+            self._finished.setdefault(job_class, deque()).append(time.monotonic())
+
+    def throughput(self, job_class: str) -> float:
+        """Jobs per second the class is currently finishing."""
+        finished = self._finished.get(job_class)
+        cutoff = time.monotonic() - self.window_seconds
+        while finished and finished[0] < cutoff:
+            finished.popleft()
+        # A handful of completions is too noisy; use the configured estimate until then
+        if finished and len(finished) >= 3:
+            elapsed = max(time.monotonic() - finished[0], 1.0)
+            return len(finished) / elapsed
+        workers = max(self.concurrency.get(job_class, 1), 1)
+        return workers / max(self.job_seconds.get(job_class, 60.0), 1.0)
+
+    def retry_after(self, job_class: str, excess: int) -> int:
+        """Seconds until `excess` queued jobs of the class should have started."""
+        seconds = math.ceil(max(excess, 1) / self.throughput(job_class))
+        return min(max(seconds, 1), 3600)
+
+    def check(self, requested: Dict[str, int]) -> None:
+        """
+        Admit `requested` new jobs ({content_type: count}) or raise
+        QueueFullError. A batch is admitted or rejected as a whole.
+        """
+        queued = self.store.count_jobs("queued", content_types=list(requested))
+        for content_type, count in requested.items():
+            limit = self.limits.get(content_type, 0)
+            if limit > 0 and queued.get(content_type, 0) + count > limit:
+                excess = queued.get(content_type, 0) + count - limit
+                raise QueueFullError(
+                    f"Too many queued {content_type} jobs (limit {limit}). Try again later.",
+                    self.retry_after(self.job_classes[content_type], excess),
+                )
+
+        heavy: Dict[str, int] = {}
+        for content_type, count in requested.items():
+            job_class = self.job_classes[content_type]
+            if job_class not in self.fast_lane:
+                heavy[job_class] = heavy.get(job_class, 0) + count
+        if self.total_limit > 0 and heavy:
+            depth = self.queue.depth()
+            backlog = sum(stats["queued"] for job_class, stats in depth.items() if job_class not in self.fast_lane)
+            if backlog + sum(heavy.values()) > self.total_limit:
+                excess = backlog + sum(heavy.values()) - self.total_limit
+                slowest = min(heavy, key=self.throughput)
+                raise QueueFullError(
+                    "The job queue is full. Try again later.",
+                    self.retry_after(slowest, excess),
+                )
+
+    def stats(self) -> Dict[str, Dict[str, float]]:
+        return {
+            job_class: {"throughput_per_minute": round(self.throughput(job_class) * 60, 2)}
+            for job_class in sorted(set(self.job_classes.values()))
+        }
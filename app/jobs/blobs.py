@@ -0,0 +1,188 @@
+"""
+Content-addressed storage for generated artifacts.
+
+Images, speech, music and renders are stored once under their SHA-256 in
+hash-sharded directories (objects/ab/abcd...), and job directories hold
+hardlinks to them. A blob's link count is therefore its reference count:
+deleting a job's directory drops its references, and `collect_garbage`
+removes blobs no job links to any more.
+
+Generators go through `cached_file`, which also remembers which blob a set of
+inputs produced, so generating the same artifact again is a link instead of
+a provider call.
+"""
+import asyncio
+import hashlib
+import json
+import os
+import uuid
+from typing import Any, Awaitable, Callable, Dict, List, Optional, Tuple
+
+from ..config import BLOB_STORE_DIR, BLOB_STORE_ENABLED
+from ..metrics import record_cache
+from .checkpoints import file_sha256
+
+
+def _sharded(directory: str, name: str) -> str:
+    return os.path.join(directory, name[:2], name)
+
+
+def _remove(path: str) -> None:
+    try:
+        os.remove(path)
+    except FileNotFoundError:
+        pass
+
+
+class BlobStore:
+    def __init__(self, root: str):
+        self.root = root
+        self.objects_dir = os.path.join(root, "objects")
+        self.keys_dir = os.path.join(root, "keys")
+
+    def blob_path(self, digest: str) -> str:
+        return _sharded(self.objects_dir, digest)
+
+    def _key_path(self, key: Dict[str, Any]) -> str:
+        payload = json.dumps(key, sort_keys=True, default=str)
+        return _sharded(self.keys_dir, hashlib.sha256(payload.encode("utf-8")).hexdigest())
+
+    def refcount(self, digest: str) -> int:
+        """Files linking to the blob, not counting the store's own link (-1 if it is not stored)."""
+        try:
+            return os.stat(self.blob_path(digest)).st_nlink - 1
+        except FileNotFoundError:
+            return -1
+
+    def add(self, path: str, digest: Optional[str] = None) -> Optional[str]:
+        """
+        Store the file at `path` and return its digest. If the content is already
+        stored, `path` is replaced by a link to the stored copy, so the duplicate's
+        space is freed. Returns None when the filesystem does not support hardlinks
+        (the file is then left as it is).
+        """
+        digest = digest or file_sha256(path)
+        blob = self.blob_path(digest)
+        os.makedirs(os.path.dirname(blob), exist_ok=True)
+        for _ in range(2):
+            try:
+                os.link(path, blob)
+                return digest
+            except FileExistsError:
+                try:
+                    if os.path.samefile(path, blob):
+                        return digest
+                except FileNotFoundError:
+                    continue
+                if self.link(digest, path):
+                    return digest
+                # Collected between the two calls: store this copy instead
+            except OSError:
+                return None
+        return None
+
+    def link(self, digest: str, target: str) -> bool:
+        """Make `target` a link to the blob (replacing any file there); False if it is not stored."""
+        tmp_path = f"{target}.{uuid.uuid4().hex[:8]}.tmp"
+        try:
+            os.link(self.blob_path(digest), tmp_path)
+        except OSError:
+            return False
+        os.replace(tmp_path, target)
+        return True
+
+    def remember(self, key: Dict[str, Any], digest: str) -> None:
+        """Record that generating from `key` produced the blob `digest`."""
+        path = self._key_path(key)
+        os.makedirs(os.path.dirname(path), exist_ok=True)
+        tmp_path = f"{path}.{uuid.uuid4().hex[:8]}.tmp"
+        with open(tmp_path, "w") as f:
+            f.write(digest)
+        os.replace(tmp_path, path)
+
+    def lookup(self, key: Dict[str, Any]) -> Optional[str]:
+        """The digest of the blob generated from `key`, if it is still stored."""
+        try:
+            with open(self._key_path(key), "r") as f:
+                digest = f.read().strip()
+        except OSError:
+            return None
+        return digest if os.path.exists(self.blob_path(digest)) else None
+
+    def collect_garbage(self) -> Tuple[int, int]:
+        """
+        Remove blobs no file links to any more, and index entries pointing at
+        removed blobs. Returns (blobs removed, bytes freed).
+        """
+        removed, freed = 0, 0
+        for directory in self._shards(self.objects_dir):
+            for name in os.listdir(directory):
+                path = os.path.join(directory, name)
+                try:
+                    stat = os.lstat(path)
+                except FileNotFoundError:
+                    continue
+                if stat.st_nlink == 1:
+                    _remove(path)
+                    removed += 1
+                    freed += stat.st_size
+        for directory in self._shards(self.keys_dir):
+            for name in os.listdir(directory):
+                if name.endswith(".tmp"):
+                    continue  # Being written by remember()
+                path = os.path.join(directory, name)
+                try:
+                    with open(path, "r") as f:
+                        digest = f.read().strip()
+                except OSError:
+                    continue
+                if not os.path.exists(self.blob_path(digest)):
+                    _remove(path)
+        return removed, freed
+
+    @staticmethod
+    def _shards(directory: str) -> List[str]:
+        if not os.path.isdir(directory):
+            return []
+        return [os.path.join(directory, name) for name in os.listdir(directory)
+                if os.path.isdir(os.path.join(directory, name))]
+
+
+def file_digests(paths: List[str]) -> List[str]:
+    """Content hashes of `paths`, for keys of artifacts made from other files."""
+    return [file_sha256(path) for path in paths]
+
+
+async def cached_file(key: Dict[str, Any], output_path: str, produce: Callable[[], Awaitable[Any]]) -> None:
+    """
+    Create `output_path` with `produce()`, unless an artifact generated from the
+    same `key` (the inputs that determine the output) is stored, in which case
+    it is linked into place. Produced files are added to the store.
+    """
+    store = get_blob_store()
+    if store is None:
+        await produce()
+        return
+    digest = await asyncio.to_thread(store.lookup, key)
+    hit = digest is not None and await asyncio.to_thread(store.link, digest, output_path)
+    record_cache("artifact", hit)
+    if hit:
+        return
+    # The path may be a link to a blob from an earlier run; writing into it would change the blob
+    _remove(output_path)
+    await produce()
+    digest = await asyncio.to_thread(store.add, output_path)
+    if digest is not None:
+        store.remember(key, digest)
+
+
+_default_store: Optional[BlobStore] = None
+
+def get_blob_store() -> Optional[BlobStore]:
+    """The process-wide blob store from app.config, or None when BLOB_STORE_ENABLED is off."""
+    global _default_store
+    if not BLOB_STORE_ENABLED:
+        return None
+    if _default_store is None:
+        _default_store = BlobStore(BLOB_STORE_DIR)
+    return _default_store
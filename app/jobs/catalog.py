@@ -0,0 +1,85 @@
+import asyncio
+import base64
+import json
+import os
+import shutil
+from datetime import datetime
+from typing import Optional, Tuple
+
+from ..models import JobRecord, VideoInfo
+from .store import JobStore
+
+VIDEO_FILENAME = "content_video.mp4"
+
+
+def link_or_copy(source: str, target: str) -> str:
+    """
+    Publish `source` at `target` without copying when possible: a hardlink,
+    else a symlink (e.g. across filesystems), else a plain copy. The target
+    appears atomically. Returns the method used.
+    """
+    tmp_path = f"{target}.tmp"
+    if os.path.lexists(tmp_path):
+        os.remove(tmp_path)
+    try:
+        os.link(source, tmp_path)
+        method = "hardlink"
+    except OSError:
+        try:
+            os.symlink(os.path.abspath(source), tmp_path)
+            method = "symlink"
+        except OSError:
+            shutil.copy2(source, tmp_path)
+            method = "copy"
+    os.replace(tmp_path, target)
+    return method
+
+
+def publish_video_sync(store: JobStore, record: JobRecord, public_dir: str) -> VideoInfo:
+    """Expose a finished render under `public_dir` and add it to the video catalog."""
+    source = os.path.join(record.output_dir, VIDEO_FILENAME)
+    os.makedirs(public_dir, exist_ok=True)
+    link_or_copy(source, os.path.join(public_dir, f"{record.job_id}.mp4"))
+    video = VideoInfo(
+        job_id=record.job_id,
+        content_type=record.content_type,
+        created_at=record.created_at,
+        video_url=f"/static/videos/{record.job_id}.mp4",
+        file_size=os.path.getsize(source)
+    )
+    store.add_video(video)
+    return video
+
+
+async def publish_video(store: JobStore, record: JobRecord, public_dir: str) -> VideoInfo:
+    # A copy fallback can take a while for large renders, so keep it off the event loop
+    return await asyncio.to_thread(publish_video_sync, store, record, public_dir)
+
+
+def backfill_catalog(store: JobStore, content_types, public_dir: str) -> int:
+    """Publish completed videos that finished before the catalog existed; returns how many."""
+    catalogued = {video.job_id for video in store.list_videos(limit=None)}
+    published = 0
+    for record in store.list_jobs(status="completed", content_types=content_types, limit=None):
+        if record.job_id in catalogued:
+            continue
+        if not os.path.exists(os.path.join(record.output_dir, VIDEO_FILENAME)):
+            continue
+        publish_video_sync(store, record, public_dir)
+        published += 1
+    return published
+
+
+def encode_cursor(video: VideoInfo) -> str:
+    """Opaque keyset cursor pointing just past `video` in catalog order."""
+    raw = json.dumps([video.created_at, video.job_id]).encode("utf-8")
+    return base64.urlsafe_b64encode(raw).decode("ascii")
+
+
+def decode_cursor(cursor: str) -> Tuple[str, str]:
+    try:
+        created_at, job_id = json.loads(base64.urlsafe_b64decode(cursor.encode("ascii")))
+        datetime.fromisoformat(created_at)
+        return str(created_at), str(job_id)
+    except (ValueError, TypeError) as e:
+        raise ValueError(f"Invalid cursor '{cursor}'") from e
@@ -0,0 +1,101 @@
+import asyncio
+import hashlib
+import json
+import os
+from datetime import datetime
+from typing import Any, Dict, List, Optional
+
+from .pipeline import Stage
+
+CHECKPOINT_DIRNAME = "checkpoints"
+
+
+def file_sha256(path: str, chunk_size: int = 1024 * 1024) -> str:
+    digest = hashlib.sha256()
+    with open(path, "rb") as f:
+        for chunk in iter(lambda: f.read(chunk_size), b""):
+            digest.update(chunk)
+    return digest.hexdigest()
+
+
+def _output_files(result: Any) -> List[str]:
+    """Files referenced by a stage result (a path, or a list/dict of paths)."""
+    if isinstance(result, str):
+        return [result] if "\n" not in result and os.path.isfile(result) else []
+    if isinstance(result, (list, tuple)):
+        return [path for item in result for path in _output_files(item)]
+    if isinstance(result, dict):
+        return [path for item in result.values() for path in _output_files(item)]
+    return []
+
+
+def _input_hash(stage_name: str, deps: Dict[str, Any]) -> str:
+    payload = json.dumps({"stage": stage_name, "deps": deps}, sort_keys=True, default=str)
+    return hashlib.sha256(payload.encode("utf-8")).hexdigest()
+
+
+def checkpoint_path(output_dir: str, stage_name: str) -> str:
+    return os.path.join(output_dir, CHECKPOINT_DIRNAME, f"{stage_name}.json")
+
+
+def save_checkpoint(output_dir: str, stage_name: str, deps: Dict[str, Any], result: Any) -> None:
+    """Record a finished stage with the content hash of every file it produced."""
+    checkpoint = {
+        "stage": stage_name,
+        "input_hash": _input_hash(stage_name, deps),
+        "result": result,
+        "files": {path: file_sha256(path) for path in _output_files(result)},
+        "completed_at": datetime.now().isoformat(),
+    }
+    path = checkpoint_path(output_dir, stage_name)
+    os.makedirs(os.path.dirname(path), exist_ok=True)
+    # Write then rename so a crash mid-write never leaves a half checkpoint behind
+    tmp_path = f"{path}.tmp"
+    with open(tmp_path, "w") as f:
+        json.dump(checkpoint, f)
+    os.replace(tmp_path, path)
+
+
+def load_checkpoint(output_dir: str, stage_name: str, deps: Dict[str, Any]) -> Optional[Dict[str, Any]]:
+    """
+    Return the checkpoint for a stage if it is still valid: same inputs, and
+    every output file present with an unchanged hash. Otherwise return None.
+    """
+    path = checkpoint_path(output_dir, stage_name)
+    try:
+        with open(path, "r") as f:
+            checkpoint = json.load(f)
+    except (OSError, json.JSONDecodeError):
+        return None
+
+    if checkpoint.get("input_hash") != _input_hash(stage_name, deps):
+        return None
+    for file_path, digest in checkpoint.get("files", {}).items():
+        if not os.path.isfile(file_path) or file_sha256(file_path) != digest:
+            return None
+    return checkpoint
+
+
+def completed_stages(output_dir: str) -> List[str]:
+    """Names of the stages that have a checkpoint on disk (valid or not)."""
+    directory = os.path.join(output_dir, CHECKPOINT_DIRNAME)
+    if not os.path.isdir(directory):
+        return []
+    return sorted(name[:-len(".json")] for name in os.listdir(directory) if name.endswith(".json"))
+
+
+def checkpointed(stage: Stage, output_dir: str, on_skip=None) -> Stage:
+    """Wrap a stage so it is skipped when a valid checkpoint exists and checkpointed when it runs."""
+
+    async def run(deps: Dict[str, Any]) -> Any:
+        # Off the event loop: hashing the outputs reads every image and the rendered video
+        checkpoint = await asyncio.to_thread(load_checkpoint, output_dir, stage.name, deps)
+        if checkpoint is not None:
+            if on_skip:
+                on_skip(stage.name)
+            return checkpoint["result"]
+        result = await stage.func(deps)
+        await asyncio.to_thread(save_checkpoint, output_dir, stage.name, deps, result)
+        return result
+
+    return Stage(stage.name, run, deps=stage.deps)
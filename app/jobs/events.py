@@ -0,0 +1,164 @@
+import asyncio
+from datetime import datetime, timedelta
+from typing import Callable, Dict, Iterable, List, Optional, Set
+
+from ..models import JobEvent
+from .store import JobStore, TERMINAL_STATUSES
+
+# Sentinel pushed to a subscription that has been closed or fell too far behind
+_CLOSED = None
+
+
+def is_terminal_event(event: JobEvent) -> bool:
+    return event.event == "status" and event.data.get("status") in TERMINAL_STATUSES
+
+
+class Subscription:
+    """A subscriber's view of the event stream, filtered to a set of jobs (or all jobs)."""
+
+    def __init__(self, broker: "EventBroker", max_pending: int = 1000):
+        self.broker = broker
+        self.job_ids: Set[str] = set()
+        self.all_jobs = False
+        self.queue: "asyncio.Queue[Optional[JobEvent]]" = asyncio.Queue(maxsize=max_pending)
+        self.closed = False
+
+    def add(self, job_ids: Iterable[str]) -> None:
+        for job_id in job_ids:
+            self.job_ids.add(job_id)
+            self.broker._by_job.setdefault(job_id, set()).add(self)
+
+    def remove(self, job_ids: Iterable[str]) -> None:
+        for job_id in job_ids:
+            self.job_ids.discard(job_id)
+            subscribers = self.broker._by_job.get(job_id)
+            if subscribers:
+                subscribers.discard(self)
+                if not subscribers:
+                    del self.broker._by_job[job_id]
+
+    def subscribe_all(self) -> None:
+        self.all_jobs = True
+        self.broker._all_jobs.add(self)
+
+    def deliver(self, event: JobEvent) -> None:
+        if self.closed:
+            return
+        try:
+            self.queue.put_nowait(event)
+        except asyncio.QueueFull:
+            # A consumer this far behind is cut off; it can reconnect and
+            # replay from the store using the last event id it saw.
+            self.close()
+
+    async def get(self) -> Optional[JobEvent]:
+        """Next event, or None once the subscription is closed."""
+        if self.closed and self.queue.empty():
+            return _CLOSED
+        return await self.queue.get()
+
+    def close(self) -> None:
+        if self.closed:
+            return
+        self.closed = True
+        self.remove(list(self.job_ids))
+        self.broker._all_jobs.discard(self)
+        # Make room for the sentinel so a waiting consumer always wakes up
+        while self.queue.full():
+            self.queue.get_nowait()
+        self.queue.put_nowait(_CLOSED)
+
+
+class EventBroker:
+    """
+    Fans job events out to in-process subscribers (SSE streams, WebSockets).
+
+    One broker per API process tails the store's event log. Writes made by
+    this process wake it through a store listener. Writes made by worker
+    processes are noticed through the store's change token, which for SQLite
+    is `PRAGMA data_version` and costs no table read. Clients therefore never
+    poll; only this single watcher does.
+    """
+
+    def __init__(self, store: JobStore, poll_interval: float = 0.25, retention_hours: float = 24.0):
+        self.store = store
+        self.poll_interval = poll_interval
+        self.retention = timedelta(hours=retention_hours)
+        self._by_job: Dict[str, Set[Subscription]] = {}
+        self._all_jobs: Set[Subscription] = set()
+        self._last_seq = 0
+        self._wake: Optional[asyncio.Event] = None
+        self._loop: Optional[asyncio.AbstractEventLoop] = None
+        self._task: Optional[asyncio.Task] = None
+        self._token = None
+        self._observers: List[Callable[[JobEvent], None]] = []
+
+    def add_observer(self, callback: Callable[[JobEvent], None]) -> None:
+        """Call `callback` synchronously with every event, e.g. to keep running statistics."""
+        self._observers.append(callback)
+
+    def subscribe(self, job_ids: Iterable[str] = ()) -> Subscription:
+        subscription = Subscription(self)
+        subscription.add(job_ids)
+        return subscription
+
+    async def start(self) -> None:
+        self._loop = asyncio.get_running_loop()
+        self._wake = asyncio.Event()
+        self._last_seq = self.store.last_event_seq()
+        # Taken together with _last_seq so writes made before _run first wakes are not missed
+        self._token = self.store.change_token()
+        self.store.add_listener(self._on_local_event)
+        self._task = asyncio.create_task(self._run())
+
+    async def stop(self) -> None:
+        self.store.remove_listener(self._on_local_event)
+        if self._task is not None:
+            self._task.cancel()
+            try:
+                await self._task
+            except asyncio.CancelledError:
+                pass
+            self._task = None
+        for subscription in list(self._all_jobs) + [s for subs in self._by_job.values() for s in subs]:
+            subscription.close()
+
+    def _on_local_event(self) -> None:
+        # May be called from a worker thread, so hop onto the broker's loop
+        if self._loop is not None and not self._loop.is_closed():
+            self._loop.call_soon_threadsafe(self._wake.set)
+
+    async def _run(self) -> None:
+        next_prune = datetime.now()
+        while True:
+            try:
+                await asyncio.wait_for(self._wake.wait(), timeout=self.poll_interval)
+            except asyncio.TimeoutError:
+                token = self.store.change_token()
+                if token == self._token:
+                    if datetime.now() >= next_prune:
+                        self.store.prune_events((datetime.now() - self.retention).isoformat())
+                        next_prune = datetime.now() + timedelta(hours=1)
+                    continue
+                self._token = token
+            self._wake.clear()
+            try:
+                self.dispatch()
+            except Exception as e:
+                print(f"Event broker: failed to dispatch events: {e}")
+
+    def dispatch(self) -> None:
+        """Deliver every event written since the last dispatch."""
+        while True:
+            events = self.store.events_since(self._last_seq, limit=500)
+            for event in events:
+                if event.event == "status":
+                    # The job may be cached in this process with its previous status
+                    self.store.forget(event.job_id)
+                for observer in self._observers:
+                    observer(event)
+                for subscription in self._by_job.get(event.job_id, set()) | self._all_jobs:
+                    subscription.deliver(event)
+                self._last_seq = event.seq
+            if len(events) < 500:
+                return
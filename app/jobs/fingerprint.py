@@ -0,0 +1,22 @@
+import hashlib
+import json
+
+from ..config import LLM_PROVIDER
+from ..models import ContentRequest
+
+# Fields that change how a job is scheduled or run but not what it produces
+_SCHEDULING_FIELDS = {"priority", "cache"}
+
+
+def request_fingerprint(request: ContentRequest) -> str:
+    """
+    Canonical hash of a request: the same inputs give the same fingerprint
+    regardless of key order or of optional fields being omitted or sent as
+    their default. The LLM provider is included because it changes the output.
+    """
+    payload = {
+        "request": request.model_dump(mode="json", exclude=_SCHEDULING_FIELDS),
+        "llm_provider": LLM_PROVIDER,
+    }
+    canonical = json.dumps(payload, sort_keys=True, separators=(",", ":"), ensure_ascii=False)
+    return hashlib.sha256(canonical.encode("utf-8")).hexdigest()
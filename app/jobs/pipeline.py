@@ -0,0 +1,99 @@
+import asyncio
+import time
+from dataclasses import dataclass, field
+from typing import Any, Awaitable, Callable, Dict, List, Optional, Tuple
+
+# A stage receives the results of the stages it depends on, keyed by stage name
+StageFunc = Callable[[Dict[str, Any]], Awaitable[Any]]
+StageCallback = Callable[[str, Any, float], None]
+StageStartCallback = Callable[[str], None]
+
+
+@dataclass
+class Stage:
+    name: str
+    func: StageFunc
+    deps: Tuple[str, ...] = field(default_factory=tuple)
+
+
+class StageGraphError(ValueError):
+    """Raised when a stage graph references unknown stages or contains a cycle."""
+
+
+def validate_stages(stages: List[Stage]) -> None:
+    """Check that stage names are unique, dependencies exist and there is no cycle."""
+    by_name = {}
+    for stage in stages:
+        if stage.name in by_name:
+            raise StageGraphError(f"Duplicate stage name '{stage.name}'")
+        by_name[stage.name] = stage
+    for stage in stages:
+        for dep in stage.deps:
+            if dep not in by_name:
+                raise StageGraphError(f"Stage '{stage.name}' depends on unknown stage '{dep}'")
+
+    visiting, done = set(), set()
+
+    def visit(name: str) -> None:
+        if name in done:
+            return
+        if name in visiting:
+            raise StageGraphError(f"Stage graph has a cycle through '{name}'")
+        visiting.add(name)
+        for dep in by_name[name].deps:
+            visit(dep)
+        visiting.discard(name)
+        done.add(name)
+
+    for stage in stages:
+        visit(stage.name)
+
+
+async def run_stages(
+    stages: List[Stage],
+    on_stage_complete: Optional[StageCallback] = None,
+    on_stage_start: Optional[StageStartCallback] = None
+) -> Tuple[Dict[str, Any], Dict[str, float]]:
+    """
+    Run a stage graph, starting every stage as soon as its dependencies finish.
+
+    Independent stages run concurrently. If any stage fails, the stages still
+    running are cancelled and the first error is raised.
+
+    Returns:
+        (results, timings): stage results and wall-clock seconds, keyed by stage name
+    """
+    validate_stages(stages)
+    results: Dict[str, Any] = {}
+    timings: Dict[str, float] = {}
+    pending = {stage.name: stage for stage in stages}
+    running: Dict[asyncio.Task, str] = {}
+
+    async def run_one(stage: Stage) -> Any:
+        started = time.perf_counter()
+        result = await stage.func({dep: results[dep] for dep in stage.deps})
+        timings[stage.name] = round(time.perf_counter() - started, 3)
+        return result
+
+    try:
+        while pending or running:
+            ready = [stage for stage in pending.values() if all(dep in results for dep in stage.deps)]
+            for stage in ready:
+                del pending[stage.name]
+                if on_stage_start:
+                    on_stage_start(stage.name)
+                running[asyncio.create_task(run_one(stage))] = stage.name
+
+            done, _ = await asyncio.wait(running, return_when=asyncio.FIRST_COMPLETED)
+            for task in done:
+                name = running.pop(task)
+                results[name] = task.result()  # Re-raises the stage's exception
+                if on_stage_complete:
+                    on_stage_complete(name, results[name], timings[name])
+    finally:
+        for task in running:
+            task.cancel()
+        if running:
+            await asyncio.gather(*running, return_exceptions=True)
+
+    return results, timings
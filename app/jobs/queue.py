@@ -0,0 +1,371 @@
+import heapq
+import itertools
+import os
+import sqlite3
+import threading
+import time
+from dataclasses import dataclass
+from datetime import datetime
+from typing import Dict, Iterable, List, Optional
+
+from ..config import JOB_STORE_BACKEND, JOB_STORE_PATH, QUEUE_LEASE_SECONDS, SQLITE_JOURNAL_MODE
+
+_SCHEMA = """
+CREATE TABLE IF NOT EXISTS job_queue (
+    seq INTEGER PRIMARY KEY AUTOINCREMENT,
+    job_id TEXT NOT NULL UNIQUE,
+    job_class TEXT NOT NULL,
+    priority INTEGER NOT NULL DEFAULT 0,
+    state TEXT NOT NULL DEFAULT 'queued',
+    payload TEXT NOT NULL,
+    enqueued_at TEXT NOT NULL,
+    started_at TEXT,
+    lease_owner TEXT,
+    lease_expires_at REAL
+);
+CREATE INDEX IF NOT EXISTS idx_job_queue_claim ON job_queue (job_class, state, priority DESC, seq);
+"""
+
+# Lease columns, added to queues created before workers held leases
+_LEASE_COLUMNS = {"lease_owner": "TEXT", "lease_expires_at": "REAL"}
+
+
+@dataclass
+class QueueItem:
+    job_id: str
+    job_class: str
+    priority: int
+    payload: str  # Serialized ContentRequest
+
+
+class JobQueue:
+    """
+    Interface shared by the queue backends.
+
+    Items are claimed highest priority first and in FIFO order within a
+    priority. A claimed item stays in the queue as "running" until the worker
+    calls `complete`. The claim is a lease held by the worker's `owner` id:
+    the worker renews it with `heartbeat`, and `requeue_expired` puts items
+    whose worker stopped renewing (a crashed or partitioned node) back in line.
+    Lease expiry times are epoch seconds, so nodes need synchronised clocks.
+    """
+
+    def enqueue(self, job_id: str, job_class: str, payload: str, priority: int = 0) -> None:
+        """
+        Queue a job. An item the job still has (a resumed job whose previous
+        worker has not released it yet) is replaced, and that worker's lease with it.
+        """
+        raise NotImplementedError
+
+    def enqueue_many(self, items: List[QueueItem]) -> None:
+        """Enqueue several items at once; they keep their relative order."""
+        for item in items:
+            self.enqueue(item.job_id, item.job_class, item.payload, priority=item.priority)
+
+    def claim(self, job_class: str, owner: str = "", lease_seconds: float = QUEUE_LEASE_SECONDS) -> Optional[QueueItem]:
+        raise NotImplementedError
+
+    def enqueue_claimed(self, job_id: str, job_class: str, payload: str, owner: str, priority: int = 0,
+                        lease_seconds: float = QUEUE_LEASE_SECONDS) -> None:
+        """
+        Add an item already claimed by `owner`, for a job the caller runs itself
+        (/generate?mode=sync). If the owner stops renewing the lease, the item is
+        re-queued like any other and a worker runs the job.
+        """
+        raise NotImplementedError
+
+    def heartbeat(self, job_id: str, owner: str, lease_seconds: float = QUEUE_LEASE_SECONDS) -> bool:
+        """Extend `owner`'s lease on a running item; False if the lease was lost."""
+        raise NotImplementedError
+
+    def complete(self, job_id: str, owner: Optional[str] = None) -> None:
+        """Remove a finished item; with `owner`, only if that worker still holds its lease."""
+        raise NotImplementedError
+
+    def remove(self, job_id: str) -> bool:
+        """Drop an item that has not been claimed yet; returns whether one was removed."""
+        raise NotImplementedError
+
+    def depth(self) -> Dict[str, Dict[str, int]]:
+        """Return {job_class: {"queued": n, "running": m}}."""
+        raise NotImplementedError
+
+    def requeue_running(self, owners: Optional[Iterable[str]] = None) -> int:
+        """Put claimed-but-unfinished items (of `owners`, or all) back in the queue; returns how many."""
+        raise NotImplementedError
+
+    def requeue_expired(self, now: Optional[float] = None) -> int:
+        """Put running items whose lease has expired back in the queue; returns how many."""
+        raise NotImplementedError
+
+    def running_owners(self) -> List[str]:
+        """Workers currently holding leases."""
+        raise NotImplementedError
+
+    def close(self) -> None:
+        pass
+
+
+class MemoryJobQueue(JobQueue):
+    """Process-local queue, only usable when workers run inline."""
+
+    def __init__(self):
+        self._heaps: Dict[str, list] = {}
+        self._running: Dict[str, tuple] = {}  # job_id -> heap entry, so requeued items keep their place
+        self._leases: Dict[str, tuple] = {}  # job_id -> (owner, expires_at)
+        self._counter = itertools.count()
+        self._lock = threading.Lock()
+
+    def enqueue(self, job_id, job_class, payload, priority=0):
+        item = QueueItem(job_id=job_id, job_class=job_class, priority=priority, payload=payload)
+        with self._lock:
+            self._running.pop(job_id, None)
+            self._leases.pop(job_id, None)
+            self._drop_queued(job_id)
+            heapq.heappush(self._heaps.setdefault(job_class, []), (-priority, next(self._counter), item))
+
+    def claim(self, job_class, owner="", lease_seconds=QUEUE_LEASE_SECONDS):
+        with self._lock:
+            heap = self._heaps.get(job_class)
+            if not heap:
+                return None
+            entry = heapq.heappop(heap)
+            item = entry[2]
+            self._running[item.job_id] = entry
+            self._leases[item.job_id] = (owner, time.time() + lease_seconds)
+            return item
+
+    def enqueue_claimed(self, job_id, job_class, payload, owner, priority=0, lease_seconds=QUEUE_LEASE_SECONDS):
+        item = QueueItem(job_id=job_id, job_class=job_class, priority=priority, payload=payload)
+        with self._lock:
+            self._running[job_id] = (-priority, next(self._counter), item)
+            self._leases[job_id] = (owner, time.time() + lease_seconds)
+
+    def heartbeat(self, job_id, owner, lease_seconds=QUEUE_LEASE_SECONDS):
+        with self._lock:
+            lease = self._leases.get(job_id)
+            if job_id not in self._running or lease is None or lease[0] != owner:
+                return False
+            self._leases[job_id] = (owner, time.time() + lease_seconds)
+            return True
+
+    def complete(self, job_id, owner=None):
+        with self._lock:
+            lease = self._leases.get(job_id)
+            if owner is not None and (lease is None or lease[0] != owner):
+                return
+            self._running.pop(job_id, None)
+            self._leases.pop(job_id, None)
+
+    def _drop_queued(self, job_id) -> bool:
+        for heap in self._heaps.values():
+            for index, entry in enumerate(heap):
+                if entry[2].job_id == job_id:
+                    heap.pop(index)
+                    heapq.heapify(heap)
+                    return True
+        return False
+
+    def remove(self, job_id):
+        with self._lock:
+            return self._drop_queued(job_id)
+
+    def _requeue(self, job_ids) -> int:
+        for job_id in job_ids:
+            entry = self._running.pop(job_id)
+            self._leases.pop(job_id, None)
+            heapq.heappush(self._heaps.setdefault(entry[2].job_class, []), entry)
+        return len(job_ids)
+
+    def requeue_running(self, owners=None):
+        owners = set(owners) if owners is not None else None
+        with self._lock:
+            return self._requeue([
+                job_id for job_id in self._running
+                if owners is None or self._leases.get(job_id, (None,))[0] in owners
+            ])
+
+    def requeue_expired(self, now=None):
+        now = time.time() if now is None else now
+        with self._lock:
+            return self._requeue([
+                job_id for job_id in self._running
+                if self._leases.get(job_id, (None, 0))[1] < now
+            ])
+
+    def running_owners(self):
+        with self._lock:
+            return sorted({owner for owner, _ in self._leases.values() if owner})
+
+    def depth(self):
+        with self._lock:
+            result = {job_class: {"queued": len(heap), "running": 0} for job_class, heap in self._heaps.items()}
+            for _, _, item in self._running.values():
+                result.setdefault(item.job_class, {"queued": 0, "running": 0})["running"] += 1
+        return result
+
+
+class SQLiteJobQueue(JobQueue):
+    """
+    Queue table living next to the job store, so worker processes (on this
+    machine, or on other nodes sharing the database file) can claim work
+    enqueued by the API process.
+    """
+
+    def __init__(self, path: str):
+        self.path = path
+        os.makedirs(os.path.dirname(os.path.abspath(path)), exist_ok=True)
+        self._local = threading.local()
+        with self._connect() as conn:
+            conn.executescript(_SCHEMA)
+            columns = {row[1] for row in conn.execute("PRAGMA table_info(job_queue)")}
+            for column, column_type in _LEASE_COLUMNS.items():
+                if column not in columns:
+                    conn.execute(f"ALTER TABLE job_queue ADD COLUMN {column} {column_type}")
+            conn.execute("CREATE INDEX IF NOT EXISTS idx_job_queue_lease ON job_queue (state, lease_expires_at)")
+
+    def _connect(self) -> sqlite3.Connection:
+        conn = getattr(self._local, "conn", None)
+        if conn is None:
+            conn = sqlite3.connect(self.path, timeout=30.0)
+            conn.execute(f"PRAGMA journal_mode={SQLITE_JOURNAL_MODE}")
+            conn.execute("PRAGMA synchronous=NORMAL")
+            self._local.conn = conn
+        return conn
+
+    def enqueue(self, job_id, job_class, payload, priority=0):
+        conn = self._connect()
+        with conn:
+            conn.execute(
+                "INSERT INTO job_queue (job_id, job_class, priority, payload, enqueued_at) VALUES (?, ?, ?, ?, ?) "
+                "ON CONFLICT(job_id) DO UPDATE SET job_class = excluded.job_class, priority = excluded.priority, "
+                "state = 'queued', payload = excluded.payload, enqueued_at = excluded.enqueued_at, "
+                "started_at = NULL, lease_owner = NULL, lease_expires_at = NULL",
+                (job_id, job_class, priority, payload, datetime.now().isoformat()),
+            )
+
+    def enqueue_many(self, items):
+        # One transaction for the whole batch instead of a commit per item
+        enqueued_at = datetime.now().isoformat()
+        conn = self._connect()
+        with conn:
+            conn.executemany(
+                "INSERT INTO job_queue (job_id, job_class, priority, payload, enqueued_at) VALUES (?, ?, ?, ?, ?)",
+                [(item.job_id, item.job_class, item.priority, item.payload, enqueued_at) for item in items],
+            )
+
+    def claim(self, job_class, owner="", lease_seconds=QUEUE_LEASE_SECONDS):
+        conn = self._connect()
+        with conn:
+            # A single UPDATE ... RETURNING keeps the claim atomic across processes
+            row = conn.execute(
+                "UPDATE job_queue SET state = 'running', started_at = ?, lease_owner = ?, lease_expires_at = ? "
+                "WHERE seq = (SELECT seq FROM job_queue WHERE job_class = ? AND state = 'queued' "
+                "ORDER BY priority DESC, seq ASC LIMIT 1) "
+                "RETURNING job_id, job_class, priority, payload",
+                (datetime.now().isoformat(), owner, time.time() + lease_seconds, job_class),
+            ).fetchone()
+        if row is None:
+            return None
+        return QueueItem(job_id=row[0], job_class=row[1], priority=row[2], payload=row[3])
+
+    def enqueue_claimed(self, job_id, job_class, payload, owner, priority=0, lease_seconds=QUEUE_LEASE_SECONDS):
+        now = datetime.now().isoformat()
+        conn = self._connect()
+        with conn:
+            conn.execute(
+                "INSERT INTO job_queue (job_id, job_class, priority, state, payload, enqueued_at, started_at, "
+                "lease_owner, lease_expires_at) VALUES (?, ?, ?, 'running', ?, ?, ?, ?, ?)",
+                (job_id, job_class, priority, payload, now, now, owner, time.time() + lease_seconds),
+            )
+
+    def heartbeat(self, job_id, owner, lease_seconds=QUEUE_LEASE_SECONDS):
+        conn = self._connect()
+        with conn:
+            cursor = conn.execute(
+                "UPDATE job_queue SET lease_expires_at = ? WHERE job_id = ? AND state = 'running' AND lease_owner = ?",
+                (time.time() + lease_seconds, job_id, owner),
+            )
+        return cursor.rowcount > 0
+
+    def complete(self, job_id, owner=None):
+        conn = self._connect()
+        with conn:
+            if owner is None:
+                conn.execute("DELETE FROM job_queue WHERE job_id = ?", (job_id,))
+            else:
+                # The lease may have expired and the item been claimed by another worker
+                conn.execute("DELETE FROM job_queue WHERE job_id = ? AND lease_owner = ?", (job_id, owner))
+
+    def remove(self, job_id):
+        conn = self._connect()
+        with conn:
+            cursor = conn.execute("DELETE FROM job_queue WHERE job_id = ? AND state = 'queued'", (job_id,))
+        return cursor.rowcount > 0
+
+    def requeue_running(self, owners=None):
+        query = "UPDATE job_queue SET state = 'queued', started_at = NULL, lease_owner = NULL, lease_expires_at = NULL " \
+                "WHERE state = 'running'"
+        params: list = []
+        if owners is not None:
+            owners = list(owners)
+            if not owners:
+                return 0
+            query += f" AND lease_owner IN ({', '.join('?' for _ in owners)})"
+            params.extend(owners)
+        conn = self._connect()
+        with conn:
+            cursor = conn.execute(query, params)
+        return cursor.rowcount
+
+    def requeue_expired(self, now=None):
+        now = time.time() if now is None else now
+        conn = self._connect()
+        with conn:
+            # Items claimed before leases existed have no expiry and are requeued too
+            cursor = conn.execute(
+                "UPDATE job_queue SET state = 'queued', started_at = NULL, lease_owner = NULL, lease_expires_at = NULL "
+                "WHERE state = 'running' AND (lease_expires_at IS NULL OR lease_expires_at < ?)",
+                (now,),
+            )
+        return cursor.rowcount
+
+    def running_owners(self):
+        rows = self._connect().execute(
+            "SELECT DISTINCT lease_owner FROM job_queue WHERE state = 'running' AND lease_owner IS NOT NULL"
+        ).fetchall()
+        return sorted(row[0] for row in rows if row[0])
+
+    def depth(self):
+        rows = self._connect().execute(
+            "SELECT job_class, state, COUNT(*) FROM job_queue GROUP BY job_class, state"
+        ).fetchall()
+        result: Dict[str, Dict[str, int]] = {}
+        for job_class, state, count in rows:
+            result.setdefault(job_class, {"queued": 0, "running": 0})[state] = count
+        return result
+
+    def close(self):
+        conn = getattr(self._local, "conn", None)
+        if conn is not None:
+            conn.close()
+            self._local.conn = None
+
+
+def create_job_queue(backend: str, path: Optional[str] = None) -> JobQueue:
+    """Build the queue matching the configured job store backend."""
+    if backend == "sqlite":
+        return SQLiteJobQueue(path)
+    elif backend == "memory":
+        return MemoryJobQueue()
+    raise ValueError(f"Unknown job queue backend '{backend}'. Supported backends are 'sqlite' and 'memory'.")
+
+
+_default_queue: Optional[JobQueue] = None
+
+def get_job_queue() -> JobQueue:
+    """Return the process-wide job queue, sharing the job store's database."""
+    global _default_queue
+    if _default_queue is None:
+        _default_queue = create_job_queue(JOB_STORE_BACKEND, JOB_STORE_PATH)
+    return _default_queue
@@ -0,0 +1,249 @@
+import asyncio
+import os
+import re
+import shutil
+import time
+from dataclasses import dataclass
+from datetime import datetime, timedelta
+from typing import Dict, List, Optional, Set, Tuple
+
+from ..models import JobRecord
+from .blobs import BlobStore
+from .store import JobStore
+
+# Only these jobs have files to reclaim; queued and processing jobs are never touched
+_FINISHED_STATUSES = ("completed", "failed")
+_JOB_ID_PATTERN = re.compile(r"^[0-9a-f]{8}-[0-9a-f]{4}-[0-9a-f]{4}-[0-9a-f]{4}-[0-9a-f]{12}$")
+
+
+def path_size(path: str, seen: Optional[Set[Tuple[int, int]]] = None) -> int:
+    """
+    Bytes used by a file or a directory tree (symlinks are not followed).
+    Hardlinked files are counted once per `seen` set, since published videos
+    are usually hardlinks to the job's render.
+    """
+    seen = set() if seen is None else seen
+
+    def file_size(file_path: str) -> int:
+        try:
+            stat = os.lstat(file_path)
+        except OSError:
+            return 0
+        if stat.st_nlink > 1:
+            key = (stat.st_dev, stat.st_ino)
+            if key in seen:
+                return 0
+            seen.add(key)
+        return stat.st_size
+
+    if not os.path.isdir(path) or os.path.islink(path):
+        return file_size(path)
+    return sum(file_size(os.path.join(root, name)) for root, _, files in os.walk(path) for name in files)
+
+
+def reclaimable_size(paths: List[str]) -> int:
+    """
+    Bytes that deleting `paths` frees once unreferenced blobs are collected. A
+    file linked from several places counts once, and only if at most one link
+    (its blob) remains outside `paths`: content shared with other jobs stays.
+    """
+    files: Dict[Tuple[int, int], List[int]] = {}
+    for path in paths:
+        if os.path.isdir(path) and not os.path.islink(path):
+            file_paths = [os.path.join(root, name) for root, _, names in os.walk(path) for name in names]
+        else:
+            file_paths = [path]
+        for file_path in file_paths:
+            try:
+                stat = os.lstat(file_path)
+            except OSError:
+                continue
+            entry = files.setdefault((stat.st_dev, stat.st_ino), [stat.st_size, stat.st_nlink, 0])
+            entry[2] += 1
+    return sum(size for size, links, inside in files.values() if links - inside <= 1)
+
+
+def _is_within(path: str, directory: str) -> bool:
+    return os.path.abspath(path).startswith(os.path.abspath(directory) + os.sep)
+
+
+def remove_path(path: str) -> None:
+    if os.path.isdir(path) and not os.path.islink(path):
+        shutil.rmtree(path, ignore_errors=True)
+    elif os.path.lexists(path):
+        try:
+            os.remove(path)
+        except OSError:
+            pass
+
+
+def job_paths(job: JobRecord, public_dir: str) -> List[str]:
+    """The job's output directory plus its published video, if any."""
+    return [job.output_dir, os.path.join(public_dir, f"{job.job_id}.mp4")]
+
+
+def discard_output(store: JobStore, job: JobRecord, public_dir: str) -> None:
+    """Delete everything a job wrote (used for cancelled jobs) and drop it from the video catalog."""
+    store.remove_video(job.job_id)
+    for path in job_paths(job, public_dir):
+        remove_path(path)
+
+
+@dataclass
+class RetentionReport:
+    started_at: str
+    expired_jobs: int = 0  # Past their content type's TTL
+    evicted_jobs: int = 0  # Least recently accessed, removed to get back under the quota
+    orphans_removed: int = 0  # Job directories and published files with no live job
+    blobs_removed: int = 0  # Stored artifacts no job links to any more
+    reclaimed_bytes: int = 0
+    usage_bytes: int = 0  # Disk usage after the run
+    quota_bytes: int = 0
+    duration_seconds: float = 0.0
+
+
+class RetentionManager:
+    """
+    Deletes the files of finished jobs once they pass their content type's TTL,
+    then evicts the least recently accessed finished jobs while disk usage is
+    over the quota. A job is marked "expired" (atomically, and only if it is
+    still completed or failed) before its files are removed, so the files of a
+    job that is running or was just resumed are never deleted.
+    """
+
+    def __init__(
+        self,
+        store: JobStore,
+        output_dir: str,
+        public_dir: str,
+        ttl_hours: Dict[str, float],
+        quota_bytes: int = 0,
+        interval: float = 600.0,
+        blob_store: Optional[BlobStore] = None
+    ):
+        self.store = store
+        self.output_dir = output_dir
+        self.public_dir = public_dir
+        self.ttl_hours = ttl_hours
+        self.quota_bytes = quota_bytes
+        self.interval = interval
+        self.blob_store = blob_store
+        self.last_report: Optional[RetentionReport] = None
+        self.total_reclaimed_bytes = 0
+
+    def job_paths(self, job: JobRecord) -> List[str]:
+        return job_paths(job, self.public_dir)
+
+    @staticmethod
+    def finished_at(job: JobRecord) -> str:
+        return job.completed_at or job.failed_at or job.updated_at or job.created_at
+
+    @classmethod
+    def last_access(cls, job: JobRecord) -> str:
+        return max(job.last_accessed_at or "", cls.finished_at(job))
+
+    def disk_usage(self) -> int:
+        seen = set()
+        usage = path_size(self.output_dir, seen) + path_size(self.public_dir, seen)
+        if self.blob_store is not None and not _is_within(self.blob_store.root, self.output_dir):
+            usage += path_size(self.blob_store.root, seen)
+        return usage
+
+    def _expire(self, job: JobRecord, now: datetime) -> Optional[int]:
+        """Mark a finished job expired and delete its files; returns the bytes freed, or None if skipped."""
+        paths = self.job_paths(job)
+        size = reclaimable_size(paths)
+        if self.store.transition(job.job_id, _FINISHED_STATUSES, status="expired", expired_at=now.isoformat()) is None:
+            return None  # Resumed or otherwise changed since it was listed
+        self.store.remove_video(job.job_id)
+        for path in paths:
+            remove_path(path)
+        return size
+
+    def _remove_orphans(self, now: datetime) -> Tuple[int, int]:
+        """Remove job directories and published videos whose job is gone, expired or cancelled."""
+        ttls = [hours for hours in self.ttl_hours.values() if hours > 0]
+        if not ttls:
+            return 0, 0
+        cutoff = time.mktime((now - timedelta(hours=max(ttls))).timetuple())
+        candidates = []
+        for directory, suffix in ((self.output_dir, ""), (self.public_dir, ".mp4")):
+            if not os.path.isdir(directory):
+                continue
+            for name in os.listdir(directory):
+                job_id = name[:-len(suffix)] if suffix and name.endswith(suffix) else name
+                if _JOB_ID_PATTERN.match(job_id):
+                    candidates.append((job_id, os.path.join(directory, name)))
+
+        removed, reclaimed = 0, 0
+        for job_id, path in candidates:
+            job = self.store.get(job_id)
+            if job is not None and job.status not in ("expired", "cancelled"):
+                continue
+            try:
+                if job is None and os.lstat(path).st_mtime > cutoff:
+                    continue  # Unknown but recent: leave it for a later run
+            except OSError:
+                continue
+            reclaimed += path_size(path)
+            remove_path(path)
+            removed += 1
+        return removed, reclaimed
+
+    def _collect_blobs(self, report: RetentionReport) -> None:
+        # Expired jobs' shared files were counted in reclaimed_bytes already (see reclaimable_size)
+        if self.blob_store is not None:
+            removed, _ = self.blob_store.collect_garbage()
+            report.blobs_removed += removed
+
+    def run_once(self, now: Optional[datetime] = None) -> RetentionReport:
+        now = now or datetime.now()
+        started = time.perf_counter()
+        report = RetentionReport(started_at=now.isoformat(), quota_bytes=self.quota_bytes)
+
+        finished = [job for status in _FINISHED_STATUSES for job in self.store.list_jobs(status=status, limit=None)]
+        kept = []
+        for job in finished:
+            ttl = self.ttl_hours.get(job.content_type, 0)
+            if ttl > 0 and self.finished_at(job) < (now - timedelta(hours=ttl)).isoformat():
+                freed = self._expire(job, now)
+                if freed is not None:
+                    report.expired_jobs += 1
+                    report.reclaimed_bytes += freed
+                    continue
+            kept.append(job)
+
+        report.orphans_removed, orphan_bytes = self._remove_orphans(now)
+        report.reclaimed_bytes += orphan_bytes
+        self._collect_blobs(report)
+
+        usage = self.disk_usage()
+        if self.quota_bytes > 0 and usage > self.quota_bytes:
+            for job in sorted(kept, key=self.last_access):
+                if usage <= self.quota_bytes:
+                    break
+                freed = self._expire(job, now)
+                if freed is not None:
+                    report.evicted_jobs += 1
+                    report.reclaimed_bytes += freed
+                    usage -= freed
+            self._collect_blobs(report)
+
+        report.usage_bytes = self.disk_usage()
+        report.duration_seconds = round(time.perf_counter() - started, 3)
+        self.total_reclaimed_bytes += report.reclaimed_bytes
+        self.last_report = report
+        return report
+
+    async def run_forever(self) -> None:
+        while True:
+            try:
+                # Walking the output tree is blocking I/O, so keep it off the event loop
+                report = await asyncio.to_thread(self.run_once)
+                if report.expired_jobs or report.evicted_jobs or report.orphans_removed or report.blobs_removed:
+                    print(f"Retention: expired {report.expired_jobs}, evicted {report.evicted_jobs} job(s), "
+                          f"removed {report.orphans_removed} orphan(s) and {report.blobs_removed} blob(s), "
+                          f"reclaimed {report.reclaimed_bytes} bytes")
+            except Exception as e:
+                print(f"Retention: run failed: {e}")
+            await asyncio.sleep(self.interval)
@@ -0,0 +1,79 @@
+import time
+from datetime import datetime
+
+from ..content_types import get_content_type
+from ..llm_cache import current_cache_mode
+from ..models import ContentRequest
+from ..metrics import current_content_type, STAGE_SECONDS, JOB_SECONDS, OUTPUT_BYTES
+from .checkpoints import checkpointed
+from .pipeline import run_stages
+from .retention import path_size
+from .store import get_job_store
+
+async def process_content_generation(job_id: str, request: ContentRequest, output_dir: str):
+    """Run a single generation job and record its outcome in the job store."""
+    job_store = get_job_store()
+    started = time.perf_counter()
+    content_type_token = current_content_type.set(request.content_type)
+    cache_mode_token = current_cache_mode.set(request.cache)
+    try:
+        # The content type's module (and the generators it needs) is imported on first use
+        content_type = get_content_type(request.content_type)
+        output_filename = content_type.output_filename # For download
+        media_type = content_type.media_type # For download
+
+        # Each stage is checkpointed, so a resumed job skips the stages it already paid for
+        stage_timings = {}
+        skipped_stages = []
+        stages = [
+            checkpointed(stage, output_dir, on_skip=skipped_stages.append)
+            for stage in content_type.build_stages(request, output_dir)
+        ]
+
+        def stage_started(name: str):
+            job_store.publish_event(job_id, "progress", {
+                "stage": name,
+                "state": "started",
+                "percent": round(100 * len(stage_timings) / len(stages))
+            })
+
+        def record_stage(name: str, result, seconds: float):
+            stage_timings[name] = seconds
+            if name not in skipped_stages:
+                STAGE_SECONDS.observe(seconds, content_type=request.content_type, stage=name)
+            job_store.update(job_id, stage_timings=dict(stage_timings), skipped_stages=list(skipped_stages))
+            job_store.publish_event(job_id, "progress", {
+                "stage": name,
+                "state": "skipped" if name in skipped_stages else "completed",
+                "seconds": seconds,
+                "percent": round(100 * len(stage_timings) / len(stages))
+            })
+
+        await run_stages(stages, on_stage_complete=record_stage, on_stage_start=stage_started)
+        if content_type.on_complete is not None:
+            await content_type.on_complete(job_id)
+
+        # Conditional, so a job cancelled while it was finishing stays cancelled
+        job_store.transition(
+            job_id,
+            ["processing"],
+            status="completed",
+            output_filename=output_filename,
+            media_type=media_type,
+            completed_at=datetime.now().isoformat()
+        )
+        JOB_SECONDS.observe(time.perf_counter() - started, content_type=request.content_type, status="completed")
+        OUTPUT_BYTES.inc(path_size(output_dir), content_type=request.content_type)
+        
+    except Exception as e:
+        job_store.transition(
+            job_id,
+            ["processing"],
+            status="failed",
+            error=str(e),
+            failed_at=datetime.now().isoformat()
+        )
+        JOB_SECONDS.observe(time.perf_counter() - started, content_type=request.content_type, status="failed")
+    finally:
+        current_content_type.reset(content_type_token)
+        current_cache_mode.reset(cache_mode_token)
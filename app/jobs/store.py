@@ -0,0 +1,715 @@
+import itertools
+import json
+import os
+import sqlite3
+import threading
+from collections import OrderedDict
+from datetime import datetime
+from typing import Dict, Iterable, List, Optional, Tuple
+
+from ..config import JOB_STORE_BACKEND, JOB_STORE_PATH, JOB_CACHE_SIZE, SQLITE_JOURNAL_MODE
+from ..metrics import record_cache
+from ..models import JobRecord, JobEvent, VideoInfo
+
+# Jobs in these states are done: no worker will update them. They can still
+# change (a failed job may be resumed, retention expires finished jobs), so a
+# per-process cache of them relies on CachedJobStore.forget (see EventBroker).
+TERMINAL_STATUSES = {"completed", "failed", "expired", "cancelled"}
+# Jobs waiting for or holding a worker
+ACTIVE_STATUSES = {"queued", "processing"}
+
+_SCHEMA = """
+CREATE TABLE IF NOT EXISTS jobs (
+    job_id TEXT PRIMARY KEY,
+    status TEXT NOT NULL,
+    content_type TEXT NOT NULL,
+    created_at TEXT NOT NULL,
+    updated_at TEXT NOT NULL,
+    data TEXT NOT NULL
+);
+CREATE INDEX IF NOT EXISTS idx_jobs_status_type_created ON jobs (status, content_type, created_at);
+CREATE INDEX IF NOT EXISTS idx_jobs_status_created ON jobs (status, created_at);
+CREATE INDEX IF NOT EXISTS idx_jobs_batch ON jobs (json_extract(data, '$.batch_id'))
+    WHERE json_extract(data, '$.batch_id') IS NOT NULL;
+CREATE INDEX IF NOT EXISTS idx_jobs_fingerprint ON jobs (json_extract(data, '$.fingerprint'), created_at)
+    WHERE json_extract(data, '$.fingerprint') IS NOT NULL;
+CREATE UNIQUE INDEX IF NOT EXISTS idx_jobs_idempotency_key ON jobs (json_extract(data, '$.idempotency_key'))
+    WHERE json_extract(data, '$.idempotency_key') IS NOT NULL;
+CREATE TABLE IF NOT EXISTS job_events (
+    seq INTEGER PRIMARY KEY AUTOINCREMENT,
+    job_id TEXT NOT NULL,
+    event TEXT NOT NULL,
+    data TEXT NOT NULL,
+    created_at TEXT NOT NULL
+);
+CREATE INDEX IF NOT EXISTS idx_job_events_job ON job_events (job_id, seq);
+CREATE INDEX IF NOT EXISTS idx_job_events_created ON job_events (created_at);
+CREATE TABLE IF NOT EXISTS video_catalog (
+    job_id TEXT PRIMARY KEY,
+    content_type TEXT NOT NULL,
+    created_at TEXT NOT NULL,
+    data TEXT NOT NULL
+);
+CREATE INDEX IF NOT EXISTS idx_video_catalog_created ON video_catalog (created_at, job_id);
+CREATE INDEX IF NOT EXISTS idx_video_catalog_type_created ON video_catalog (content_type, created_at, job_id);
+"""
+
+# Record fields copied into "status" events
+_STATUS_EVENT_FIELDS = ("status", "content_type", "output_filename", "media_type", "error", "completed_at", "failed_at",
+                        "cancelled_at")
+
+
+def _status_event_data(record: JobRecord) -> dict:
+    return {name: getattr(record, name) for name in _STATUS_EVENT_FIELDS if getattr(record, name) is not None}
+
+
+class JobNotFoundError(KeyError):
+    """Raised when updating a job that does not exist in the store."""
+
+
+class DuplicateJobError(ValueError):
+    """Raised when creating a job whose idempotency key is already taken."""
+
+
+class JobStore:
+    """
+    Interface shared by all job store backends.
+
+    Besides job records, a store keeps an append-only event log. Creating a
+    job or changing its status appends a "status" event; the pipeline adds
+    "progress" events. Listeners registered with `add_listener` are called
+    after every event written by this process, so subscribers in the same
+    process are woken without polling.
+    """
+
+    def add_listener(self, callback) -> None:
+        if not hasattr(self, "_listeners"):
+            self._listeners = []
+        self._listeners.append(callback)
+
+    def remove_listener(self, callback) -> None:
+        if callback in getattr(self, "_listeners", []):
+            self._listeners.remove(callback)
+
+    def _notify(self) -> None:
+        for callback in list(getattr(self, "_listeners", [])):
+            callback()
+
+    def create(self, record: JobRecord) -> JobRecord:
+        raise NotImplementedError
+
+    def create_many(self, records: List[JobRecord]) -> List[JobRecord]:
+        """Create several jobs in one transaction (all or none)."""
+        raise NotImplementedError
+
+    def get(self, job_id: str) -> Optional[JobRecord]:
+        raise NotImplementedError
+
+    def get_uncached(self, job_id: str) -> Optional[JobRecord]:
+        """The job as last written, never served from (or counted by) a cache; for internal polls."""
+        return self.get(job_id)
+
+    def update(self, job_id: str, **fields) -> JobRecord:
+        raise NotImplementedError
+
+    def transition(self, job_id: str, from_statuses: Iterable[str], **fields) -> Optional[JobRecord]:
+        """
+        Update a job only if its current status is one of `from_statuses`,
+        checked and written atomically. Returns None if the job was not updated.
+        """
+        raise NotImplementedError
+
+    def list_jobs(
+        self,
+        status: Optional[str] = None,
+        content_types: Optional[Iterable[str]] = None,
+        since: Optional[str] = None,
+        limit: Optional[int] = 100,
+    ) -> List[JobRecord]:
+        """Return jobs newest first, filtered on the indexed columns (limit=None for all)."""
+        raise NotImplementedError
+
+    def count_jobs(self, status: str, content_types: Optional[Iterable[str]] = None) -> Dict[str, int]:
+        """Number of jobs in `status`, per content type."""
+        raise NotImplementedError
+
+    def jobs_in_batch(self, batch_id: str) -> List[JobRecord]:
+        """Return the jobs of a batch in submission order."""
+        raise NotImplementedError
+
+    def find_by_fingerprint(
+        self,
+        fingerprint: str,
+        statuses: Iterable[str],
+        since: Optional[str] = None,
+    ) -> Optional[JobRecord]:
+        """Return the newest job with this fingerprint in one of the given states."""
+        raise NotImplementedError
+
+    def find_by_idempotency_key(self, key: str) -> Optional[JobRecord]:
+        raise NotImplementedError
+
+    def add_video(self, video: VideoInfo) -> None:
+        """Add (or replace) a published video in the catalog."""
+        raise NotImplementedError
+
+    def remove_video(self, job_id: str) -> None:
+        raise NotImplementedError
+
+    def list_videos(
+        self,
+        content_types: Optional[Iterable[str]] = None,
+        since: Optional[str] = None,
+        after: Optional[Tuple[str, str]] = None,
+        limit: Optional[int] = 10,
+    ) -> List[VideoInfo]:
+        """
+        Catalog entries newest first, ordered by (created_at, job_id). `after`
+        is the (created_at, job_id) of the last entry of the previous page.
+        """
+        raise NotImplementedError
+
+    def publish_event(self, job_id: str, event: str, data: dict) -> int:
+        """Append an event to the log and return its sequence number."""
+        raise NotImplementedError
+
+    def events_since(self, after_seq: int, job_id: Optional[str] = None, limit: int = 500) -> List[JobEvent]:
+        """Events with seq > after_seq, oldest first, optionally for a single job."""
+        raise NotImplementedError
+
+    def last_event_seq(self) -> int:
+        raise NotImplementedError
+
+    def change_token(self):
+        """Cheap value that changes whenever another process may have written events."""
+        return self.last_event_seq()
+
+    def prune_events(self, before: str) -> int:
+        """Drop events created before the given ISO timestamp; returns how many."""
+        raise NotImplementedError
+
+    def forget(self, job_id: str) -> None:
+        """Drop this process's cached copy of a job, if any (see CachedJobStore)."""
+
+    def close(self) -> None:
+        pass
+
+
+class MemoryJobStore(JobStore):
+    """Process-local store. Handy for tests; state is lost on restart."""
+
+    def __init__(self):
+        self._jobs: Dict[str, JobRecord] = {}
+        self._events: List[JobEvent] = []
+        self._videos: Dict[str, VideoInfo] = {}
+        self._event_seq = itertools.count(1)
+        self._lock = threading.Lock()
+
+    def _append_event(self, job_id: str, event: str, data: dict) -> int:
+        seq = next(self._event_seq)
+        self._events.append(JobEvent(seq=seq, job_id=job_id, event=event, data=data, created_at=datetime.now().isoformat()))
+        return seq
+
+    def create(self, record: JobRecord) -> JobRecord:
+        return self.create_many([record])[0]
+
+    def create_many(self, records: List[JobRecord]) -> List[JobRecord]:
+        records = [record.model_copy(update={"updated_at": record.updated_at or record.created_at}) for record in records]
+        with self._lock:
+            taken = {job.idempotency_key for job in self._jobs.values() if job.idempotency_key}
+            for record in records:
+                if record.idempotency_key and record.idempotency_key in taken:
+                    raise DuplicateJobError(record.idempotency_key)
+            for record in records:
+                self._jobs[record.job_id] = record
+                self._append_event(record.job_id, "status", _status_event_data(record))
+        self._notify()
+        return records
+
+    def get(self, job_id: str) -> Optional[JobRecord]:
+        return self._jobs.get(job_id)
+
+    def update(self, job_id: str, **fields) -> JobRecord:
+        with self._lock:
+            if job_id not in self._jobs:
+                raise JobNotFoundError(job_id)
+            record = self._apply_update(job_id, fields)
+        if "status" in fields:
+            self._notify()
+        return record
+
+    def transition(self, job_id, from_statuses, **fields):
+        with self._lock:
+            current = self._jobs.get(job_id)
+            if current is None or current.status not in set(from_statuses):
+                return None
+            record = self._apply_update(job_id, fields)
+        if "status" in fields:
+            self._notify()
+        return record
+
+    def _apply_update(self, job_id: str, fields: dict) -> JobRecord:
+        # Caller holds the lock
+        fields.setdefault("updated_at", datetime.now().isoformat())
+        record = self._jobs[job_id].model_copy(update=fields)
+        self._jobs[job_id] = record
+        if "status" in fields:
+            self._append_event(job_id, "status", _status_event_data(record))
+        return record
+
+    def list_jobs(self, status=None, content_types=None, since=None, limit=100) -> List[JobRecord]:
+        content_types = set(content_types) if content_types else None
+        matches = [
+            job for job in self._jobs.values()
+            if (status is None or job.status == status)
+            and (content_types is None or job.content_type in content_types)
+            and (since is None or job.created_at >= since)
+        ]
+        matches.sort(key=lambda job: job.created_at, reverse=True)
+        return matches if limit is None else matches[:limit]
+
+    def count_jobs(self, status, content_types=None):
+        content_types = set(content_types) if content_types else None
+        counts: Dict[str, int] = {}
+        for job in list(self._jobs.values()):
+            if job.status == status and (content_types is None or job.content_type in content_types):
+                counts[job.content_type] = counts.get(job.content_type, 0) + 1
+        return counts
+
+    def jobs_in_batch(self, batch_id):
+        matches = [job for job in self._jobs.values() if job.batch_id == batch_id]
+        return sorted(matches, key=lambda job: job.batch_index or 0)
+
+    def find_by_fingerprint(self, fingerprint, statuses, since=None):
+        statuses = set(statuses)
+        matches = [
+            job for job in self._jobs.values()
+            if job.fingerprint == fingerprint and job.status in statuses
+            and (since is None or job.created_at >= since)
+        ]
+        return max(matches, key=lambda job: job.created_at, default=None)
+
+    def find_by_idempotency_key(self, key):
+        return next((job for job in self._jobs.values() if job.idempotency_key == key), None)
+
+    def add_video(self, video):
+        with self._lock:
+            self._videos[video.job_id] = video
+
+    def remove_video(self, job_id):
+        with self._lock:
+            self._videos.pop(job_id, None)
+
+    def list_videos(self, content_types=None, since=None, after=None, limit=10):
+        content_types = set(content_types) if content_types else None
+        with self._lock:
+            matches = [
+                video for video in self._videos.values()
+                if (content_types is None or video.content_type in content_types)
+                and (since is None or video.created_at >= since)
+                and (after is None or (video.created_at, video.job_id) < tuple(after))
+            ]
+        matches.sort(key=lambda video: (video.created_at, video.job_id), reverse=True)
+        return matches if limit is None else matches[:limit]
+
+    def publish_event(self, job_id, event, data):
+        with self._lock:
+            seq = self._append_event(job_id, event, data)
+        self._notify()
+        return seq
+
+    def events_since(self, after_seq, job_id=None, limit=500):
+        with self._lock:
+            events = [e for e in self._events if e.seq > after_seq and (job_id is None or e.job_id == job_id)]
+        return events[:limit]
+
+    def last_event_seq(self):
+        with self._lock:
+            return self._events[-1].seq if self._events else 0
+
+    def prune_events(self, before):
+        with self._lock:
+            kept = [e for e in self._events if e.created_at >= before]
+            pruned = len(self._events) - len(kept)
+            self._events = kept
+        return pruned
+
+
+class SQLiteJobStore(JobStore):
+    """
+    SQLite-backed store running in WAL mode, so readers in other processes
+    (e.g. several uvicorn workers) never block the writer.
+
+    The columns used for filtering are indexed; the full record lives in a
+    JSON `data` column so new record fields do not need a schema migration.
+    """
+
+    def __init__(self, path: str):
+        self.path = path
+        directory = os.path.dirname(os.path.abspath(path))
+        os.makedirs(directory, exist_ok=True)
+        self._local = threading.local()
+        with self._connect() as conn:
+            conn.executescript(_SCHEMA)
+
+    def _connect(self) -> sqlite3.Connection:
+        # sqlite3 connections must not be shared across threads
+        conn = getattr(self._local, "conn", None)
+        if conn is None:
+            conn = sqlite3.connect(self.path, timeout=30.0)
+            conn.execute(f"PRAGMA journal_mode={SQLITE_JOURNAL_MODE}")
+            conn.execute("PRAGMA synchronous=NORMAL")
+            self._local.conn = conn
+        return conn
+
+    @staticmethod
+    def _row_to_record(row) -> JobRecord:
+        return JobRecord.model_validate_json(row[0])
+
+    @staticmethod
+    def _insert_event(conn: sqlite3.Connection, job_id: str, event: str, data: dict) -> int:
+        cursor = conn.execute(
+            "INSERT INTO job_events (job_id, event, data, created_at) VALUES (?, ?, ?, ?)",
+            (job_id, event, json.dumps(data), datetime.now().isoformat()),
+        )
+        return cursor.lastrowid
+
+    def create(self, record: JobRecord) -> JobRecord:
+        return self.create_many([record])[0]
+
+    def create_many(self, records: List[JobRecord]) -> List[JobRecord]:
+        records = [record.model_copy(update={"updated_at": record.updated_at or record.created_at}) for record in records]
+        conn = self._connect()
+        try:
+            with conn:
+                conn.executemany(
+                    "INSERT INTO jobs (job_id, status, content_type, created_at, updated_at, data) "
+                    "VALUES (?, ?, ?, ?, ?, ?)",
+                    [(record.job_id, record.status, record.content_type,
+                      record.created_at, record.updated_at, record.model_dump_json()) for record in records],
+                )
+                for record in records:
+                    self._insert_event(conn, record.job_id, "status", _status_event_data(record))
+        except sqlite3.IntegrityError as e:
+            # Besides job_id, the idempotency key is the only unique column
+            raise DuplicateJobError(str(e)) from e
+        self._notify()
+        return records
+
+    def get(self, job_id: str) -> Optional[JobRecord]:
+        row = self._connect().execute("SELECT data FROM jobs WHERE job_id = ?", (job_id,)).fetchone()
+        return self._row_to_record(row) if row else None
+
+    def update(self, job_id: str, **fields) -> JobRecord:
+        return self._update(job_id, fields)
+
+    def transition(self, job_id, from_statuses, **fields):
+        try:
+            return self._update(job_id, fields, from_statuses=set(from_statuses))
+        except JobNotFoundError:
+            return None
+
+    def _update(self, job_id: str, fields: dict, from_statuses: Optional[set] = None) -> Optional[JobRecord]:
+        conn = self._connect()
+        fields.setdefault("updated_at", datetime.now().isoformat())
+        with conn:
+            # Take the write lock up front so concurrent read-modify-writes serialize
+            conn.execute("BEGIN IMMEDIATE")
+            row = conn.execute("SELECT data FROM jobs WHERE job_id = ?", (job_id,)).fetchone()
+            if row is None:
+                raise JobNotFoundError(job_id)
+            record = self._row_to_record(row)
+            if from_statuses is not None and record.status not in from_statuses:
+                return None
+            record = record.model_copy(update=fields)
+            conn.execute(
+                "UPDATE jobs SET status = ?, updated_at = ?, data = ? WHERE job_id = ?",
+                (record.status, record.updated_at, record.model_dump_json(), job_id),
+            )
+            if "status" in fields:
+                self._insert_event(conn, job_id, "status", _status_event_data(record))
+        if "status" in fields:
+            self._notify()
+        return record
+
+    def list_jobs(self, status=None, content_types=None, since=None, limit=100) -> List[JobRecord]:
+        clauses, params = [], []
+        if status is not None:
+            clauses.append("status = ?")
+            params.append(status)
+        if content_types:
+            content_types = list(content_types)
+            clauses.append(f"content_type IN ({', '.join('?' for _ in content_types)})")
+            params.extend(content_types)
+        if since is not None:
+            clauses.append("created_at >= ?")
+            params.append(since)
+        where = f"WHERE {' AND '.join(clauses)}" if clauses else ""
+        rows = self._connect().execute(
+            f"SELECT data FROM jobs {where} ORDER BY created_at DESC LIMIT ?",
+            (*params, -1 if limit is None else limit),
+        ).fetchall()
+        return [self._row_to_record(row) for row in rows]
+
+    def count_jobs(self, status, content_types=None):
+        params = [status]
+        where = "status = ?"
+        if content_types:
+            content_types = list(content_types)
+            where += f" AND content_type IN ({', '.join('?' for _ in content_types)})"
+            params.extend(content_types)
+        # Answered from the (status, content_type, created_at) index alone
+        rows = self._connect().execute(
+            f"SELECT content_type, COUNT(*) FROM jobs WHERE {where} GROUP BY content_type", params
+        ).fetchall()
+        return dict(rows)
+
+    def jobs_in_batch(self, batch_id):
+        # Same expression as idx_jobs_batch, so the lookup uses the index
+        rows = self._connect().execute(
+            "SELECT data FROM jobs WHERE json_extract(data, '$.batch_id') = ? "
+            "ORDER BY json_extract(data, '$.batch_index')",
+            (batch_id,),
+        ).fetchall()
+        return [self._row_to_record(row) for row in rows]
+
+    def find_by_fingerprint(self, fingerprint, statuses, since=None):
+        statuses = list(statuses)
+        clauses = [f"status IN ({', '.join('?' for _ in statuses)})"]
+        params = [fingerprint, *statuses]
+        if since is not None:
+            clauses.append("created_at >= ?")
+            params.append(since)
+        row = self._connect().execute(
+            f"SELECT data FROM jobs WHERE json_extract(data, '$.fingerprint') = ? AND {' AND '.join(clauses)} "
+            "ORDER BY created_at DESC LIMIT 1",
+            params,
+        ).fetchone()
+        return self._row_to_record(row) if row else None
+
+    def find_by_idempotency_key(self, key):
+        row = self._connect().execute(
+            "SELECT data FROM jobs WHERE json_extract(data, '$.idempotency_key') = ?", (key,)
+        ).fetchone()
+        return self._row_to_record(row) if row else None
+
+    def add_video(self, video):
+        conn = self._connect()
+        with conn:
+            conn.execute(
+                "INSERT OR REPLACE INTO video_catalog (job_id, content_type, created_at, data) VALUES (?, ?, ?, ?)",
+                (video.job_id, video.content_type, video.created_at, video.model_dump_json()),
+            )
+
+    def remove_video(self, job_id):
+        conn = self._connect()
+        with conn:
+            conn.execute("DELETE FROM video_catalog WHERE job_id = ?", (job_id,))
+
+    def list_videos(self, content_types=None, since=None, after=None, limit=10):
+        clauses, params = [], []
+        if content_types:
+            content_types = list(content_types)
+            clauses.append(f"content_type IN ({', '.join('?' for _ in content_types)})")
+            params.extend(content_types)
+        if since is not None:
+            clauses.append("created_at >= ?")
+            params.append(since)
+        if after is not None:
+            # Keyset pagination: a range seek on the index, however deep the page
+            clauses.append("(created_at, job_id) < (?, ?)")
+            params.extend(after)
+        where = f"WHERE {' AND '.join(clauses)}" if clauses else ""
+        rows = self._connect().execute(
+            f"SELECT data FROM video_catalog {where} ORDER BY created_at DESC, job_id DESC LIMIT ?",
+            (*params, -1 if limit is None else limit),
+        ).fetchall()
+        return [VideoInfo.model_validate_json(row[0]) for row in rows]
+
+    def publish_event(self, job_id, event, data):
+        conn = self._connect()
+        with conn:
+            seq = self._insert_event(conn, job_id, event, data)
+        self._notify()
+        return seq
+
+    def events_since(self, after_seq, job_id=None, limit=500):
+        if job_id is None:
+            rows = self._connect().execute(
+                "SELECT seq, job_id, event, data, created_at FROM job_events WHERE seq > ? ORDER BY seq LIMIT ?",
+                (after_seq, limit),
+            ).fetchall()
+        else:
+            rows = self._connect().execute(
+                "SELECT seq, job_id, event, data, created_at FROM job_events "
+                "WHERE job_id = ? AND seq > ? ORDER BY seq LIMIT ?",
+                (job_id, after_seq, limit),
+            ).fetchall()
+        return [
+            JobEvent(seq=seq, job_id=job_id, event=event, data=json.loads(data), created_at=created_at)
+            for seq, job_id, event, data, created_at in rows
+        ]
+
+    def last_event_seq(self):
+        row = self._connect().execute("SELECT MAX(seq) FROM job_events").fetchone()
+        return row[0] or 0
+
+    def change_token(self):
+        # data_version only changes when *another* connection commits, which is
+        # exactly when in-process listeners were not already notified.
+        return self._connect().execute("PRAGMA data_version").fetchone()[0]
+
+    def prune_events(self, before):
+        conn = self._connect()
+        with conn:
+            cursor = conn.execute("DELETE FROM job_events WHERE created_at < ?", (before,))
+        return cursor.rowcount
+
+    def close(self) -> None:
+        conn = getattr(self._local, "conn", None)
+        if conn is not None:
+            conn.close()
+            self._local.conn = None
+
+
+class CachedJobStore(JobStore):
+    """
+    Bounded LRU cache in front of another store.
+
+    Only jobs in a terminal state are cached: running jobs may be updated by
+    another process, so their reads always go to the backend (a primary key
+    lookup) to stay consistent. Finished jobs change rarely (a resume, an
+    expiry); the process's EventBroker sees the status event and calls
+    `forget`, so another process's change is picked up within a poll interval.
+    """
+
+    def __init__(self, backend: JobStore, max_size: int = 1024):
+        self.backend = backend
+        self.max_size = max_size
+        self._cache: "OrderedDict[str, JobRecord]" = OrderedDict()
+        self._lock = threading.Lock()
+
+    def _remember(self, record: JobRecord) -> None:
+        if self.max_size <= 0:
+            return
+        with self._lock:
+            if record.status in TERMINAL_STATUSES:
+                self._cache[record.job_id] = record
+                self._cache.move_to_end(record.job_id)
+                while len(self._cache) > self.max_size:
+                    self._cache.popitem(last=False)
+            else:
+                self._cache.pop(record.job_id, None)
+
+    def create(self, record: JobRecord) -> JobRecord:
+        record = self.backend.create(record)
+        self._remember(record)
+        return record
+
+    def create_many(self, records: List[JobRecord]) -> List[JobRecord]:
+        records = self.backend.create_many(records)
+        for record in records:
+            self._remember(record)
+        return records
+
+    def get(self, job_id: str) -> Optional[JobRecord]:
+        with self._lock:
+            record = self._cache.get(job_id)
+            if record is not None:
+                self._cache.move_to_end(job_id)
+        record_cache("job_store", record is not None)
+        if record is not None:
+            return record
+        record = self.backend.get(job_id)
+        if record is not None:
+            self._remember(record)
+        return record
+
+    def get_uncached(self, job_id: str) -> Optional[JobRecord]:
+        return self.backend.get(job_id)
+
+    def update(self, job_id: str, **fields) -> JobRecord:
+        record = self.backend.update(job_id, **fields)
+        self._remember(record)
+        return record
+
+    def transition(self, job_id, from_statuses, **fields):
+        record = self.backend.transition(job_id, from_statuses, **fields)
+        if record is not None:
+            self._remember(record)
+        return record
+
+    def list_jobs(self, status=None, content_types=None, since=None, limit=100) -> List[JobRecord]:
+        return self.backend.list_jobs(status=status, content_types=content_types, since=since, limit=limit)
+
+    def count_jobs(self, status, content_types=None):
+        return self.backend.count_jobs(status, content_types=content_types)
+
+    def jobs_in_batch(self, batch_id):
+        return self.backend.jobs_in_batch(batch_id)
+
+    def find_by_fingerprint(self, fingerprint, statuses, since=None):
+        return self.backend.find_by_fingerprint(fingerprint, statuses, since=since)
+
+    def find_by_idempotency_key(self, key):
+        return self.backend.find_by_idempotency_key(key)
+
+    def add_video(self, video):
+        self.backend.add_video(video)
+
+    def remove_video(self, job_id):
+        self.backend.remove_video(job_id)
+
+    def list_videos(self, content_types=None, since=None, after=None, limit=10):
+        return self.backend.list_videos(content_types=content_types, since=since, after=after, limit=limit)
+
+    def add_listener(self, callback) -> None:
+        self.backend.add_listener(callback)
+
+    def remove_listener(self, callback) -> None:
+        self.backend.remove_listener(callback)
+
+    def publish_event(self, job_id, event, data):
+        return self.backend.publish_event(job_id, event, data)
+
+    def events_since(self, after_seq, job_id=None, limit=500):
+        return self.backend.events_since(after_seq, job_id=job_id, limit=limit)
+
+    def last_event_seq(self):
+        return self.backend.last_event_seq()
+
+    def change_token(self):
+        return self.backend.change_token()
+
+    def prune_events(self, before):
+        return self.backend.prune_events(before)
+
+    def forget(self, job_id: str) -> None:
+        with self._lock:
+            self._cache.pop(job_id, None)
+
+    def close(self) -> None:
+        with self._lock:
+            self._cache.clear()
+        self.backend.close()
+
+
+def create_job_store(backend: str, path: Optional[str] = None, cache_size: int = 1024) -> JobStore:
+    """Build the configured job store, wrapped in the LRU cache."""
+    if backend == "sqlite":
+        store = SQLiteJobStore(path)
+    elif backend == "memory":
+        store = MemoryJobStore()
+    else:
+        raise ValueError(f"Unknown job store backend '{backend}'. Supported backends are 'sqlite' and 'memory'.")
+    return CachedJobStore(store, max_size=cache_size)
+
+
+_default_store: Optional[JobStore] = None
+
+def get_job_store() -> JobStore:
+    """Return the process-wide job store built from app.config."""
+    global _default_store
+    if _default_store is None:
+        _default_store = create_job_store(JOB_STORE_BACKEND, JOB_STORE_PATH, JOB_CACHE_SIZE)
+    return _default_store
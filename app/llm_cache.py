@@ -0,0 +1,201 @@
+"""
+Persistent cache of LLM responses.
+
+generate_text_completion and stream_text_completion look a prompt up here
+before calling the provider. Entries are keyed by provider, model, the
+normalized prompt and system prompt, temperature and max_tokens; they expire
+after LLM_CACHE_TTL_HOURS, and the least recently used are evicted once the
+responses take more than LLM_CACHE_MAX_MB. The SQLite file is shared by the
+API and the worker processes, and so are its hit and miss counts.
+
+Each job chooses how the cache is used (ContentRequest.cache, defaulting to
+LLM_CACHE_MODE):
+- prefer: answer from the cache when possible, otherwise call the provider
+  and store its response
+- bypass: always call the provider, and store the fresh response
+- only: never call the provider; a prompt that is not cached fails
+"""
+import asyncio
+import contextvars
+import hashlib
+import json
+import os
+import re
+import sqlite3
+import threading
+import time
+from typing import Dict, Optional
+
+from .config import (
+    LLM_CACHE_ENABLED,
+    LLM_CACHE_MAX_MB,
+    LLM_CACHE_MODE,
+    LLM_CACHE_PATH,
+    LLM_CACHE_TTL_HOURS,
+    SQLITE_JOURNAL_MODE,
+)
+from .metrics import record_cache
+
+CACHE_MODES = ("prefer", "bypass", "only")
+
+# The running job's ContentRequest.cache (set by the job runner)
+current_cache_mode: contextvars.ContextVar[Optional[str]] = contextvars.ContextVar("current_cache_mode", default=None)
+
+_SCHEMA = """
+CREATE TABLE IF NOT EXISTS llm_responses (
+    key TEXT PRIMARY KEY,
+    response TEXT NOT NULL,
+    size INTEGER NOT NULL,
+    created_at REAL NOT NULL,
+    accessed_at REAL NOT NULL
+);
+CREATE INDEX IF NOT EXISTS idx_llm_responses_accessed ON llm_responses (accessed_at);
+CREATE TABLE IF NOT EXISTS llm_cache_counts (
+    result TEXT PRIMARY KEY,
+    count INTEGER NOT NULL
+);
+"""
+
+
+def normalize_prompt(text: Optional[str]) -> str:
+    """Prompt text as it is keyed: line endings, runs of spaces and indentation do not matter."""
+    if not text:
+        return ""
+    lines = (re.sub(r"[ \t]+", " ", line).strip() for line in text.replace("\r\n", "\n").split("\n"))
+    return "\n".join(lines).strip()
+
+
+def cache_key(provider: str, model: str, prompt: str, system_prompt: Optional[str],
+              temperature: float, max_tokens: int) -> str:
+    payload = {
+        "provider": provider,
+        "model": model,
+        "prompt": normalize_prompt(prompt),
+        "system_prompt": normalize_prompt(system_prompt),
+        "temperature": temperature,
+        "max_tokens": max_tokens,
+    }
+    canonical = json.dumps(payload, sort_keys=True, separators=(",", ":"), ensure_ascii=False)
+    return hashlib.sha256(canonical.encode("utf-8")).hexdigest()
+
+
+class LLMCache:
+    """SQLite-backed response cache with a TTL and least-recently-used eviction beyond `max_bytes`."""
+
+    def __init__(self, path: str, max_bytes: int, ttl_seconds: float):
+        self.path = path
+        self.max_bytes = max_bytes
+        self.ttl_seconds = ttl_seconds
+        os.makedirs(os.path.dirname(os.path.abspath(path)), exist_ok=True)
+        self._local = threading.local()
+        with self._connect() as conn:
+            conn.executescript(_SCHEMA)
+
+    def _connect(self) -> sqlite3.Connection:
+        # sqlite3 connections must not be shared across threads
+        conn = getattr(self._local, "conn", None)
+        if conn is None:
+            conn = sqlite3.connect(self.path, timeout=30.0)
+            conn.execute(f"PRAGMA journal_mode={SQLITE_JOURNAL_MODE}")
+            conn.execute("PRAGMA synchronous=NORMAL")
+            self._local.conn = conn
+        return conn
+
+    def _expired_before(self, now: float) -> float:
+        return now - self.ttl_seconds if self.ttl_seconds > 0 else float("-inf")
+
+    def get(self, key: str) -> Optional[str]:
+        """The cached response for `key`, if any; counts the hit or miss and marks the entry as used."""
+        now = time.time()
+        conn = self._connect()
+        with conn:
+            row = conn.execute("SELECT response, created_at FROM llm_responses WHERE key = ?", (key,)).fetchone()
+            if row is not None and row[1] < self._expired_before(now):
+                conn.execute("DELETE FROM llm_responses WHERE key = ?", (key,))
+                row = None
+            if row is not None:
+                conn.execute("UPDATE llm_responses SET accessed_at = ? WHERE key = ?", (now, key))
+            conn.execute(
+                "INSERT INTO llm_cache_counts (result, count) VALUES (?, 1) "
+                "ON CONFLICT(result) DO UPDATE SET count = count + 1",
+                ("hit" if row is not None else "miss",)
+            )
+        return row[0] if row is not None else None
+
+    def put(self, key: str, response: str) -> None:
+        """Store a response, then drop expired entries and the least recently used beyond `max_bytes`."""
+        now = time.time()
+        conn = self._connect()
+        with conn:
+            conn.execute(
+                "INSERT OR REPLACE INTO llm_responses (key, response, size, created_at, accessed_at) "
+                "VALUES (?, ?, ?, ?, ?)",
+                (key, response, len(response.encode("utf-8")), now, now)
+            )
+            conn.execute("DELETE FROM llm_responses WHERE created_at < ?", (self._expired_before(now),))
+            excess = conn.execute("SELECT COALESCE(SUM(size), 0) FROM llm_responses").fetchone()[0] - self.max_bytes
+            if excess > 0:
+                evicted = []
+                for old_key, size in conn.execute("SELECT key, size FROM llm_responses ORDER BY accessed_at"):
+                    if excess <= 0:
+                        break
+                    evicted.append((old_key,))
+                    excess -= size
+                conn.executemany("DELETE FROM llm_responses WHERE key = ?", evicted)
+
+    def stats(self) -> Dict[str, int]:
+        conn = self._connect()
+        entries, size = conn.execute("SELECT COUNT(*), COALESCE(SUM(size), 0) FROM llm_responses").fetchone()
+        counts = dict(conn.execute("SELECT result, count FROM llm_cache_counts").fetchall())
+        return {"entries": entries, "size_bytes": size, "hits": counts.get("hit", 0), "misses": counts.get("miss", 0)}
+
+    def clear(self) -> int:
+        """Remove every entry (the counts are kept); returns how many there were."""
+        conn = self._connect()
+        with conn:
+            return conn.execute("DELETE FROM llm_responses").rowcount
+
+
+def cache_mode(mode: Optional[str] = None) -> str:
+    """`mode` if given, else the running job's ContentRequest.cache, else LLM_CACHE_MODE."""
+    mode = mode or current_cache_mode.get() or LLM_CACHE_MODE
+    if mode not in CACHE_MODES:
+        raise ValueError(f"Unknown LLM cache mode '{mode}'. Supported modes are {', '.join(CACHE_MODES)}.")
+    return mode
+
+
+async def lookup(key: str, mode: str) -> Optional[str]:
+    """The cached response for `key`, unless the cache is disabled or `mode` is bypass."""
+    cache = get_llm_cache()
+    if cache is None or mode == "bypass":
+        return None
+    try:
+        response = await asyncio.to_thread(cache.get, key)
+    except sqlite3.Error as e:
+        # A broken cache costs a provider call, not the job
+        print(f"LLM cache lookup failed ({cache.path}): {e!r}")
+        return None
+    record_cache("llm", response is not None)
+    return response
+
+
+async def remember(key: str, response: str) -> None:
+    cache = get_llm_cache()
+    if cache is None or not response:
+        return
+    try:
+        await asyncio.to_thread(cache.put, key, response)
+    except sqlite3.Error as e:
+        print(f"LLM cache write failed ({cache.path}): {e!r}")
+
+
+_default_cache: Optional[LLMCache] = None
+
+def get_llm_cache() -> Optional[LLMCache]:
+    """The process-wide cache from app.config, or None when LLM_CACHE_ENABLED is off."""
+    global _default_cache
+    if not LLM_CACHE_ENABLED:
+        return None
+    if _default_cache is None:
+        _default_cache = LLMCache(LLM_CACHE_PATH, int(LLM_CACHE_MAX_MB * 1024 * 1024), LLM_CACHE_TTL_HOURS * 3600)
+    return _default_cache
@@ -1,61 +1,91 @@
 import httpx
 import json
 import asyncio # Added for potential direct anthropic call if not using to_thread
-from app.config import OLLAMA_API_BASE_URL, OLLAMA_MODEL_NAME, ANTHROPIC_KEY, LLM_PROVIDER
-from anthropic import Anthropic
-from openai import AsyncOpenAI
+import re
+from typing import AsyncIterator, List
+from app.config import OLLAMA_API_BASE_URL, OLLAMA_MODEL_NAME, LLM_PROVIDER
 from .config import (
-    OPENAI_KEY,
     OPENAI_MODEL,
     OPENAI_TEMPERATURE,
     OPENAI_MAX_TOKENS
 )
+from .metrics import timed
+from . import llm_cache, providers
 
-# Initialize clients
-openai_client = AsyncOpenAI(api_key=OPENAI_KEY) if OPENAI_KEY else None
-anthropic_client = Anthropic(api_key=ANTHROPIC_KEY) if ANTHROPIC_KEY else None
+# Clients are created on first use (None when the provider's key is not set);
+# `openai_client` and `anthropic_client` resolve through __getattr__ until set or patched
+_LAZY_CLIENTS = {"openai_client": "async_openai", "anthropic_client": "async_anthropic"}
 
-# Define a timeout for HTTP requests (e.g., 60 seconds)
-DEFAULT_TIMEOUT = 60.0
 
-async def generate_ollama_completion(prompt: str, model: str = None, temperature: float = 0.7, num_predict: int = -1) -> str:
+def __getattr__(name):
+    if name in _LAZY_CLIENTS:
+        try:
+            return providers.get_client(_LAZY_CLIENTS[name])
+        except providers.ProviderNotConfiguredError:
+            return None
+    raise AttributeError(f"module {__name__!r} has no attribute {name!r}")
+
+
+def _client(name):
+    return globals()[name] if name in globals() else __getattr__(name)
+
+
+_ANTHROPIC_MODEL = "claude-2"
+
+
+def _cache_key(prompt: str, temperature: float, max_tokens: int, system_prompt: str = None) -> str:
+    model = {"openai": OPENAI_MODEL, "anthropic": _ANTHROPIC_MODEL, "ollama": OLLAMA_MODEL_NAME}.get(LLM_PROVIDER)
+    return llm_cache.cache_key(LLM_PROVIDER, model, prompt, system_prompt, temperature, max_tokens)
+
+async def generate_ollama_completion(
+    prompt: str,
+    model: str = None,
+    temperature: float = 0.7,
+    num_predict: int = -1,
+    system_prompt: str = None
+) -> str:
     """
     Generates a text completion using a locally running Ollama instance.
     Assumes Ollama API is compatible with the OpenAI completions API structure for the /api/generate endpoint.
     Ref: https://github.com/ollama/ollama/blob/main/docs/api.md#generate-a-completion
-    """
-    if model is None:
-        model = OLLAMA_MODEL_NAME
 
-    api_url = f"{OLLAMA_API_BASE_URL}/api/generate" # Standard Ollama API endpoint for generation
+    Not timed itself: generate_text_completion, which routes here for
+    LLM_PROVIDER=ollama, records it as ("ollama", "completion").
+    """
+    api_url = "/api/generate" # Standard Ollama API endpoint for generation, relative to OLLAMA_API_BASE_URL
 
     payload_options = {"temperature": temperature}
     if num_predict > 0:
         payload_options["num_predict"] = num_predict
 
     payload = {
-        "model": model,
+        **providers.ollama_options(**payload_options), # model, keep_alive and num_ctx
         "prompt": prompt,
         "stream": False, # Get the full response at once
-        "options": payload_options
     }
+    if model is not None:
+        payload["model"] = model
+    if system_prompt:
+        payload["system"] = system_prompt
 
     try:
-        async with httpx.AsyncClient(timeout=DEFAULT_TIMEOUT) as client:
+        # The process-wide pooled client, so connections are reused between prompts
+        client = providers.get_ollama_client()
+        async with providers.ollama_slot():
             response = await client.post(api_url, json=payload)
-            response.raise_for_status() # Raise an exception for HTTP errors (4xx or 5xx)
+        response.raise_for_status() # Raise an exception for HTTP errors (4xx or 5xx)
 
-            # The response from Ollama's /api/generate when stream=False is a single JSON object
-            # where each line is a JSON object if stream=True.
-            # For stream=False, it's a single JSON response.
-            # Example: {"model":"llama2","created_at":"...","response":"Hello!","done":true,"context":[...], ...}
-            response_data = response.json()
+        # The response from Ollama's /api/generate when stream=False is a single JSON object
+        # where each line is a JSON object if stream=True.
+        # For stream=False, it's a single JSON response.
+        # Example: {"model":"llama2","created_at":"...","response":"Hello!","done":true,"context":[...], ...}
+        response_data = response.json()
 
-            if response_data.get("done"):
-                return response_data.get("response", "").strip()
-            else:
-                # This case should ideally not happen with stream=False if the request is successful
-                return "Error: Ollama generation did not complete as expected."
+        if response_data.get("done"):
+            return response_data.get("response", "").strip()
+        else:
+            # This case should ideally not happen with stream=False if the request is successful
+            return "Error: Ollama generation did not complete as expected."
 
     except httpx.HTTPStatusError as e:
         # Log the error or handle it more gracefully
@@ -76,22 +106,53 @@ async def generate_text_completion(
     prompt: str,
     temperature: float = 0.7,
     max_tokens: int = 2000,
-    system_prompt: str = None
+    system_prompt: str = None,
+    cache: str = None,
+    cacheable: bool = True
 ) -> str:
     """
-    Generate text completion using the configured LLM provider.
+    Generate text completion using the configured LLM provider. Identical
+    requests are answered from the LLM response cache (see app/llm_cache.py).
     
     Args:
         prompt (str): The main prompt for content generation
         temperature (float): Controls randomness in the output
         max_tokens (int): Maximum number of tokens to generate
         system_prompt (str, optional): System prompt to guide the model's behavior
+        cache (str, optional): prefer, bypass or only (default: the job's
+            ContentRequest.cache, then LLM_CACHE_MODE)
+        cacheable (bool): False for prompts meant to give a different answer
+            every time (e.g. "a topic of your choice"); they skip the cache
     
     Returns:
         str: Generated text or error message
     """
+    try:
+        mode = llm_cache.cache_mode(cache)
+    except ValueError as e:
+        return f"Error: {e}"
+    key = _cache_key(prompt, temperature, max_tokens, system_prompt) if cacheable else None
+    cached = await llm_cache.lookup(key, mode) if key else None
+    if cached is not None:
+        return cached
+    if mode == "only":
+        return "Error: No cached response for this prompt (cache=only)."
+    text = await _generate_text_completion(prompt, temperature, max_tokens, system_prompt)
+    # Failures are reported as "Error: ..." strings, which are not worth keeping
+    if key and not text.startswith("Error"):
+        await llm_cache.remember(key, text)
+    return text
+
+@timed(lambda: LLM_PROVIDER, "completion")
+async def _generate_text_completion(
+    prompt: str,
+    temperature: float,
+    max_tokens: int,
+    system_prompt: str = None
+) -> str:
     try:
         if LLM_PROVIDER == "openai":
+            openai_client = _client("openai_client")
             if not openai_client:
                 return "Error: OpenAI client not initialized. Check your API key."
             
@@ -109,6 +170,7 @@ async def generate_text_completion(
             return response.choices[0].message.content.strip()
 
         elif LLM_PROVIDER == "anthropic":
+            anthropic_client = _client("anthropic_client")
             if not anthropic_client:
                 return "Error: Anthropic client not initialized. Check your API key."
             
@@ -117,18 +179,163 @@ async def generate_text_completion(
             
             response = await anthropic_client.completions.create(
                 prompt=full_prompt,
-                model="claude-2",
+                model=_ANTHROPIC_MODEL,
                 max_tokens_to_sample=max_tokens,
                 temperature=temperature
             )
             return response.completion.strip()
 
+        elif LLM_PROVIDER == "ollama":
+            return await generate_ollama_completion(
+                prompt,
+                temperature=temperature,
+                num_predict=max_tokens,
+                system_prompt=system_prompt
+            )
+
         else:
-            return f"Error: Unknown LLM provider '{LLM_PROVIDER}'. Supported providers are 'openai' and 'anthropic'."
+            return f"Error: Unknown LLM provider '{LLM_PROVIDER}'. Supported providers are 'openai', 'anthropic' and 'ollama'."
 
     except Exception as e:
         return f"Error: {str(e)}"
 
+class CompletionError(RuntimeError):
+    """Raised by streaming completions, which cannot report failure as an "Error: ..." string."""
+
+
+def stream_words(text: str) -> List[str]:
+    """Split text into words with their trailing whitespace, for streaming canned (TEST_MODE) text."""
+    return re.findall(r"\s*\S+\s*", text) if text.strip() else [text]
+
+
+def _messages(prompt: str, system_prompt: str = None) -> list:
+    messages = []
+    if system_prompt:
+        messages.append({"role": "system", "content": system_prompt})
+    messages.append({"role": "user", "content": prompt})
+    return messages
+
+
+async def _stream_ollama(prompt: str, temperature: float, max_tokens: int, system_prompt: str = None) -> AsyncIterator[str]:
+    payload = {
+        **providers.ollama_options(temperature=temperature, num_predict=max_tokens),
+        "prompt": prompt,
+        "stream": True, # One JSON object per line, each with the next piece of the response
+    }
+    if system_prompt:
+        payload["system"] = system_prompt
+    try:
+        async with providers.ollama_slot():
+            async with providers.get_ollama_client().stream("POST", "/api/generate", json=payload) as response:
+                response.raise_for_status()
+                async for line in response.aiter_lines():
+                    if not line.strip():
+                        continue
+                    data = json.loads(line)
+                    if data.get("error"):
+                        raise CompletionError(f"Ollama generation failed: {data['error']}")
+                    if data.get("response"):
+                        yield data["response"]
+                    if data.get("done"):
+                        return
+    except httpx.HTTPStatusError as e:
+        raise CompletionError(f"Ollama API request failed with status {e.response.status_code}") from e
+    except httpx.RequestError as e:
+        raise CompletionError(f"Ollama API request failed: {e}") from e
+
+
+async def stream_text_completion(
+    prompt: str,
+    temperature: float = 0.7,
+    max_tokens: int = 2000,
+    system_prompt: str = None,
+    cache: str = None,
+    cacheable: bool = True
+) -> AsyncIterator[str]:
+    """
+    Like generate_text_completion, but yields the text as the provider
+    produces it. Failures raise CompletionError. A cached response is
+    yielded in one piece; a streamed one is cached once it is complete,
+    stripped like the non-streaming providers' responses.
+    """
+    try:
+        mode = llm_cache.cache_mode(cache)
+    except ValueError as e:
+        raise CompletionError(str(e)) from e
+    key = _cache_key(prompt, temperature, max_tokens, system_prompt) if cacheable else None
+    cached = await llm_cache.lookup(key, mode) if key else None
+    if cached is not None:
+        yield cached
+        return
+    if mode == "only":
+        raise CompletionError("No cached response for this prompt (cache=only).")
+    parts = []
+    async for text in _stream_text_completion(prompt, temperature, max_tokens, system_prompt):
+        parts.append(text)
+        yield text
+    if key:
+        await llm_cache.remember(key, "".join(parts).strip())
+
+@timed(lambda: LLM_PROVIDER, "stream_completion")
+async def _stream_text_completion(
+    prompt: str,
+    temperature: float,
+    max_tokens: int,
+    system_prompt: str = None
+) -> AsyncIterator[str]:
+    if LLM_PROVIDER == "openai":
+        openai_client = _client("openai_client")
+        if not openai_client:
+            raise CompletionError("OpenAI client not initialized. Check your API key.")
+        try:
+            stream = await openai_client.chat.completions.create(
+                model=OPENAI_MODEL,
+                messages=_messages(prompt, system_prompt),
+                temperature=temperature,
+                max_tokens=max_tokens,
+                stream=True
+            )
+            async for chunk in stream:
+                if chunk.choices and chunk.choices[0].delta.content:
+                    yield chunk.choices[0].delta.content
+        except CompletionError:
+            raise
+        except Exception as e:
+            raise CompletionError(f"OpenAI generation failed: {e}") from e
+
+    elif LLM_PROVIDER == "anthropic":
+        anthropic_client = _client("anthropic_client")
+        if not anthropic_client:
+            raise CompletionError("Anthropic client not initialized. Check your API key.")
+        full_prompt = f"{system_prompt}\n\n" if system_prompt else ""
+        full_prompt += f"Human: {prompt}\n\nAssistant:"
+        try:
+            events = await anthropic_client.completions.create(
+                prompt=full_prompt,
+                model=_ANTHROPIC_MODEL,
+                max_tokens_to_sample=max_tokens,
+                temperature=temperature,
+                stream=True
+            )
+            try:
+                async for event in events:
+                    if event.completion:
+                        yield event.completion
+            finally:
+                # Closing the response early stops the stream when the consumer goes away
+                response = getattr(events, "response", None)
+                if response is not None:
+                    await response.aclose()
+        except Exception as e:
+            raise CompletionError(f"Anthropic generation failed: {e}") from e
+
+    elif LLM_PROVIDER == "ollama":
+        async for text in _stream_ollama(prompt, temperature, max_tokens, system_prompt):
+            yield text
+
+    else:
+        raise CompletionError(f"Unknown LLM provider '{LLM_PROVIDER}'.")
+
 # Example usage (optional, for direct testing of this file)
 if __name__ == "__main__":
     import asyncio
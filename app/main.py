@@ -1,99 +1,143 @@
-from fastapi import FastAPI, HTTPException, BackgroundTasks, Query
-from fastapi.responses import FileResponse, StreamingResponse, HTMLResponse
+from fastapi import FastAPI, HTTPException, Query, Header, Response, WebSocket, WebSocketDisconnect
+from fastapi.responses import FileResponse, StreamingResponse, HTMLResponse, JSONResponse
 from fastapi.middleware.cors import CORSMiddleware
-from fastapi.staticfiles import StaticFiles
 import os
+import sys
+import asyncio
+import subprocess
+from contextlib import asynccontextmanager
+from dataclasses import asdict
 from datetime import datetime, timedelta
 import uuid
-from pydantic import BaseModel
-from typing import Optional, Literal, List, Tuple
-import shutil
-from pathlib import Path
-
-from .generators.story import generate_story
-from .generators.educational import generate_educational_content
-from .generators.image import generate_images
-from .generators.audio import generate_voice_over, generate_background_music, generate_dialogue
-from .generators.video import create_video_async
-from .generators.podcast import (
-    generate_podcast_from_custom_text,
-    generate_podcast_from_topic,
-    generate_free_podcast,
-    generate_dialogue_content
+import json
+import codecs
+import time
+from typing import Optional, List, Set
+
+from .config import (
+    OUTPUT_DIR,
+    JOB_CLASSES,
+    JOB_STORE_BACKEND,
+    BATCH_MAX_SIZE,
+    SYNC_TIMEOUT_SECONDS,
+    SYNC_MAX_CONCURRENT,
+    QUEUE_LIMITS,
+    QUEUE_MAX_TOTAL,
+    FAST_LANE_CLASSES,
+    JOB_SECONDS_ESTIMATE,
+    RESULT_REUSE_HOURS,
+    IDEMPOTENCY_KEY_TTL_HOURS,
+    RETENTION_TTL_HOURS,
+    OUTPUT_QUOTA_BYTES,
+    RETENTION_INTERVAL_SECONDS,
+    PUBLIC_VIDEO_DIR,
+    WORKER_CONCURRENCY,
+    WORKER_MODE,
+    WORKER_LOCK_PATH,
+    EVENT_POLL_INTERVAL,
+    EVENT_RETENTION_HOURS,
+    TEXT_STREAM_POLL_INTERVAL,
+    METRICS_DIR,
+    OLLAMA_WARMUP,
+    LLM_CACHE_MODE,
+    LLM_CACHE_TTL_HOURS,
+)
+from .jobs import (
+    get_job_store,
+    get_job_queue,
+    QueueItem,
+    DuplicateJobError,
+    TERMINAL_STATUSES,
+    ACTIVE_STATUSES,
+)
+from .jobs.checkpoints import completed_stages, CHECKPOINT_DIRNAME
+from .jobs.events import EventBroker, is_terminal_event
+from .jobs.fingerprint import request_fingerprint
+from .jobs.admission import AdmissionController, QueueFullError
+from .jobs.retention import RetentionManager, discard_output
+from .jobs.blobs import get_blob_store
+from .jobs.catalog import backfill_catalog, decode_cursor, encode_cursor
+from .llm_cache import get_llm_cache
+from .metrics import collect, render, CONTENT_TYPE_LATEST, QUEUE_JOBS, ACTIVE_JOBS
+from .providers import missing_keys, uses_ollama, warm_up_ollama, close_ollama_client
+from .content_types import get_content_type
+from .models import (
+    JobRecord,
+    DialogueEntry,
+    PodcastGenerationOptions,
+    ArticleOptions,
+    TweetOptions,
+    BookChapterOptions,
+    ContentRequest,
+    BatchRequest,
+    VideoInfo,
 )
-from .generators.article import generate_article
-from .generators.social import generate_tweet_thread
-from .generators.book import generate_book_chapter
-import json # For saving tweet_thread output
-from .config import OUTPUT_DIR
-
-# Define request models
-class DialogueEntry(BaseModel):
-    speaker: int  # 1 or 2
-    text: str
-
-class PodcastGenerationOptions(BaseModel):
-    podcast_type: Literal["custom_text", "topic_based", "free_generation", "dialogue"]
-    custom_text: Optional[str] = None
-    topic: Optional[str] = None
-    dialogues: Optional[List[DialogueEntry]] = None
-    voice1: Optional[str] = "rachel"  # Default female voice
-    voice2: Optional[str] = "josh"    # Default male voice
-    num_exchanges: Optional[int] = Query(default=6, ge=2, le=20)  # Number of dialogue exchanges to generate
-
-class ArticleOptions(BaseModel):
-    custom_instructions: Optional[str] = None
-    # placeholder for future article-specific options like section_titles, target_audience
-
-class TweetOptions(BaseModel):
-    num_tweets: int = Query(default=3, ge=1, le=10) # Default to 3 tweets, min 1, max 10
-    call_to_action: Optional[str] = None
-    # placeholder for future tweet-specific options like tone (e.g. "professional", "witty")
-
-class BookChapterOptions(BaseModel):
-    plot_summary: Optional[str] = None
-    chapter_topic: Optional[str] = None # More specific topic for the chapter
-    previous_chapter_summary: Optional[str] = None
-    characters: Optional[List[str]] = None
-    genre: Optional[str] = None
-    # placeholder for future book-specific options
-
-class ContentRequest(BaseModel):
-    content_type: Literal["story", "educational", "podcast", "article", "tweet_thread", "book_chapter"]
-    topic: str  # character_description for stories, topic for educational content, primary subject for text types
-
-    # Video/Educational specific (could be refactored further if more types emerge)
-    video_prompt: Optional[str] = None
-    educational_style: Optional[Literal["lecture", "tutorial", "explainer"]] = None
-    difficulty_level: Optional[Literal["beginner", "intermediate", "advanced"]] = None
-
-    # Podcast specific
-    podcast_options: Optional[PodcastGenerationOptions] = None
-    voice_name: Optional[str] = None  # Name of the ElevenLabs voice to use
-
-    # New text-specific options
-    article_options: Optional[ArticleOptions] = None
-    tweet_options: Optional[TweetOptions] = None
-    book_chapter_options: Optional[BookChapterOptions] = None
-
-    # Common text generation parameters
-    desired_length_words: Optional[int] = Query(default=0, ge=0) # 0 might mean model default or not applicable
-    style_tone: Optional[str] = None  # e.g., "formal", "casual", "technical", "humorous"
-
-
-# Add new models
-class VideoInfo(BaseModel):
-    job_id: str
-    content_type: str
-    created_at: str
-    video_url: str
-    thumbnail_url: Optional[str] = None
-    duration: Optional[float] = None
+from .utils.range_response import RangeFileResponse, RangeStaticFiles
+from .utils.zip_stream import artifact_files, stream_zip
+from .worker import acquire_process_lock, default_worker_id, run_worker, run_cancellable, Lease
+
+@asynccontextmanager
+async def lifespan(app: FastAPI):
+    """Start the event broker, the retention manager and the queue workers (according to WORKER_MODE)."""
+    await event_broker.start()
+    unavailable = {content_type: missing_keys(content_type) for content_type in JOB_CLASSES}
+    for content_type, keys in unavailable.items():
+        if keys:
+            print(f"Content type {content_type} is unavailable: {', '.join(keys)} not set")
+    # Videos rendered before the catalog existed are published once, at startup
+    backfilled = await asyncio.to_thread(backfill_catalog, job_store, VIDEO_CONTENT_TYPES, PUBLIC_VIDEO_DIR)
+    if backfilled:
+        print(f"Published {backfilled} existing video(s) to the catalog")
+    retention_task = asyncio.create_task(retention_manager.run_forever()) if RETENTION_INTERVAL_SECONDS > 0 else None
+    # Sync text jobs (/generate?mode=sync) call Ollama from this process
+    warm_up_task = asyncio.create_task(warm_up_ollama()) if OLLAMA_WARMUP and uses_ollama(SYNC_CONTENT_TYPES) else None
+    worker_process = None
+    worker_lock = None
+    worker_task = None
+    stop_event = asyncio.Event()
+    # A memory-backed queue cannot be shared with another process
+    worker_mode = "inline" if JOB_STORE_BACKEND == "memory" else WORKER_MODE
+    if worker_mode == "process":
+        # Jobs run in a separate process so renders never compete with request handling.
+        # Under uvicorn --workers N every API process gets here; one worker process is enough.
+        worker_lock = acquire_process_lock(WORKER_LOCK_PATH)
+        if worker_lock is not None:
+            worker_process = subprocess.Popen([sys.executable, "-m", "app.worker"])
+        else:
+            print(f"Worker process already started by another API process ({WORKER_LOCK_PATH} is locked)")
+    elif worker_mode == "inline":
+        worker_task = asyncio.create_task(run_worker(stop_event=stop_event))
+    try:
+        yield
+    finally:
+        if worker_process is not None:
+            worker_process.terminate()
+            try:
+                worker_process.wait(timeout=10)
+            except subprocess.TimeoutExpired:
+                worker_process.kill()
+        if worker_lock is not None:
+            worker_lock.close()
+        if worker_task is not None:
+            stop_event.set()
+            await worker_task
+        if retention_task is not None:
+            retention_task.cancel()
+        if warm_up_task is not None:
+            warm_up_task.cancel()
+        # Sync jobs still running go back to the queue for a worker to finish
+        for task in list(sync_tasks):
+            task.cancel()
+        await asyncio.gather(*sync_tasks, return_exceptions=True)
+        job_queue.requeue_running(owners=[api_owner])
+        await close_ollama_client()
+        await event_broker.stop()
 
 app = FastAPI(
     title="Content Maker API",
     description="API for generating AI-powered stories and educational videos with images, voice-overs, and background music",
-    version="1.0.0"
+    version="1.0.0",
+    lifespan=lifespan
 )
 
 # Add CORS middleware
@@ -105,14 +149,52 @@ app.add_middleware(
     allow_headers=["*"],
 )
 
-# Store active jobs
-active_jobs = {}
+# Persistent job store (SQLite in WAL mode by default) with an LRU for finished jobs
+job_store = get_job_store()
+# Work queue shared with the worker process(es)
+job_queue = get_job_queue()
+# Pushes job events to SSE and WebSocket subscribers
+event_broker = EventBroker(job_store, poll_interval=EVENT_POLL_INTERVAL, retention_hours=EVENT_RETENTION_HOURS)
+
+# Per content type queue limits; rejections carry a Retry-After estimated from throughput
+admission = AdmissionController(
+    job_store,
+    job_queue,
+    job_classes=JOB_CLASSES,
+    limits=QUEUE_LIMITS,
+    concurrency=WORKER_CONCURRENCY,
+    job_seconds=JOB_SECONDS_ESTIMATE,
+    total_limit=QUEUE_MAX_TOTAL,
+    fast_lane=FAST_LANE_CLASSES
+)
+event_broker.add_observer(admission.observe)
+
+# Deletes old job output (per content type TTLs), keeps disk usage under the quota and collects unused blobs
+retention_manager = RetentionManager(
+    job_store,
+    output_dir=OUTPUT_DIR,
+    public_dir=PUBLIC_VIDEO_DIR,
+    ttl_hours=RETENTION_TTL_HOURS,
+    quota_bytes=OUTPUT_QUOTA_BYTES,
+    interval=RETENTION_INTERVAL_SECONDS,
+    blob_store=get_blob_store()
+)
+
+# Only these content types produce a content_video.mp4
+VIDEO_CONTENT_TYPES = ["story", "educational"]
+# Content types /generate?mode=sync runs in the API process, and how many at once
+SYNC_CONTENT_TYPES = ["article", "tweet_thread", "book_chapter"]
+sync_slots = asyncio.Semaphore(SYNC_MAX_CONCURRENT)
+# Sync jobs hold queue leases under this process's id, so workers re-queue them if it dies
+api_owner = default_worker_id()
+# Sync jobs running in this process (some past their request's timeout)
+sync_tasks: Set[asyncio.Task] = set()
 
-# Mount static files
-app.mount("/static", StaticFiles(directory="static"), name="static")
+# Mount static files (with Range support, so video players can seek)
+app.mount("/static", RangeStaticFiles(directory="static"), name="static")
 
 # Create necessary directories
-os.makedirs("static/videos", exist_ok=True)
+os.makedirs(PUBLIC_VIDEO_DIR, exist_ok=True)
 os.makedirs("static/thumbnails", exist_ok=True)
 os.makedirs("static/audios", exist_ok=True)
 
@@ -120,57 +202,655 @@ os.makedirs("static/audios", exist_ok=True)
 async def root():
     return {"message": "Welcome to Content Maker API"}
 
+def find_reusable_job(fingerprint: str) -> Optional[JobRecord]:
+    """
+    A queued or running job for the same request, or a completed one that
+    finished within RESULT_REUSE_HOURS and whose output is still on disk.
+    """
+    active = job_store.find_by_fingerprint(fingerprint, ACTIVE_STATUSES)
+    if active is not None:
+        return active
+    if RESULT_REUSE_HOURS <= 0:
+        return None
+    completed = job_store.find_by_fingerprint(fingerprint, ["completed"])
+    if completed is None or not completed.output_filename:
+        return None
+    fresh_since = (datetime.now() - timedelta(hours=RESULT_REUSE_HOURS)).isoformat()
+    if (completed.completed_at or completed.created_at) < fresh_since:
+        return None
+    if not os.path.exists(os.path.join(completed.output_dir, completed.output_filename)):
+        return None
+    return completed
+
+def require_providers(content_types) -> None:
+    """Reject with 503 when a content type's provider API keys are not configured."""
+    for content_type in sorted(set(content_types)):
+        keys = missing_keys(content_type)
+        if keys:
+            raise HTTPException(
+                status_code=503,
+                detail=f"{content_type} generation is unavailable: {', '.join(keys)} not set."
+            )
+
+def admit_or_429(requested: dict) -> None:
+    """Reject with 429 and Retry-After when the queues for these content types are full."""
+    try:
+        admission.check(requested)
+    except QueueFullError as e:
+        raise HTTPException(status_code=429, detail=str(e), headers={"Retry-After": str(e.retry_after)})
+
+def reused_job_response(job: JobRecord) -> dict:
+    response = {
+        "job_id": job.job_id,
+        "status": job.status,
+        "deduplicated": True,
+        "message": f"Identical {job.content_type} request already {'generated' if job.status == 'completed' else job.status}"
+    }
+    if job.status == "completed":
+        response["download_url"] = f"/download/{job.job_id}"
+    return response
+
+def sync_response(job: JobRecord, pending: dict) -> Response:
+    """
+    The answer to /generate?mode=sync: a completed job's content, with its id in
+    X-Job-Id. A job that is still queued or running is answered with 202 and `pending`.
+    """
+    headers = {"X-Job-Id": job.job_id}
+    if job.status == "completed":
+        touch_job(job)
+        # Sent by Starlette from a worker thread, so the read never blocks the event loop
+        return FileResponse(os.path.join(job.output_dir, job.output_filename), media_type=job.media_type, headers=headers)
+    if job.status == "failed":
+        raise HTTPException(status_code=500, detail=f"Generation failed: {job.error}", headers=headers)
+    if job.status in ("cancelled", "expired"):
+        raise HTTPException(status_code=409, detail=f"Job was {job.status}.", headers=headers)
+    return JSONResponse(status_code=202, content=pending, headers=headers)
+
+def existing_job_response(job: JobRecord, mode: str):
+    response = reused_job_response(job)
+    return sync_response(job, response) if mode == "sync" else response
+
+async def run_sync_job(job_id: str, request: ContentRequest, output_dir: str) -> None:
+    """Run a sync job under the API's lease on its queue item, then free its slot and the item."""
+    # Imported here so the API only loads the text generators once it runs a sync job
+    from .jobs.runner import process_content_generation
+
+    try:
+        stopped_because = await run_cancellable(
+            job_id, job_store, process_content_generation(job_id, request, output_dir),
+            lease=Lease(job_queue, job_id, api_owner)
+        )
+        if stopped_because == "cancelled":
+            await asyncio.to_thread(discard_output, job_store, job_store.get(job_id), PUBLIC_VIDEO_DIR)
+        job_queue.complete(job_id, owner=api_owner)
+    finally:
+        sync_slots.release()
+
+async def run_inline(job_id: str, request: ContentRequest, output_dir: str) -> bool:
+    """
+    Run a job in the API process, for /generate?mode=sync. Returns False when it
+    does not finish within SYNC_TIMEOUT_SECONDS; it then carries on in the
+    background (a worker takes over if this process stops).
+    """
+    await sync_slots.acquire()  # Released by run_sync_job
+    job_queue.enqueue_claimed(job_id, JOB_CLASSES[request.content_type], request.model_dump_json(),
+                              owner=api_owner, priority=request.priority)
+    task = asyncio.create_task(run_sync_job(job_id, request, output_dir))
+    sync_tasks.add(task)
+    task.add_done_callback(sync_tasks.discard)
+    try:
+        # Shielded, so neither the timeout nor a client disconnect stops the job
+        await asyncio.wait_for(asyncio.shield(task), timeout=SYNC_TIMEOUT_SECONDS)
+    except asyncio.TimeoutError:
+        return False
+    return True
+
 @app.post("/generate")
-async def generate_content_endpoint(request: ContentRequest, background_tasks: BackgroundTasks):
+async def generate_content_endpoint(
+    request: ContentRequest,
+    idempotency_key: Optional[str] = Header(default=None),
+    force: bool = Query(default=False, description="Always start a new job, even if an identical request exists"),
+    mode: str = Query(default="async", pattern="^(async|sync)$",
+                      description="sync: run a text job now and return its content (202 + job_id if it takes too long)")
+):
+    if mode == "sync" and request.content_type not in SYNC_CONTENT_TYPES:
+        raise HTTPException(status_code=400, detail=f"mode=sync is only available for {', '.join(SYNC_CONTENT_TYPES)}.")
+    fingerprint = request_fingerprint(request)
+
+    # A retried request with the same Idempotency-Key gets the job it created the first time
+    if idempotency_key:
+        existing = job_store.find_by_idempotency_key(idempotency_key)
+        key_cutoff = (datetime.now() - timedelta(hours=IDEMPOTENCY_KEY_TTL_HOURS)).isoformat()
+        if existing is not None and existing.created_at < key_cutoff:
+            # Expired: release the key so it can name a new job
+            job_store.update(existing.job_id, idempotency_key=None)
+            existing = None
+        if existing is not None:
+            if existing.fingerprint != fingerprint:
+                raise HTTPException(status_code=422, detail="Idempotency-Key was already used with a different request.")
+            return existing_job_response(existing, mode)
+
+    # Identical requests attach to the running job or reuse a fresh result (cache=bypass asks for a new one)
+    if not force and request.cache != "bypass":
+        reusable = find_reusable_job(fingerprint)
+        if reusable is not None:
+            return existing_job_response(reusable, mode)
+
+    require_providers([request.content_type])
+    # Sync jobs run here unless every slot is taken, in which case they are queued like any other
+    inline = mode == "sync" and not sync_slots.locked()
+    if not inline:
+        admit_or_429({request.content_type: 1})
+
     # Generate a unique job ID
     job_id = str(uuid.uuid4())
+    job_class = JOB_CLASSES[request.content_type]
     
     # Create a unique output directory for this job
     output_dir = os.path.join(OUTPUT_DIR, job_id)
-    os.makedirs(output_dir, exist_ok=True)
     
     # Store job information
-    active_jobs[job_id] = {
-        "status": "processing",
-        "created_at": datetime.now().isoformat(),
-        "output_dir": output_dir,
-        "content_type": request.content_type,
-        "video_prompt": request.video_prompt
-    }
-    
-    # Start the generation process in the background
-    background_tasks.add_task(
-        process_content_generation,
-        job_id,
-        request,
-        output_dir
-    )
+    try:
+        now = datetime.now().isoformat()
+        job_store.create(JobRecord(
+            job_id=job_id,
+            status="processing" if inline else "queued",
+            created_at=now,
+            started_at=now if inline else None,
+            output_dir=output_dir,
+            content_type=request.content_type,
+            job_class=job_class,
+            priority=request.priority,
+            video_prompt=request.video_prompt,
+            request=request.model_dump(),
+            fingerprint=fingerprint,
+            idempotency_key=idempotency_key,
+            mode="sync" if inline else None
+        ))
+    except DuplicateJobError:
+        # Another API worker created a job with this key in the meantime
+        return existing_job_response(job_store.find_by_idempotency_key(idempotency_key), mode)
+    os.makedirs(output_dir, exist_ok=True)
+
+    if inline:
+        await run_inline(job_id, request, output_dir)
+        return sync_response(job_store.get(job_id), {
+            "job_id": job_id,
+            "status": "processing",
+            "message": f"{request.content_type.capitalize()} generation did not finish within "
+                       f"{SYNC_TIMEOUT_SECONDS:g}s and continues in the background"
+        })
+
+    # Hand the job to the worker pool for its class
+    job_queue.enqueue(job_id, job_class, request.model_dump_json(), priority=request.priority)
     
-    return {
+    response = {
         "job_id": job_id,
-        "status": "processing",
+        "status": "queued",
         "message": f"{request.content_type.capitalize()} generation started"
     }
+    if mode == "sync":
+        # Every sync slot was busy
+        return JSONResponse(status_code=202, content=response, headers={"X-Job-Id": job_id})
+    return response
+
+@app.post("/generate/batch")
+async def generate_batch_endpoint(batch: BatchRequest):
+    """
+    Submit many requests at once. The jobs are created and enqueued in a single
+    transaction and queued back to back, so a worker runs them together and
+    loads each shared prompt template once. Job directories are created by the
+    worker when a job starts.
+    """
+    if len(batch.requests) > BATCH_MAX_SIZE:
+        raise HTTPException(status_code=413, detail=f"A batch can contain at most {BATCH_MAX_SIZE} requests.")
+
+    requested = {}
+    for request in batch.requests:
+        requested[request.content_type] = requested.get(request.content_type, 0) + 1
+    require_providers(requested)
+    admit_or_429(requested)
+
+    batch_id = str(uuid.uuid4())
+    created_at = datetime.now().isoformat()
+    records, items = [], []
+    for index, request in enumerate(batch.requests):
+        job_id = str(uuid.uuid4())
+        job_class = JOB_CLASSES[request.content_type]
+        priority = request.priority if batch.priority is None else batch.priority
+        records.append(JobRecord(
+            job_id=job_id,
+            status="queued",
+            created_at=created_at,
+            output_dir=os.path.join(OUTPUT_DIR, job_id),
+            content_type=request.content_type,
+            job_class=job_class,
+            priority=priority,
+            video_prompt=request.video_prompt,
+            request=request.model_dump(),
+            fingerprint=request_fingerprint(request),
+            batch_id=batch_id,
+            batch_index=index
+        ))
+        items.append(QueueItem(job_id=job_id, job_class=job_class, priority=priority, payload=request.model_dump_json()))
+
+    job_store.create_many(records)
+    job_queue.enqueue_many(items)
+
+    return {
+        "batch_id": batch_id,
+        "status": "queued",
+        "job_ids": [record.job_id for record in records],
+        "message": f"Batch of {len(records)} jobs queued"
+    }
+
+def get_batch_or_404(batch_id: str) -> List[JobRecord]:
+    jobs = job_store.jobs_in_batch(batch_id)
+    if not jobs:
+        raise HTTPException(status_code=404, detail="Batch not found")
+    return jobs
+
+@app.get("/batches/{batch_id}")
+async def get_batch_status(batch_id: str):
+    """Aggregate status of a batch, plus the status of each of its jobs."""
+    jobs = get_batch_or_404(batch_id)
+    counts = {}
+    for job in jobs:
+        counts[job.status] = counts.get(job.status, 0) + 1
+    finished = sum(counts.get(status, 0) for status in TERMINAL_STATUSES)
+    return {
+        "batch_id": batch_id,
+        "total": len(jobs),
+        "counts": counts,
+        "finished": finished,
+        "done": finished == len(jobs),
+        "jobs": [
+            {"job_id": job.job_id, "index": job.batch_index, "content_type": job.content_type, "status": job.status}
+            for job in jobs
+        ]
+    }
+
+def batch_result_line(job: JobRecord) -> str:
+    result = {
+        "job_id": job.job_id,
+        "index": job.batch_index,
+        "content_type": job.content_type,
+        "status": job.status,
+    }
+    if job.status == "completed":
+        result["download_url"] = f"/download/{job.job_id}"
+        result["media_type"] = job.media_type
+    if job.error:
+        result["error"] = job.error
+    return json.dumps(result) + "\n"
+
+@app.get("/batches/{batch_id}/results")
+async def stream_batch_results(batch_id: str):
+    """
+    NDJSON feed with one line per job as it finishes. Jobs that already
+    finished come first; the stream ends when every job in the batch has.
+    """
+    jobs = get_batch_or_404(batch_id)
+
+    async def result_stream():
+        pending = {job.job_id for job in jobs}
+        # Subscribe before reading the snapshot so nothing finishing in between is missed
+        subscription = event_broker.subscribe(pending)
+        try:
+            for job in job_store.jobs_in_batch(batch_id):
+                if job.status in TERMINAL_STATUSES:
+                    pending.discard(job.job_id)
+                    yield batch_result_line(job)
+            while pending:
+                event = await subscription.get()
+                if event is None:
+                    # Fell behind or the server is shutting down; the client can re-request
+                    return
+                if is_terminal_event(event) and event.job_id in pending:
+                    pending.discard(event.job_id)
+                    yield batch_result_line(job_store.get(event.job_id))
+        finally:
+            subscription.close()
+
+    return StreamingResponse(result_stream(), media_type="application/x-ndjson")
+
+@app.get("/retention")
+async def get_retention_status():
+    """Retention settings, current disk usage and the last run's report."""
+    report = retention_manager.last_report
+    return {
+        "ttl_hours": RETENTION_TTL_HOURS,
+        "quota_bytes": OUTPUT_QUOTA_BYTES,
+        "usage_bytes": await asyncio.to_thread(retention_manager.disk_usage),
+        "total_reclaimed_bytes": retention_manager.total_reclaimed_bytes,
+        "last_run": asdict(report) if report else None
+    }
+
+@app.post("/retention/run")
+async def run_retention():
+    """Apply the retention policy now and return what was reclaimed."""
+    report = await asyncio.to_thread(retention_manager.run_once)
+    return asdict(report)
+
+@app.get("/llm-cache")
+async def get_llm_cache_status():
+    """LLM response cache settings, size, and hits and misses across the API and the workers."""
+    cache = get_llm_cache()
+    if cache is None:
+        return {"enabled": False}
+    return {
+        "enabled": True,
+        "mode": LLM_CACHE_MODE,
+        "ttl_hours": LLM_CACHE_TTL_HOURS,
+        "max_bytes": cache.max_bytes,
+        **await asyncio.to_thread(cache.stats)
+    }
+
+@app.get("/queue")
+async def get_queue_status():
+    """Report queued and running jobs and current throughput per job class."""
+    depth = job_queue.depth()
+    throughput = admission.stats()
+    return {
+        job_class: {
+            "workers": WORKER_CONCURRENCY.get(job_class, 0),
+            "queued": depth.get(job_class, {}).get("queued", 0),
+            "running": depth.get(job_class, {}).get("running", 0),
+            "fast_lane": job_class in FAST_LANE_CLASSES,
+            **throughput.get(job_class, {})
+        }
+        for job_class in sorted(set(JOB_CLASSES.values()) | set(depth))
+    }
+
+@app.get("/metrics")
+async def get_metrics():
+    """Prometheus text exposition of the API's and the workers' metrics."""
+    # Gauges are recomputed on every scrape, zero-filled so emptied queues report 0
+    depth = job_queue.depth()
+    for job_class in set(JOB_CLASSES.values()) | set(depth):
+        for state in ("queued", "running"):
+            QUEUE_JOBS.set(depth.get(job_class, {}).get(state, 0), job_class=job_class, state=state)
+    for status in ACTIVE_STATUSES:
+        counts = job_store.count_jobs(status)
+        for content_type in set(JOB_CLASSES) | set(counts):
+            ACTIVE_JOBS.set(counts.get(content_type, 0), content_type=content_type, status=status)
+    snapshot = await asyncio.to_thread(collect, METRICS_DIR)
+    return Response(render(snapshot), media_type=CONTENT_TYPE_LATEST)
+
+def get_job_or_404(job_id: str, detail: str = "Job not found") -> JobRecord:
+    job_info = job_store.get(job_id)
+    if job_info is None:
+        raise HTTPException(status_code=404, detail=detail)
+    return job_info
+
+def require_completed(job_info: JobRecord, detail: str = "Content generation not completed") -> None:
+    if job_info.status == "expired":
+        raise HTTPException(status_code=410, detail="Job output was removed by the retention policy.")
+    if job_info.status != "completed":
+        raise HTTPException(status_code=400, detail=detail)
+
+def touch_job(job_info: JobRecord) -> None:
+    """Record an access to a job's output for LRU eviction, at most once a minute."""
+    now = datetime.now()
+    if job_info.last_accessed_at and job_info.last_accessed_at > (now - timedelta(minutes=1)).isoformat():
+        return
+    job_store.transition(job_info.job_id, ["completed"], last_accessed_at=now.isoformat())
 
 @app.get("/status/{job_id}")
 async def get_job_status(job_id: str):
-    if job_id not in active_jobs:
-        raise HTTPException(status_code=404, detail="Job not found")
-    
-    return active_jobs[job_id]
+    return get_job_or_404(job_id).model_dump(exclude_none=True, exclude={"request"})
+
+@app.post("/jobs/{job_id}/resume")
+async def resume_job(job_id: str):
+    """Re-queue a failed job. Stages with a valid checkpoint are skipped."""
+    job_info = get_job_or_404(job_id)
+    if job_info.status != "failed":
+        raise HTTPException(status_code=409, detail=f"Only failed jobs can be resumed (job is {job_info.status}).")
+    if job_info.request is None:
+        raise HTTPException(status_code=409, detail="Job has no stored request to resume from.")
+
+    request = ContentRequest.model_validate(job_info.request)
+    admit_or_429({request.content_type: 1})
+    # Conditional, so a concurrent resume or the retention manager expiring the job wins cleanly
+    if job_store.transition(job_id, ["failed"], status="queued", error=None, failed_at=None) is None:
+        job_info = get_job_or_404(job_id)
+        raise HTTPException(status_code=409, detail=f"Only failed jobs can be resumed (job is {job_info.status}).")
+    # The failed run's worker may not have released its queue item yet; enqueue replaces it
+    job_queue.enqueue(job_id, job_info.job_class or JOB_CLASSES[request.content_type],
+                      request.model_dump_json(), priority=job_info.priority)
+
+    return {
+        "job_id": job_id,
+        "status": "queued",
+        "completed_stages": completed_stages(job_info.output_dir),
+        "message": f"{job_info.content_type.capitalize()} generation resumed"
+    }
+
+@app.delete("/jobs/{job_id}")
+async def cancel_job(job_id: str):
+    """
+    Cancel a queued or running job and delete its partial output. A running
+    job's worker notices within WORKER_POLL_INTERVAL and aborts its pending
+    provider calls and render.
+    """
+    job_info = get_job_or_404(job_id)
+    if job_info.status != "cancelled":
+        cancelled = job_store.transition(job_id, ACTIVE_STATUSES, status="cancelled",
+                                         cancelled_at=datetime.now().isoformat())
+        if cancelled is None:
+            job_info = get_job_or_404(job_id)
+            raise HTTPException(status_code=409,
+                                detail=f"Only queued or processing jobs can be cancelled (job is {job_info.status}).")
+        if job_queue.remove(job_id):
+            # Never claimed, so no worker will touch its files; a running job's worker cleans up itself
+            await asyncio.to_thread(discard_output, job_store, cancelled, PUBLIC_VIDEO_DIR)
+        job_info = cancelled
+
+    return {
+        "job_id": job_id,
+        "status": "cancelled",
+        "cancelled_at": job_info.cancelled_at,
+        "message": f"{job_info.content_type.capitalize()} generation cancelled"
+    }
+
+def format_sse(event) -> str:
+    """Serialize a JobEvent as a Server-Sent Events message."""
+    return f"id: {event.seq}\nevent: {event.event}\ndata: {json.dumps({'job_id': event.job_id, **event.data})}\n\n"
+
+@app.get("/jobs/{job_id}/events")
+async def stream_job_events(job_id: str, last_event_id: Optional[str] = Header(default=None)):
+    """
+    Server-Sent Events stream of a job's status transitions and stage progress.
+    The stream ends after the job completes or fails. Reconnecting clients send
+    Last-Event-ID and only receive the events they missed.
+    """
+    get_job_or_404(job_id)
+    after_seq = int(last_event_id) if last_event_id and last_event_id.isdigit() else 0
+
+    async def event_stream():
+        # Subscribe before replaying so nothing written in between is missed
+        subscription = event_broker.subscribe([job_id])
+        last_seq = after_seq
+        try:
+            for event in job_store.events_since(after_seq, job_id=job_id):
+                yield format_sse(event)
+                last_seq = event.seq
+                if is_terminal_event(event):
+                    return
+
+            # Events may have been pruned for old jobs; fall back to the record itself
+            job_info = job_store.get(job_id)
+            if job_info.status in TERMINAL_STATUSES:
+                yield f"event: status\ndata: {json.dumps({'job_id': job_id, 'status': job_info.status})}\n\n"
+                return
+
+            while True:
+                try:
+                    event = await asyncio.wait_for(subscription.get(), timeout=15)
+                except asyncio.TimeoutError:
+                    yield ": keep-alive\n\n"
+                    continue
+                if event is None:
+                    return
+                if event.seq <= last_seq:
+                    continue
+                yield format_sse(event)
+                last_seq = event.seq
+                if is_terminal_event(event):
+                    return
+        finally:
+            subscription.close()
+
+    return StreamingResponse(
+        event_stream(),
+        media_type="text/event-stream",
+        headers={"Cache-Control": "no-cache", "X-Accel-Buffering": "no"}
+    )
+
+def read_from(path: str, offset: int) -> bytes:
+    """Bytes appended to `path` after `offset` (nothing if the file does not exist yet)."""
+    try:
+        with open(path, "rb") as f:
+            f.seek(offset)
+            return f.read()
+    except FileNotFoundError:
+        return b""
+
+@app.get("/jobs/{job_id}/stream")
+async def stream_job_text(job_id: str, last_event_id: Optional[str] = Header(default=None)):
+    """
+    Server-Sent Events relay of the text a job is generating (articles, book
+    chapters and podcast scripts). Each "text" event carries the text written
+    since the previous one, as the worker writes it to the job's output; a
+    final "status" event ends the stream. Event ids are byte offsets, so a
+    reconnecting client sends Last-Event-ID and continues where it stopped.
+    """
+    job_info = get_job_or_404(job_id)
+    stream_filename = get_content_type(job_info.content_type).stream_filename
+    if stream_filename is None:
+        raise HTTPException(status_code=400, detail=f"{job_info.content_type} jobs do not stream text.")
+    path = os.path.join(job_info.output_dir, stream_filename)
+    offset = int(last_event_id) if last_event_id and last_event_id.isdigit() else 0
+
+    async def text_stream():
+        subscription = event_broker.subscribe([job_id])
+        # A chunk can end inside a multi-byte character; the decoder holds those bytes back
+        decoder = codecs.getincrementaldecoder("utf-8")(errors="replace")
+        position = offset
+        last_sent = time.monotonic()
+        try:
+            finished = job_store.get(job_id).status in TERMINAL_STATUSES
+            while True:
+                data = read_from(path, position)
+                if data:
+                    position += len(data)
+                    text = decoder.decode(data)
+                    if text:
+                        event_id = position - len(decoder.getstate()[0])
+                        yield f"id: {event_id}\nevent: text\ndata: {json.dumps({'job_id': job_id, 'text': text})}\n\n"
+                        last_sent = time.monotonic()
+                if finished:
+                    job_info = job_store.get(job_id)
+                    status = {'job_id': job_id, 'status': job_info.status}
+                    if job_info.error:
+                        status['error'] = job_info.error
+                    yield f"event: status\ndata: {json.dumps(status)}\n\n"
+                    return
+                if time.monotonic() - last_sent > 15:
+                    yield ": keep-alive\n\n"
+                    last_sent = time.monotonic()
+                try:
+                    event = await asyncio.wait_for(subscription.get(), timeout=TEXT_STREAM_POLL_INTERVAL)
+                except asyncio.TimeoutError:
+                    continue
+                if event is None:
+                    return
+                # Read once more after the job finished: the last text was written before it
+                finished = is_terminal_event(event)
+        finally:
+            subscription.close()
+
+    return StreamingResponse(
+        text_stream(),
+        media_type="text/event-stream",
+        headers={"Cache-Control": "no-cache", "X-Accel-Buffering": "no"}
+    )
+
+def websocket_command_error(message) -> Optional[str]:
+    """Why a /ws/jobs client message is invalid, or None if it is a valid command."""
+    def is_job_ids(value):
+        return isinstance(value, list) and all(isinstance(job_id, str) for job_id in value)
+
+    if not isinstance(message, dict):
+        return "Messages must be JSON objects."
+    subscribe, unsubscribe = message.get("subscribe"), message.get("unsubscribe")
+    if subscribe is not None and subscribe != "*" and not is_job_ids(subscribe):
+        return '"subscribe" must be "*" or a list of job ids.'
+    if unsubscribe is not None and not is_job_ids(unsubscribe):
+        return '"unsubscribe" must be a list of job ids.'
+    return None
+
+@app.websocket("/ws/jobs")
+async def jobs_websocket(websocket: WebSocket):
+    """
+    Multiplexed job event stream. Clients send {"subscribe": [job_ids]} (or
+    {"subscribe": "*"} for every job) and {"unsubscribe": [job_ids]}; the
+    server pushes each matching event as JSON.
+    """
+    await websocket.accept()
+    subscription = event_broker.subscribe()
+
+    async def receive_commands():
+        while True:
+            try:
+                message = await websocket.receive_json()
+            except ValueError:
+                message = None
+            error = websocket_command_error(message)
+            if error:
+                # Reported, not fatal: the connection and its subscriptions stay as they were
+                await websocket.send_json({"event": "error", "data": {"detail": error}})
+                continue
+            subscribe, unsubscribe = message.get("subscribe"), message.get("unsubscribe")
+            if subscribe == "*":
+                subscription.subscribe_all()
+            elif subscribe:
+                subscription.add(subscribe)
+                # Send the current state so clients do not need a separate /status call
+                for job_id in subscribe:
+                    job_info = job_store.get(job_id)
+                    if job_info is not None:
+                        await websocket.send_json({"job_id": job_id, "event": "status", "data": {"status": job_info.status}})
+            if unsubscribe:
+                subscription.remove(unsubscribe)
+
+    async def send_events():
+        while True:
+            event = await subscription.get()
+            if event is None:
+                return
+            await websocket.send_json(event.model_dump())
+
+    tasks = [asyncio.create_task(receive_commands()), asyncio.create_task(send_events())]
+    try:
+        done, _ = await asyncio.wait(tasks, return_when=asyncio.FIRST_COMPLETED)
+        for task in done:
+            error = task.exception()
+            if error is not None and not isinstance(error, WebSocketDisconnect):
+                print(f"WebSocket job stream closed with error: {error}")
+    finally:
+        for task in tasks:
+            task.cancel()
+        subscription.close()
 
 @app.get("/download/{job_id}")
 async def download_content(job_id: str):
-    if job_id not in active_jobs:
-        raise HTTPException(status_code=404, detail="Job not found")
-    
-    job_info = active_jobs[job_id]
-    if job_info["status"] != "completed":
-        raise HTTPException(status_code=400, detail="Content generation not completed")
+    job_info = get_job_or_404(job_id)
+    require_completed(job_info)
 
-    output_filename = job_info.get("output_filename")
-    media_type = job_info.get("media_type")
-    content_type = job_info["content_type"] # Original content type for filename construction
+    output_filename = job_info.output_filename
+    media_type = job_info.media_type
+    content_type = job_info.content_type # Original content type for filename construction
 
     if not output_filename or not media_type:
         # Fallback for older jobs or if these keys weren't stored (should not happen for new jobs)
@@ -183,10 +863,11 @@ async def download_content(job_id: str):
         else:
             raise HTTPException(status_code=500, detail="Job output information is incomplete.")
 
-    file_path = os.path.join(job_info["output_dir"], output_filename)
+    file_path = os.path.join(job_info.output_dir, output_filename)
 
     if not os.path.exists(file_path):
         raise HTTPException(status_code=404, detail=f"{output_filename} not found in job output.")
+    touch_job(job_info)
 
     # Construct a user-friendly download filename
     base_filename, file_ext = os.path.splitext(output_filename)
@@ -199,83 +880,98 @@ async def download_content(job_id: str):
 
     download_filename = f"{content_type}_{job_id}{file_ext}"
 
-    return FileResponse(
+    # Supports Range requests, so interrupted downloads can resume
+    return RangeFileResponse(
         file_path,
         media_type=media_type,
         filename=download_filename
     )
 
+@app.get("/download/{job_id}/bundle")
+async def download_bundle(
+    job_id: str,
+    artifacts: Optional[str] = Query(default=None, description="Comma-separated kinds to include: text, images, audio, video")
+):
+    """
+    Every artifact a job produced (script, images, audio, the final output) as
+    one ZIP, streamed as it is built. Failed jobs can be bundled too, to inspect
+    the artifacts that were generated before the failure.
+    """
+    job_info = get_job_or_404(job_id)
+    if job_info.status == "expired":
+        raise HTTPException(status_code=410, detail="Job output was removed by the retention policy.")
+    if job_info.status not in ("completed", "failed"):
+        raise HTTPException(status_code=400, detail="Content generation not finished")
+
+    kinds = [kind.strip() for kind in artifacts.split(",") if kind.strip()] if artifacts else None
+    try:
+        files = await asyncio.to_thread(artifact_files, job_info.output_dir, kinds, (CHECKPOINT_DIRNAME,))
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=str(e))
+    if not files:
+        raise HTTPException(status_code=404, detail="No matching artifacts in job output.")
+    touch_job(job_info)
+
+    # A plain generator: Starlette iterates it in a thread pool, so the file reads never block the event loop
+    return StreamingResponse(
+        stream_zip(files),
+        media_type="application/zip",
+        headers={"Content-Disposition": f'attachment; filename="{job_info.content_type}_{job_id}.zip"'}
+    )
+
 @app.get("/videos", response_model=List[VideoInfo])
 async def list_videos(
+    response: Response,
     content_type: Optional[str] = None,
     days: int = Query(7, ge=1, le=30),
-    limit: int = Query(10, ge=1, le=100)
+    limit: int = Query(10, ge=1, le=100),
+    cursor: Optional[str] = Query(None, description="X-Next-Cursor header of the previous page")
 ):
-    """List available videos with optional filtering."""
-    videos = []
-    cutoff_date = datetime.now() - timedelta(days=days)
-    
-    for job_id, job_info in active_jobs.items():
-        if job_info["status"] != "completed":
-            continue
-            
-        if content_type and job_info["content_type"] != content_type:
-            continue
-            
-        created_at = datetime.fromisoformat(job_info["created_at"])
-        if created_at < cutoff_date:
-            continue
-            
-        video_path = os.path.join(job_info["output_dir"], "content_video.mp4")
-        if not os.path.exists(video_path):
-            continue
-            
-        # Create public URL for the video
-        public_path = f"static/videos/{job_id}.mp4"
-        if not os.path.exists(public_path):
-            shutil.copy2(video_path, public_path)
-            
-        videos.append(VideoInfo(
-            job_id=job_id,
-            content_type=job_info["content_type"],
-            created_at=job_info["created_at"],
-            video_url=f"/static/videos/{job_id}.mp4"
-        ))
-    
-    return sorted(videos, key=lambda x: x.created_at, reverse=True)[:limit]
+    """
+    List published videos, newest first, with optional filtering.
+
+    Answered from the video catalog, which renders are added to when they
+    finish. When more videos may follow, the X-Next-Cursor response header
+    holds the cursor for the next page.
+    """
+    try:
+        after = decode_cursor(cursor) if cursor else None
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=str(e))
+
+    videos = job_store.list_videos(
+        content_types=[content_type] if content_type else None,
+        since=(datetime.now() - timedelta(days=days)).isoformat(),
+        after=after,
+        limit=limit
+    )
+    if len(videos) == limit:
+        response.headers["X-Next-Cursor"] = encode_cursor(videos[-1])
+    return videos
 
 @app.get("/video/{job_id}/stream")
 async def stream_video(job_id: str):
     """Stream video content."""
-    if job_id not in active_jobs:
-        raise HTTPException(status_code=404, detail="Video not found")
+    job_info = get_job_or_404(job_id, detail="Video not found")
+    require_completed(job_info, detail="Video generation not completed")
     
-    job_info = active_jobs[job_id]
-    if job_info["status"] != "completed":
-        raise HTTPException(status_code=400, detail="Video generation not completed")
-    
-    video_path = os.path.join(job_info["output_dir"], "content_video.mp4")
+    video_path = os.path.join(job_info.output_dir, "content_video.mp4")
     if not os.path.exists(video_path):
         raise HTTPException(status_code=404, detail="Video file not found")
+    touch_job(job_info)
     
-    return StreamingResponse(
-        open(video_path, "rb"),
+    # Handles Range/If-Range (206, multipart ranges, 416) so players can seek
+    return RangeFileResponse(
+        video_path,
         media_type="video/mp4",
-        headers={
-            "Accept-Ranges": "bytes",
-            "Content-Disposition": f'attachment; filename="{job_info["content_type"]}_{job_id}.mp4"'
-        }
+        filename=f"{job_info.content_type}_{job_id}.mp4"
     )
 
 @app.get("/video/{job_id}/embed")
 async def get_video_embed(job_id: str):
     """Get HTML embed code for the video."""
-    if job_id not in active_jobs:
-        raise HTTPException(status_code=404, detail="Video not found")
-    
-    job_info = active_jobs[job_id]
-    if job_info["status"] != "completed":
-        raise HTTPException(status_code=400, detail="Video generation not completed")
+    job_info = get_job_or_404(job_id, detail="Video not found")
+    require_completed(job_info, detail="Video generation not completed")
     
     video_url = f"/static/videos/{job_id}.mp4"
     
@@ -283,7 +979,7 @@ async def get_video_embed(job_id: str):
     <!DOCTYPE html>
     <html>
     <head>
-        <title>{job_info['content_type'].capitalize()} Video</title>
+        <title>{job_info.content_type.capitalize()} Video</title>
         <style>
             body {{ margin: 0; padding: 20px; background: #f0f0f0; }}
             .video-container {{ max-width: 800px; margin: 0 auto; }}
@@ -306,14 +1002,10 @@ async def get_video_embed(job_id: str):
 @app.get("/video/{job_id}/info")
 async def get_video_info(job_id: str):
     """Get detailed information about a video."""
-    if job_id not in active_jobs:
-        raise HTTPException(status_code=404, detail="Video not found")
-    
-    job_info = active_jobs[job_id]
-    if job_info["status"] != "completed":
-        raise HTTPException(status_code=400, detail="Video generation not completed")
+    job_info = get_job_or_404(job_id, detail="Video not found")
+    require_completed(job_info, detail="Video generation not completed")
     
-    video_path = os.path.join(job_info["output_dir"], "content_video.mp4")
+    video_path = os.path.join(job_info.output_dir, "content_video.mp4")
     if not os.path.exists(video_path):
         raise HTTPException(status_code=404, detail="Video file not found")
     
@@ -322,9 +1014,9 @@ async def get_video_info(job_id: str):
     
     return {
         "job_id": job_id,
-        "content_type": job_info["content_type"],
-        "created_at": job_info["created_at"],
-        "completed_at": job_info["completed_at"],
+        "content_type": job_info.content_type,
+        "created_at": job_info.created_at,
+        "completed_at": job_info.completed_at,
         "file_size": file_size,
         "download_url": f"/download/{job_id}",
         "stream_url": f"/video/{job_id}/stream",
@@ -332,221 +1024,21 @@ async def get_video_info(job_id: str):
         "static_url": f"/static/videos/{job_id}.mp4"
     }
 
-async def process_content_generation(job_id: str, request: ContentRequest, output_dir: str):
-    try:
-        output_filename = None
-        media_type = None
-        text_content_only = False # Flag to skip media generation for text-only types
-
-        if request.content_type == "story" or request.content_type == "educational":
-            if request.content_type == "story":
-                content = await generate_story(request.topic)
-            else: # educational
-                content = await generate_educational_content(
-                    request.topic,
-                    request.educational_style,
-                    request.difficulty_level
-                )
-            output_filename = "content.txt"
-            media_type = "text/plain" # For the script itself
-            with open(os.path.join(output_dir, output_filename), 'w') as f:
-                f.write(content)
-
-            # These types will proceed to media generation
-
-        elif request.content_type == "podcast":
-            text_content_only = True # Podcast audio is handled, but no video/images unless specified
-            if not request.podcast_options:
-                raise ValueError("Podcast options not provided for podcast content type.")
-
-            if request.podcast_options.podcast_type == "dialogue":
-                # Generate dialogue content if not provided
-                if not request.podcast_options.dialogues:
-                    if not request.topic:
-                        raise HTTPException(status_code=400, detail="Topic is required for automatic dialogue generation")
-                    
-                    # Generate dialogue content
-                    dialogue_list = await generate_dialogue_content(
-                        topic=request.topic,
-                        num_exchanges=request.podcast_options.num_exchanges
-                    )
-                else:
-                    # Use provided dialogues
-                    dialogue_list = [(d.speaker, d.text) for d in request.podcast_options.dialogues]
-                
-                # Generate dialogue audio
-                output_filename = "podcast_audio.mp3"
-                output_path = os.path.join(output_dir, output_filename)
-                await generate_dialogue(
-                    dialogues=dialogue_list,
-                    output_path=output_path,
-                    voice1=request.podcast_options.voice1,
-                    voice2=request.podcast_options.voice2
-                )
-                
-                # Update job info
-                active_jobs[job_id].update({
-                    "status": "completed",
-                    "output_filename": output_filename,
-                    "media_type": "audio/mpeg"
-                })
-            else:
-                # Handle other podcast types as before
-                if request.podcast_options.podcast_type == "custom_text":
-                    text = request.podcast_options.custom_text
-                elif request.podcast_options.podcast_type == "topic_based":
-                    text = await generate_podcast_from_topic(request.topic)
-                else:  # free_generation
-                    text = await generate_free_podcast()
-                
-                # Generate voice over
-                output_filename = "podcast_audio.mp3"
-                output_path = os.path.join(output_dir, output_filename)
-                await generate_voice_over(
-                    text=text,
-                    output_path=output_path,
-                    voice_name=request.voice_name
-                )
-                
-                # Update job info
-                active_jobs[job_id].update({
-                    "status": "completed",
-                    "output_filename": output_filename,
-                    "media_type": "audio/mpeg"
-                })
-
-        elif request.content_type == "article":
-            text_content_only = True
-            if not request.article_options:
-                # Providing default empty options if None, or raise error if it must be provided
-                request.article_options = ArticleOptions() # Or raise ValueError
-
-            generated_text = await generate_article(
-                topic=request.topic,
-                desired_length_words=request.desired_length_words or 0,
-                style_tone=request.style_tone,
-                custom_instructions=request.article_options.custom_instructions
-            )
-            if generated_text.startswith("Error:"):
-                raise ValueError(f"Article generation failed: {generated_text}")
-
-            output_filename = "article.txt"
-            media_type = "text/plain"
-            with open(os.path.join(output_dir, output_filename), 'w') as f:
-                f.write(generated_text)
-            active_jobs[job_id]["output_filename"] = output_filename
-            active_jobs[job_id]["media_type"] = media_type
-
-        elif request.content_type == "tweet_thread":
-            text_content_only = True
-            if not request.tweet_options:
-                request.tweet_options = TweetOptions() # Or raise ValueError
-
-            tweet_list = await generate_tweet_thread(
-                topic=request.topic,
-                num_tweets=request.tweet_options.num_tweets,
-                style_tone=request.style_tone,
-                call_to_action=request.tweet_options.call_to_action,
-                custom_instructions=None # Assuming not yet added to TweetOptions in this example
-            )
-            if isinstance(tweet_list, list) and tweet_list and tweet_list[0].startswith("Error:"):
-                 raise ValueError(f"Tweet thread generation failed: {tweet_list[0]}")
-
-            output_filename = "tweet_thread.json"
-            media_type = "application/json"
-            with open(os.path.join(output_dir, output_filename), 'w') as f:
-                json.dump(tweet_list, f, indent=2)
-            active_jobs[job_id]["output_filename"] = output_filename
-            active_jobs[job_id]["media_type"] = media_type
-
-        elif request.content_type == "book_chapter":
-            text_content_only = True
-            if not request.book_chapter_options:
-                request.book_chapter_options = BookChapterOptions() # Or raise ValueError
-
-            generated_text = await generate_book_chapter(
-                plot_summary=request.book_chapter_options.plot_summary,
-                chapter_topic=request.book_chapter_options.chapter_topic or request.topic,
-                previous_chapter_summary=request.book_chapter_options.previous_chapter_summary,
-                characters=request.book_chapter_options.characters,
-                genre=request.book_chapter_options.genre,
-                style_tone=request.style_tone,
-                desired_length_words=request.desired_length_words or 0,
-                custom_instructions=None # Assuming not yet added to BookChapterOptions
-            )
-            if generated_text.startswith("Error:"):
-                raise ValueError(f"Book chapter generation failed: {generated_text}")
-
-            output_filename = "book_chapter.txt"
-            media_type = "text/plain"
-            with open(os.path.join(output_dir, output_filename), 'w') as f:
-                f.write(generated_text)
-            active_jobs[job_id]["output_filename"] = output_filename
-            active_jobs[job_id]["media_type"] = media_type
-
-        else:
-            raise ValueError(f"Unsupported content type: {request.content_type}")
-
-        # --- Media Generation (only for specific types) ---
-        if not text_content_only and (request.content_type == "story" or request.content_type == "educational"):
-            # This block is for story and educational which produce video
-            # Content was already fetched and saved as content.txt for these types
-            script_content_path = os.path.join(output_dir, "content.txt")
-            with open(script_content_path, 'r') as f:
-                content_for_media = f.read()
-
-            image_paths = await generate_images(
-                content_for_media,
-                request.topic,
-                output_dir,
-                content_type=request.content_type
-            )
-
-            voice_over_path = os.path.join(output_dir, "voice_over.mp3")
-            await generate_voice_over(content_for_media, voice_over_path)
-
-            background_music_path = os.path.join(output_dir, "background_music.wav")
-            await generate_background_music(60, background_music_path)
-
-            video_path = os.path.join(output_dir, "content_video.mp4") # Main output for these types
-            await create_video_async(
-                image_paths,
-                voice_over_path,
-                background_music_path,
-                video_path,
-                video_prompt=request.video_prompt,
-                content_type=request.content_type
-            )
-            active_jobs[job_id]["output_filename"] = "content_video.mp4" # For download
-            active_jobs[job_id]["media_type"] = "video/mp4" # For download
-
-        active_jobs[job_id]["status"] = "completed"
-        active_jobs[job_id]["completed_at"] = datetime.now().isoformat()
-        
-    except Exception as e:
-        active_jobs[job_id]["status"] = "failed"
-        active_jobs[job_id]["error"] = str(e)
-        active_jobs[job_id]["failed_at"] = datetime.now().isoformat()
-
 @app.get("/podcast/{job_id}/info")
 async def get_podcast_info(job_id: str):
     """Get detailed information about a podcast job."""
-    if job_id not in active_jobs:
-        raise HTTPException(status_code=404, detail="Job not found")
-
-    job_info = active_jobs[job_id]
-    if job_info["content_type"] != "podcast":
+    job_info = get_job_or_404(job_id)
+    if job_info.content_type != "podcast":
         raise HTTPException(status_code=400, detail="Job is not a podcast type.")
 
-    if job_info["status"] != "completed":
-        raise HTTPException(status_code=400, detail="Podcast generation not completed.")
+    require_completed(job_info, detail="Podcast generation not completed.")
 
     return {
         "job_id": job_id,
-        "content_type": job_info["content_type"],
-        "created_at": job_info["created_at"],
-        "completed_at": job_info["completed_at"],
-        "audio_url": job_info.get("audio_url"),
+        "content_type": job_info.content_type,
+        "created_at": job_info.created_at,
+        "completed_at": job_info.completed_at,
+        "audio_url": job_info.audio_url,
         "download_url": f"/download/{job_id}",
         # "script_url": f"/download/{job_id}?type=script" # Example for future script download
     }
\ No newline at end of file
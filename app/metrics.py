@@ -0,0 +1,392 @@
+"""
+Prometheus-style metrics without a client library.
+
+Counters, gauges and histograms live in a process-local registry; recording
+a sample is a dict lookup and a few additions under a lock. Jobs run in the
+worker process, so the worker writes a snapshot of its registry to
+METRICS_DIR every few seconds and the API merges those snapshots with its own
+registry when /metrics is scraped. Workers on other nodes sharing OUTPUT_DIR
+write to the same directory, one <hostname>-<pid>.json file per process.
+"""
+import asyncio
+import contextvars
+import functools
+import inspect
+import json
+import os
+import socket
+import threading
+import time
+from bisect import bisect_left
+from typing import Callable, Dict, Iterable, List, Optional, Sequence, Tuple, Union
+
+CONTENT_TYPE_LATEST = "text/plain; version=0.0.4; charset=utf-8"
+
+# Provider calls and pipeline stages take from well under a second (a cached
+# template, a short completion) to many minutes (a render)
+DEFAULT_BUCKETS = (0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0, 30.0, 60.0, 120.0, 300.0, 600.0, 1800.0)
+
+# Content type of the job the current task is running, so provider timings can
+# be broken down by content type without threading it through every generator
+current_content_type: contextvars.ContextVar[str] = contextvars.ContextVar("current_content_type", default="none")
+
+
+class _Metric:
+    type_name = ""
+
+    def __init__(self, name: str, documentation: str, labelnames: Sequence[str] = ()):
+        self.name = name
+        self.documentation = documentation
+        self.labelnames = tuple(labelnames)
+        self._series: Dict[Tuple[str, ...], object] = {}
+        self._lock = threading.Lock()
+
+    def _key(self, labels: Dict[str, str]) -> Tuple[str, ...]:
+        if set(labels) != set(self.labelnames):
+            raise ValueError(f"{self.name} expects labels {self.labelnames}, got {tuple(labels)}")
+        return tuple(str(labels[name]) for name in self.labelnames)
+
+    def snapshot(self) -> dict:
+        with self._lock:
+            series = [[list(key), _copy(value)] for key, value in self._series.items()]
+        return {"type": self.type_name, "help": self.documentation,
+                "labelnames": list(self.labelnames), "series": series}
+
+    def clear(self) -> None:
+        with self._lock:
+            self._series.clear()
+
+
+class Counter(_Metric):
+    type_name = "counter"
+
+    def inc(self, amount: float = 1, **labels) -> None:
+        key = self._key(labels)
+        with self._lock:
+            self._series[key] = self._series.get(key, 0) + amount
+
+    def value(self, **labels) -> float:
+        return self._series.get(self._key(labels), 0)
+
+
+class Gauge(_Metric):
+    type_name = "gauge"
+
+    def set(self, value: float, **labels) -> None:
+        key = self._key(labels)
+        with self._lock:
+            self._series[key] = value
+
+    def value(self, **labels) -> float:
+        return self._series.get(self._key(labels), 0)
+
+
+class Histogram(_Metric):
+    type_name = "histogram"
+
+    def __init__(self, name: str, documentation: str, labelnames: Sequence[str] = (),
+                 buckets: Sequence[float] = DEFAULT_BUCKETS):
+        super().__init__(name, documentation, labelnames)
+        self.buckets = tuple(sorted(buckets))
+
+    def observe(self, value: float, **labels) -> None:
+        key = self._key(labels)
+        index = bisect_left(self.buckets, value)  # First bucket whose upper bound is >= value
+        with self._lock:
+            series = self._series.get(key)
+            if series is None:
+                # Per-bucket (not cumulative) counts, the last one for +Inf; then sum and count
+                series = self._series[key] = {"counts": [0] * (len(self.buckets) + 1), "sum": 0.0, "count": 0}
+            series["counts"][index] += 1
+            series["sum"] += value
+            series["count"] += 1
+
+    def snapshot(self) -> dict:
+        snapshot = super().snapshot()
+        snapshot["buckets"] = list(self.buckets)
+        return snapshot
+
+
+def _copy(value):
+    return {"counts": list(value["counts"]), "sum": value["sum"], "count": value["count"]} if isinstance(value, dict) else value
+
+
+class Registry:
+    def __init__(self):
+        self._metrics: Dict[str, _Metric] = {}
+
+    def register(self, metric: _Metric) -> _Metric:
+        self._metrics[metric.name] = metric
+        return metric
+
+    def snapshot(self) -> Dict[str, dict]:
+        return {name: metric.snapshot() for name, metric in self._metrics.items()}
+
+    def clear(self) -> None:
+        for metric in self._metrics.values():
+            metric.clear()
+
+
+REGISTRY = Registry()
+
+STAGE_SECONDS = REGISTRY.register(Histogram(
+    "content_stage_seconds", "Duration of pipeline stages that ran (not restored from a checkpoint).",
+    ("content_type", "stage")))
+PROVIDER_SECONDS = REGISTRY.register(Histogram(
+    "content_provider_request_seconds", "Duration of calls to LLM, image, speech and render providers.",
+    ("provider", "operation", "content_type", "outcome")))
+PROVIDER_FIRST_CHUNK_SECONDS = REGISTRY.register(Histogram(
+    "content_provider_first_chunk_seconds", "Time from a streaming provider call starting to its first chunk.",
+    ("provider", "operation", "content_type")))
+JOB_SECONDS = REGISTRY.register(Histogram(
+    "content_job_seconds", "Time from a job starting to it completing or failing.",
+    ("content_type", "status")))
+OUTPUT_BYTES = REGISTRY.register(Counter(
+    "content_output_bytes_total", "Bytes written to the output directory by completed jobs.",
+    ("content_type",)))
+CACHE_REQUESTS = REGISTRY.register(Counter(
+    "content_cache_requests_total", "Cache lookups, by cache and hit or miss.",
+    ("cache", "result")))
+QUEUE_JOBS = REGISTRY.register(Gauge(
+    "content_queue_jobs", "Items in the job queue, by job class and state (queued or running).",
+    ("job_class", "state")))
+RENDER_JOBS = REGISTRY.register(Gauge(
+    "content_render_jobs", "Video renders submitted to the render process pool, by state (queued or running).",
+    ("state",)))
+ACTIVE_JOBS = REGISTRY.register(Gauge(
+    "content_active_jobs", "Jobs that are queued or processing, by content type.",
+    ("content_type", "status")))
+
+_CACHE_HIT_RATIO = ("content_cache_hit_ratio", "Share of cache lookups that were hits, since the processes started.")
+
+
+def record_cache(cache: str, hit: bool) -> None:
+    CACHE_REQUESTS.inc(cache=cache, result="hit" if hit else "miss")
+
+
+def _outcome(result) -> str:
+    # The LLM helpers report failures as "Error: ..." strings instead of raising
+    return "error" if isinstance(result, str) and result.startswith("Error") else "ok"
+
+
+def timed(provider: Union[str, Callable[[], str]], operation: str):
+    """
+    Decorator recording a function's duration in content_provider_request_seconds.
+    `provider` may be a callable, for functions whose provider is chosen by
+    configuration at call time. Works on sync and async functions, and on
+    async generators (streaming calls), which also record the time to their
+    first chunk in content_provider_first_chunk_seconds.
+    """
+    def observe(started: float, outcome: str) -> None:
+        PROVIDER_SECONDS.observe(
+            time.perf_counter() - started,
+            provider=provider() if callable(provider) else provider,
+            operation=operation,
+            content_type=current_content_type.get(),
+            outcome=outcome,
+        )
+
+    def decorator(func):
+        if inspect.isasyncgenfunction(func):
+            @functools.wraps(func)
+            async def stream_wrapper(*args, **kwargs):
+                started, outcome, first = time.perf_counter(), "error", True
+                try:
+                    async for chunk in func(*args, **kwargs):
+                        if first:
+                            first = False
+                            PROVIDER_FIRST_CHUNK_SECONDS.observe(
+                                time.perf_counter() - started,
+                                provider=provider() if callable(provider) else provider,
+                                operation=operation,
+                                content_type=current_content_type.get(),
+                            )
+                        yield chunk
+                    outcome = "ok"
+                finally:
+                    observe(started, outcome)
+            return stream_wrapper
+
+        if asyncio.iscoroutinefunction(func):
+            @functools.wraps(func)
+            async def async_wrapper(*args, **kwargs):
+                started, outcome = time.perf_counter(), "error"
+                try:
+                    result = await func(*args, **kwargs)
+                    outcome = _outcome(result)
+                    return result
+                finally:
+                    observe(started, outcome)
+            return async_wrapper
+
+        @functools.wraps(func)
+        def wrapper(*args, **kwargs):
+            started, outcome = time.perf_counter(), "error"
+            try:
+                result = func(*args, **kwargs)
+                outcome = _outcome(result)
+                return result
+            finally:
+                observe(started, outcome)
+        return wrapper
+
+    return decorator
+
+
+# Snapshots from other nodes cannot be checked by pid; one not rewritten for
+# this long belongs to a worker that is gone
+REMOTE_SNAPSHOT_TTL = 120.0
+
+
+def _snapshot_name() -> str:
+    return f"{socket.gethostname()}-{os.getpid()}.json"
+
+
+def write_snapshot(directory: str, registry: Registry = REGISTRY) -> None:
+    """Atomically write this process's registry to `directory`/<hostname>-<pid>.json."""
+    os.makedirs(directory, exist_ok=True)
+    path = os.path.join(directory, _snapshot_name())
+    tmp_path = f"{path}.tmp"
+    with open(tmp_path, "w") as f:
+        json.dump(registry.snapshot(), f)
+    os.replace(tmp_path, path)
+
+
+async def flush_forever(directory: str, interval: float, registry: Registry = REGISTRY) -> None:
+    """Write a snapshot every `interval` seconds, and once more when cancelled."""
+    try:
+        while True:
+            await asyncio.sleep(interval)
+            try:
+                write_snapshot(directory, registry)
+            except OSError as e:
+                print(f"Metrics: could not write snapshot: {e}")
+    finally:
+        try:
+            write_snapshot(directory, registry)
+        except OSError:
+            pass
+
+
+def _pid_alive(pid: int) -> bool:
+    try:
+        os.kill(pid, 0)
+    except ProcessLookupError:
+        return False
+    except PermissionError:
+        return True
+    return True
+
+
+def _read_snapshots(directory: str) -> List[Dict[str, dict]]:
+    """Snapshots written by other live processes; files left by dead ones are removed."""
+    if not directory or not os.path.isdir(directory):
+        return []
+    snapshots = []
+    hostname = socket.gethostname()
+    for name in os.listdir(directory):
+        if not name.endswith(".json") or name == _snapshot_name():
+            continue
+        host, _, pid = name[:-len(".json")].rpartition("-")
+        if not pid.isdigit():
+            continue
+        path = os.path.join(directory, name)
+        if host in ("", hostname):
+            gone = not _pid_alive(int(pid))
+        else:
+            try:
+                gone = time.time() - os.path.getmtime(path) > REMOTE_SNAPSHOT_TTL
+            except OSError:
+                continue
+        if gone:
+            try:
+                os.remove(path)
+            except OSError:
+                pass
+            continue
+        try:
+            with open(path) as f:
+                snapshots.append(json.load(f))
+        except (OSError, ValueError):
+            continue  # Being replaced right now; the next scrape will see it
+    return snapshots
+
+
+def merge(snapshots: Iterable[Dict[str, dict]]) -> Dict[str, dict]:
+    """Add up counters, gauges and histogram buckets series by series."""
+    merged: Dict[str, dict] = {}
+    for snapshot in snapshots:
+        for name, metric in snapshot.items():
+            target = merged.get(name)
+            if target is None:
+                merged[name] = {**metric, "series": [[key, _copy(value)] for key, value in metric["series"]]}
+                continue
+            if target["type"] != metric["type"] or target.get("buckets") != metric.get("buckets"):
+                continue  # Written by a process with a different definition
+            series = {tuple(key): value for key, value in target["series"]}
+            for key, value in metric["series"]:
+                current = series.get(tuple(key))
+                if current is None:
+                    series[tuple(key)] = _copy(value)
+                elif isinstance(value, dict):
+                    current["counts"] = [a + b for a, b in zip(current["counts"], value["counts"])]
+                    current["sum"] += value["sum"]
+                    current["count"] += value["count"]
+                else:
+                    series[tuple(key)] = current + value
+            target["series"] = [[list(key), value] for key, value in series.items()]
+    return merged
+
+
+def collect(directory: Optional[str] = None, registry: Registry = REGISTRY) -> Dict[str, dict]:
+    """This process's metrics merged with the snapshots of the other processes, plus derived gauges."""
+    merged = merge([registry.snapshot()] + _read_snapshots(directory))
+    lookups: Dict[str, Dict[str, float]] = {}
+    for (cache, result), value in merged.get(CACHE_REQUESTS.name, {}).get("series", []):
+        lookups.setdefault(cache, {})[result] = value
+    name, documentation = _CACHE_HIT_RATIO
+    merged[name] = {
+        "type": "gauge", "help": documentation, "labelnames": ["cache"],
+        "series": [[[cache], counts.get("hit", 0) / sum(counts.values())]
+                   for cache, counts in sorted(lookups.items()) if sum(counts.values())],
+    }
+    return merged
+
+
+def _escape(value: str) -> str:
+    return value.replace("\\", "\\\\").replace("\n", "\\n").replace('"', '\\"')
+
+
+def _labels(names: Sequence[str], values: Sequence[str], extra: str = "") -> str:
+    parts = [f'{name}="{_escape(value)}"' for name, value in zip(names, values)]
+    if extra:
+        parts.append(extra)
+    return "{" + ",".join(parts) + "}" if parts else ""
+
+
+def _number(value: float) -> str:
+    if isinstance(value, float) and value.is_integer():
+        return str(int(value))
+    return repr(value) if isinstance(value, float) else str(value)
+
+
+def render(snapshot: Dict[str, dict]) -> str:
+    """Text exposition format, version 0.0.4."""
+    lines = []
+    for name in sorted(snapshot):
+        metric = snapshot[name]
+        lines.append(f"# HELP {name} {metric['help']}")
+        lines.append(f"# TYPE {name} {metric['type']}")
+        names = metric["labelnames"]
+        for key, value in sorted(metric["series"], key=lambda item: item[0]):
+            if metric["type"] != "histogram":
+                lines.append(f"{name}{_labels(names, key)} {_number(value)}")
+                continue
+            cumulative = 0
+            for bound, count in zip(list(metric["buckets"]) + ["+Inf"], value["counts"]):
+                cumulative += count
+                le = 'le="{}"'.format(bound if bound == "+Inf" else _number(float(bound)))
+                lines.append(f"{name}_bucket{_labels(names, key, le)} {cumulative}")
+            lines.append(f"{name}_sum{_labels(names, key)} {_number(value['sum'])}")
+            lines.append(f"{name}_count{_labels(names, key)} {value['count']}")
+    return "\n".join(lines) + "\n"
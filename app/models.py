@@ -1,7 +1,82 @@
-from pydantic import BaseModel
-from typing import Optional
+from pydantic import BaseModel, Field
+from typing import Optional, Literal, List, Dict, Any
 from datetime import datetime
 
+# Define request models
+class DialogueEntry(BaseModel):
+    speaker: int  # 1 or 2
+    text: str
+
+class PodcastGenerationOptions(BaseModel):
+    podcast_type: Literal["custom_text", "topic_based", "free_generation", "dialogue"]
+    custom_text: Optional[str] = None
+    topic: Optional[str] = None
+    dialogues: Optional[List[DialogueEntry]] = None
+    voice1: Optional[str] = "rachel"  # Default female voice
+    voice2: Optional[str] = "josh"    # Default male voice
+    num_exchanges: Optional[int] = Field(default=6, ge=2, le=20)  # Number of dialogue exchanges to generate
+
+class ArticleOptions(BaseModel):
+    custom_instructions: Optional[str] = None
+    # placeholder for future article-specific options like section_titles, target_audience
+
+class TweetOptions(BaseModel):
+    num_tweets: int = Field(default=3, ge=1, le=10) # Default to 3 tweets, min 1, max 10
+    call_to_action: Optional[str] = None
+    # placeholder for future tweet-specific options like tone (e.g. "professional", "witty")
+
+class BookChapterOptions(BaseModel):
+    plot_summary: Optional[str] = None
+    chapter_topic: Optional[str] = None # More specific topic for the chapter
+    previous_chapter_summary: Optional[str] = None
+    characters: Optional[List[str]] = None
+    genre: Optional[str] = None
+    # placeholder for future book-specific options
+
+class ContentRequest(BaseModel):
+    content_type: Literal["story", "educational", "podcast", "article", "tweet_thread", "book_chapter"]
+    topic: str  # character_description for stories, topic for educational content, primary subject for text types
+
+    # Video/Educational specific (could be refactored further if more types emerge)
+    video_prompt: Optional[str] = None
+    educational_style: Optional[Literal["lecture", "tutorial", "explainer"]] = None
+    difficulty_level: Optional[Literal["beginner", "intermediate", "advanced"]] = None
+
+    # Podcast specific
+    podcast_options: Optional[PodcastGenerationOptions] = None
+    voice_name: Optional[str] = None  # Name of the ElevenLabs voice to use
+
+    # New text-specific options
+    article_options: Optional[ArticleOptions] = None
+    tweet_options: Optional[TweetOptions] = None
+    book_chapter_options: Optional[BookChapterOptions] = None
+
+    # Common text generation parameters
+    desired_length_words: Optional[int] = Field(default=0, ge=0) # 0 might mean model default or not applicable
+    style_tone: Optional[str] = None  # e.g., "formal", "casual", "technical", "humorous"
+
+    # Queueing: higher priority jobs start first, equal priorities run in FIFO order
+    priority: int = Field(default=0, ge=-10, le=10)
+
+    # LLM response cache: prefer, bypass (always call the provider) or only (never call it); default LLM_CACHE_MODE
+    cache: Optional[Literal["prefer", "bypass", "only"]] = None
+
+
+# Add new models
+class BatchRequest(BaseModel):
+    requests: List[ContentRequest] = Field(min_length=1)
+    # Applied to every job in the batch, in place of the per-request priority
+    priority: Optional[int] = Field(default=None, ge=-10, le=10)
+
+class VideoInfo(BaseModel):
+    job_id: str
+    content_type: str
+    created_at: str
+    video_url: str
+    thumbnail_url: Optional[str] = None
+    duration: Optional[float] = None
+    file_size: Optional[int] = None
+
 class StoryRequest(BaseModel):
     character_description: str
 
@@ -16,4 +91,42 @@ class JobStatus(BaseModel):
     completed_at: Optional[datetime] = None
     failed_at: Optional[datetime] = None
     error: Optional[str] = None
-    output_dir: str 
\ No newline at end of file
+    output_dir: str
+
+class JobRecord(BaseModel):
+    """A persisted generation job, as kept by the job store."""
+    job_id: str
+    status: str = "processing"
+    content_type: str
+    job_class: Optional[str] = None  # Worker pool the job is queued on, e.g. "text" or "video"
+    priority: int = 0
+    created_at: str  # ISO timestamps, matching what the API has always returned
+    updated_at: Optional[str] = None
+    output_dir: str
+    video_prompt: Optional[str] = None
+    started_at: Optional[str] = None
+    output_filename: Optional[str] = None
+    media_type: Optional[str] = None
+    audio_url: Optional[str] = None
+    completed_at: Optional[str] = None
+    failed_at: Optional[str] = None
+    error: Optional[str] = None
+    stage_timings: Dict[str, float] = {}  # Wall-clock seconds per pipeline stage
+    skipped_stages: List[str] = []  # Stages restored from a checkpoint on resume
+    request: Optional[Dict[str, Any]] = None  # Original ContentRequest, kept so the job can be resumed
+    batch_id: Optional[str] = None  # Set for jobs submitted through /generate/batch
+    batch_index: Optional[int] = None  # Position of the job's request in its batch
+    fingerprint: Optional[str] = None  # Canonical hash of the request, used to reuse identical jobs
+    idempotency_key: Optional[str] = None  # Client-supplied Idempotency-Key header
+    last_accessed_at: Optional[str] = None  # Last download/stream, used for LRU eviction
+    expired_at: Optional[str] = None  # When retention deleted the job's files
+    cancelled_at: Optional[str] = None  # When DELETE /jobs/{job_id} cancelled the job
+    mode: Optional[str] = None  # "sync" for jobs run by the API itself (/generate?mode=sync)
+
+class JobEvent(BaseModel):
+    """A job progress event: status transitions, stage progress and completion."""
+    seq: int
+    job_id: str
+    event: str  # "status" or "progress"
+    data: Dict[str, Any] = {}
+    created_at: str
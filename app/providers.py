@@ -0,0 +1,252 @@
+"""
+Provider SDK clients, created on first use.
+
+Importing the Anthropic, OpenAI, Stability and ElevenLabs SDKs takes most of
+a second, and a worker that only writes articles needs neither images nor
+speech. Each client is built the first time a generator asks for it and then
+shared; a missing API key only matters to the content types that need it.
+
+Generators run on the event loop, so they use the SDKs' async clients. The
+Stability SDK only has a blocking gRPC client; its calls go through
+`run_blocking`, on a bounded pool of provider threads.
+"""
+import asyncio
+import contextlib
+import contextvars
+import functools
+import threading
+from concurrent.futures import ThreadPoolExecutor
+from typing import Any, Callable, Dict, Iterable, List, Optional, Set, Tuple
+
+from . import config
+
+
+class ProviderNotConfiguredError(RuntimeError):
+    """Raised when a provider's client is needed but its API key is not set."""
+
+
+# Provider -> config setting holding its API key
+PROVIDER_KEYS = {
+    "anthropic": "ANTHROPIC_KEY",
+    "openai": "OPENAI_KEY",
+    "stability": "STABILITY_KEY",
+    "elevenlabs": "ELEVENLABS_KEY",
+}
+
+
+def _async_anthropic(key):
+    from anthropic import AsyncAnthropic
+    return AsyncAnthropic(api_key=key)
+
+
+def _async_openai(key):
+    from openai import AsyncOpenAI
+    return AsyncOpenAI(api_key=key)
+
+
+def _stability(key):
+    from stability_sdk import client as stability_client
+    return stability_client.StabilityInference(key=key)
+
+
+def _async_elevenlabs(key):
+    from elevenlabs import AsyncElevenLabs
+    return AsyncElevenLabs(api_key=key)
+
+
+# Client name -> (provider, factory)
+_FACTORIES: Dict[str, tuple] = {
+    "async_anthropic": ("anthropic", _async_anthropic),
+    "async_openai": ("openai", _async_openai),
+    "stability": ("stability", _stability),
+    "async_elevenlabs": ("elevenlabs", _async_elevenlabs),
+}
+
+_clients: Dict[str, object] = {}
+_lock = threading.Lock()
+
+
+def is_configured(provider: str) -> bool:
+    return bool(getattr(config, PROVIDER_KEYS[provider]))
+
+
+def get_client(name: str):
+    """The shared client `name` (see _FACTORIES), created on first use."""
+    client = _clients.get(name)
+    if client is not None:
+        return client
+    provider, factory = _FACTORIES[name]
+    key = getattr(config, PROVIDER_KEYS[provider])
+    if not key:
+        raise ProviderNotConfiguredError(f"{PROVIDER_KEYS[provider]} is not set; {provider} is unavailable")
+    with _lock:
+        if name not in _clients:
+            _clients[name] = factory(key)
+        return _clients[name]
+
+
+def get_async_anthropic_client():
+    return get_client("async_anthropic")
+
+
+def get_async_openai_client():
+    return get_client("async_openai")
+
+
+def get_stability_client():
+    return get_client("stability")
+
+
+def get_async_elevenlabs_client():
+    return get_client("async_elevenlabs")
+
+
+def reset_clients() -> None:
+    """Drop the shared clients, e.g. after the keys in `config` changed."""
+    with _lock:
+        _clients.clear()
+
+
+_executor: Optional[ThreadPoolExecutor] = None
+
+
+def _provider_executor() -> ThreadPoolExecutor:
+    global _executor
+    if _executor is None:
+        with _lock:
+            if _executor is None:
+                _executor = ThreadPoolExecutor(max_workers=config.PROVIDER_THREADS, thread_name_prefix="provider")
+    return _executor
+
+
+async def run_blocking(func: Callable[..., Any], *args, **kwargs) -> Any:
+    """
+    Run a blocking SDK call on the provider threads, in the caller's context (so
+    raise_if_cancelled sees the job's cancel event). The pool is separate from
+    the default executor used for file I/O, and its size (PROVIDER_THREADS)
+    caps how many blocking calls are in flight; further calls wait for a thread.
+    """
+    loop = asyncio.get_running_loop()
+    call = functools.partial(contextvars.copy_context().run, func, *args, **kwargs)
+    return await loop.run_in_executor(_provider_executor(), call)
+
+
+# Ollama is plain HTTP. Its pooled client is bound to the event loop it was created
+# in (httpx pools cannot move between loops), so there is one per running loop,
+# together with the semaphore that keeps requests within OLLAMA_NUM_PARALLEL.
+_ollama: Optional[Tuple[asyncio.AbstractEventLoop, object, Optional[asyncio.Semaphore]]] = None
+
+# Content types whose text goes through LLM_PROVIDER
+_LLM_CONTENT_TYPES = ("article", "tweet_thread", "book_chapter", "podcast")
+
+
+def _create_ollama_client():
+    import httpx
+    http2 = config.OLLAMA_HTTP2
+    if http2:
+        try:
+            import h2  # noqa: F401
+        except ImportError:
+            print("OLLAMA_HTTP2 is set but the h2 package is not installed (pip install 'httpx[http2]'); using HTTP/1.1")
+            http2 = False
+    return httpx.AsyncClient(
+        base_url=config.OLLAMA_API_BASE_URL,
+        timeout=config.OLLAMA_TIMEOUT,
+        limits=httpx.Limits(
+            max_connections=config.OLLAMA_MAX_CONNECTIONS,
+            max_keepalive_connections=config.OLLAMA_MAX_CONNECTIONS,
+            keepalive_expiry=config.OLLAMA_KEEPALIVE_EXPIRY
+        ),
+        http2=http2
+    )
+
+
+def _ollama_state():
+    global _ollama
+    loop = asyncio.get_running_loop()
+    if _ollama is None or _ollama[0] is not loop:
+        slots = asyncio.Semaphore(config.OLLAMA_NUM_PARALLEL) if config.OLLAMA_NUM_PARALLEL > 0 else None
+        _ollama = (loop, _create_ollama_client(), slots)
+    return _ollama
+
+
+def get_ollama_client():
+    """The pooled httpx client for Ollama, created on first use in the running event loop."""
+    return _ollama_state()[1]
+
+
+def ollama_slot():
+    """
+    Hold while a request to Ollama is in flight. Ollama runs OLLAMA_NUM_PARALLEL
+    requests per model at once and queues the rest, where they would eat into
+    the request timeout; waiting here instead keeps that queue in this process.
+    """
+    slots = _ollama_state()[2]
+    return slots if slots is not None else contextlib.nullcontext()
+
+
+def ollama_options(**options) -> Dict[str, object]:
+    """Request fields shared by every Ollama call: keep_alive and the model options (num_ctx)."""
+    if config.OLLAMA_NUM_CTX > 0:
+        options["num_ctx"] = config.OLLAMA_NUM_CTX
+    fields: Dict[str, object] = {"model": config.OLLAMA_MODEL_NAME}
+    if config.OLLAMA_KEEP_ALIVE:
+        keep_alive = config.OLLAMA_KEEP_ALIVE
+        # Plain numbers are seconds; Ollama only accepts them as JSON numbers
+        fields["keep_alive"] = int(keep_alive) if keep_alive.lstrip("-").isdigit() else keep_alive
+    if options:
+        fields["options"] = options
+    return fields
+
+
+async def close_ollama_client() -> None:
+    """Close the pooled Ollama connections (at shutdown)."""
+    global _ollama
+    if _ollama is not None and _ollama[0] is asyncio.get_running_loop():
+        await _ollama[1].aclose()
+    _ollama = None
+
+
+def uses_ollama(content_types: Iterable[str]) -> bool:
+    return config.LLM_PROVIDER == "ollama" and any(content_type in _LLM_CONTENT_TYPES for content_type in content_types)
+
+
+async def warm_up_ollama() -> bool:
+    """
+    Open a pooled connection and have Ollama load the model (a generate request
+    without a prompt), so the first job pays for neither. The same keep_alive and
+    num_ctx as real requests are sent, or Ollama would reload the model for them.
+    Returns whether it worked.
+    """
+    try:
+        response = await get_ollama_client().post("/api/generate", json=ollama_options())
+        response.raise_for_status()
+    except Exception as e:
+        print(f"Ollama warm-up failed ({config.OLLAMA_API_BASE_URL}, model {config.OLLAMA_MODEL_NAME}): {e!r}")
+        return False
+    print(f"Ollama warm-up: model {config.OLLAMA_MODEL_NAME} loaded")
+    return True
+
+
+def _text_provider() -> Set[str]:
+    # Ollama runs locally and needs no key
+    return {config.LLM_PROVIDER} if config.LLM_PROVIDER in PROVIDER_KEYS else set()
+
+
+# Content type -> providers its jobs call
+_CONTENT_TYPE_PROVIDERS: Dict[str, Callable[[], Set[str]]] = {
+    "article": _text_provider,
+    "tweet_thread": _text_provider,
+    "book_chapter": _text_provider,
+    "podcast": lambda: _text_provider() | {"elevenlabs"},
+    "story": lambda: {"openai" if config.LLM_PROVIDER == "openai" else "anthropic", "stability", "elevenlabs"},
+    "educational": lambda: {"anthropic", "stability", "elevenlabs"},
+}
+
+
+def missing_keys(content_type: str) -> List[str]:
+    """API key settings a content type needs but which are not set (none in TEST_MODE)."""
+    if config.TEST_MODE:
+        return []
+    providers = _CONTENT_TYPE_PROVIDERS.get(content_type, _text_provider)()
+    return sorted(PROVIDER_KEYS[provider] for provider in providers if not is_configured(provider))
@@ -1,8 +1,31 @@
 from pathlib import Path
 import os
 
+from app.metrics import record_cache
+
 PROMPTS_DIR = Path(os.path.dirname(__file__)).parent / "prompts"
 
+# Template text keyed by path, with the (mtime, size) it was read at. A worker
+# running a batch of the same content type reads each template from disk once.
+_template_cache = {}
+
+def _read_template(path: Path) -> str:
+    try:
+        stat = os.stat(path)
+        version = (stat.st_mtime_ns, stat.st_size)
+    except OSError:
+        version = None
+    cached = _template_cache.get(path)
+    hit = version is not None and cached is not None and cached[0] == version
+    record_cache("prompt_template", hit)
+    if hit:
+        return cached[1]
+    with open(path, "r", encoding="utf-8") as f:
+        template = f.read()
+    if version is not None:
+        _template_cache[path] = (version, template)
+    return template
+
 def load_prompt(template_filename: str, **kwargs) -> str:
     try:
         prompt_template_path = PROMPTS_DIR / template_filename
@@ -37,8 +60,7 @@ def load_prompt(template_filename: str, **kwargs) -> str:
                     # Or better, determine PROMPTS_DIR more robustly at module load.
                     # For now, this complex check is just to find it.
 
-        with open(prompt_template_path, "r", encoding="utf-8") as f:
-            prompt_template = f.read()
+        prompt_template = _read_template(prompt_template_path)
 
         # Replace placeholders for optional sections first
         # to avoid errors if a section is not provided in kwargs
@@ -0,0 +1,202 @@
+import os
+import uuid
+from typing import List, Optional, Tuple
+
+import anyio
+from starlette.datastructures import Headers
+from starlette.responses import FileResponse
+from starlette.staticfiles import NotModifiedResponse, StaticFiles
+from starlette.types import Receive, Scope, Send
+
+# More ranges than this in one request are answered with the whole file
+MAX_RANGES = 32
+
+
+def parse_range_header(value: str, size: int) -> Optional[List[Tuple[int, int]]]:
+    """
+    Parse a `Range: bytes=...` header into sorted, merged, inclusive
+    (start, end) pairs. Returns None when the header should be ignored
+    (another unit or a malformed value) and [] when no range is satisfiable.
+    """
+    unit, _, spec = value.partition("=")
+    if unit.strip().lower() != "bytes":
+        return None
+    ranges = []
+    for part in spec.split(","):
+        part = part.strip()
+        if not part:
+            continue
+        first, dash, last = part.partition("-")
+        if not dash:
+            return None
+        try:
+            if first == "":
+                # Suffix range: the last N bytes
+                length = int(last)
+                if length <= 0:
+                    continue
+                start, end = max(size - length, 0), size - 1
+            else:
+                start = int(first)
+                end = int(last) if last else None
+                if start < 0 or (end is not None and end < start):
+                    return None
+                end = size - 1 if end is None else min(end, size - 1)
+        except ValueError:
+            return None
+        if start < size:
+            ranges.append((start, end))
+
+    merged: List[Tuple[int, int]] = []
+    for start, end in sorted(ranges):
+        if merged and start <= merged[-1][1] + 1:
+            merged[-1] = (merged[-1][0], max(merged[-1][1], end))
+        else:
+            merged.append((start, end))
+    return merged
+
+
+class RangeFileResponse(FileResponse):
+    """
+    FileResponse with conditional and partial requests: ETag / If-None-Match,
+    Range (single and multipart/byteranges), If-Range and 416.
+
+    The body goes out through the server's zero-copy extensions when it offers
+    them (`http.response.pathsend` for whole files, `http.response.zerocopysend`
+    for ranges, both backed by sendfile). uvicorn offers neither, so there the
+    body is read with os.pread in a worker thread, in large chunks and without
+    seeking a shared file object. The file descriptor is always closed.
+    """
+
+    chunk_size = 256 * 1024
+
+    async def __call__(self, scope: Scope, receive: Receive, send: Send) -> None:
+        if self.stat_result is None:
+            try:
+                self.stat_result = await anyio.to_thread.run_sync(os.stat, self.path)
+            except FileNotFoundError:
+                raise RuntimeError(f"File at path {self.path} does not exist.")
+            self.set_stat_headers(self.stat_result)
+        self.headers.setdefault("accept-ranges", "bytes")
+        request_headers = Headers(scope=scope)
+
+        if self.status_code == 200 and self._not_modified(request_headers):
+            await NotModifiedResponse(self.headers)(scope, receive, send)
+            return
+
+        size = self.stat_result.st_size
+        ranges = self._requested_ranges(request_headers, size) if self.status_code == 200 else None
+        if ranges is not None and not ranges:
+            await self._send_not_satisfiable(send, size)
+            return
+
+        extensions = scope.get("extensions") or {}
+        head_only = scope["method"].upper() == "HEAD"
+        if ranges is None:
+            if not head_only and "http.response.pathsend" in extensions:
+                await self._start(send)
+                await send({"type": "http.response.pathsend", "path": str(self.path)})
+                return
+            parts = [(None, 0, size - 1)]
+        elif len(ranges) == 1:
+            start, end = ranges[0]
+            self.status_code = 206
+            self.headers["content-range"] = f"bytes {start}-{end}/{size}"
+            self.headers["content-length"] = str(end - start + 1)
+            parts = [(None, start, end)]
+        else:
+            boundary = uuid.uuid4().hex
+            part_type = self.media_type
+            parts = [
+                (f"--{boundary}\r\nContent-Type: {part_type}\r\nContent-Range: bytes {start}-{end}/{size}\r\n\r\n".encode(),
+                 start, end)
+                for start, end in ranges
+            ]
+            closing = f"--{boundary}--\r\n".encode()
+            self.status_code = 206
+            self.headers["content-type"] = f"multipart/byteranges; boundary={boundary}"
+            self.headers["content-length"] = str(
+                sum(len(header) + (end - start + 1) + 2 for header, start, end in parts) + len(closing)
+            )
+
+        await self._start(send)
+        if not head_only:
+            await self._send_parts(send, parts, extensions)
+            if len(parts) > 1:
+                await send({"type": "http.response.body", "body": closing, "more_body": True})
+        await send({"type": "http.response.body", "body": b"", "more_body": False})
+        if self.background is not None:
+            await self.background()
+
+    def _not_modified(self, request_headers: Headers) -> bool:
+        if_none_match = request_headers.get("if-none-match")
+        if if_none_match is None:
+            return False
+        etag = self.headers["etag"]
+        return any(tag.strip() in (etag, f"W/{etag}", "*") for tag in if_none_match.split(","))
+
+    def _requested_ranges(self, request_headers: Headers, size: int) -> Optional[List[Tuple[int, int]]]:
+        range_header = request_headers.get("range")
+        if range_header is None or size == 0:
+            return None
+        # If-Range: only honour the range when the client's copy is still current
+        if_range = request_headers.get("if-range")
+        if if_range is not None and if_range not in (self.headers["etag"], self.headers["last-modified"]):
+            return None
+        ranges = parse_range_header(range_header, size)
+        if ranges is not None and len(ranges) > MAX_RANGES:
+            return None
+        return ranges
+
+    async def _start(self, send: Send) -> None:
+        await send({"type": "http.response.start", "status": self.status_code, "headers": self.raw_headers})
+
+    async def _send_not_satisfiable(self, send: Send, size: int) -> None:
+        body = b"Requested Range Not Satisfiable"
+        await send({
+            "type": "http.response.start",
+            "status": 416,
+            "headers": [
+                (b"content-range", f"bytes */{size}".encode()),
+                (b"content-length", str(len(body)).encode()),
+                (b"content-type", b"text/plain; charset=utf-8"),
+                (b"accept-ranges", b"bytes"),
+            ],
+        })
+        await send({"type": "http.response.body", "body": body, "more_body": False})
+
+    async def _send_parts(self, send: Send, parts, extensions) -> None:
+        zero_copy = "http.response.zerocopysend" in extensions
+        fd = await anyio.to_thread.run_sync(os.open, self.path, os.O_RDONLY)
+        try:
+            for header, start, end in parts:
+                if header is not None:
+                    await send({"type": "http.response.body", "body": header, "more_body": True})
+                count = end - start + 1
+                if zero_copy:
+                    await send({"type": "http.response.zerocopysend", "file": fd,
+                                "offset": start, "count": count, "more_body": True})
+                else:
+                    position = start
+                    while count > 0:
+                        chunk = await anyio.to_thread.run_sync(os.pread, fd, min(self.chunk_size, count), position)
+                        if not chunk:
+                            break  # File shrank while being served
+                        position += len(chunk)
+                        count -= len(chunk)
+                        await send({"type": "http.response.body", "body": chunk, "more_body": True})
+                if header is not None:
+                    await send({"type": "http.response.body", "body": b"\r\n", "more_body": True})
+        finally:
+            os.close(fd)
+
+
+class RangeStaticFiles(StaticFiles):
+    """StaticFiles serving files through RangeFileResponse, so players can seek."""
+
+    def file_response(self, full_path, stat_result, scope, status_code=200):
+        response = RangeFileResponse(full_path, status_code=status_code, stat_result=stat_result)
+        # Starlette's conditional handling, which also covers If-Modified-Since
+        if self.is_not_modified(response.headers, Headers(scope=scope)):
+            return NotModifiedResponse(response.headers)
+        return response
@@ -0,0 +1,318 @@
+"""
+Queue worker.
+
+Runs a fixed number of asyncio workers per job class, each claiming jobs from
+the shared queue and running them through `process_content_generation`.
+Started automatically by the API (WORKER_MODE=process/inline) or on its own:
+
+    python -m app.worker [--profile text] [--concurrency video=2] [--worker-id render-1]
+
+Workers on other machines can share the queue: point JOB_STORE_PATH,
+OUTPUT_DIR and static/videos at the same shared filesystem paths on every
+node. Each claimed job is leased to its worker and renewed while it runs;
+if a node dies its leases lapse and the jobs are re-queued for another node.
+"""
+import argparse
+import asyncio
+import os
+import signal
+import socket
+import sys
+import threading
+import time
+from datetime import datetime
+from typing import IO, Awaitable, Dict, Iterable, Optional
+
+from .cancellation import current_cancel_event
+from .content_types import served_content_types
+from .config import (
+    WORKER_CONCURRENCY,
+    WORKER_PROFILE,
+    JOB_CLASSES,
+    WORKER_POLL_INTERVAL,
+    WORKER_ID,
+    QUEUE_LEASE_SECONDS,
+    METRICS_DIR,
+    METRICS_FLUSH_INTERVAL,
+    PUBLIC_VIDEO_DIR,
+    OLLAMA_WARMUP,
+    _parse_mapping,
+)
+from .jobs import get_job_queue, get_job_store, JobQueue, JobStore, QueueItem, ACTIVE_STATUSES
+from .jobs.retention import discard_output
+from .metrics import flush_forever
+from .models import ContentRequest
+from .providers import missing_keys, uses_ollama, warm_up_ollama, close_ollama_client
+
+
+def default_worker_id() -> str:
+    return WORKER_ID or f"{socket.gethostname()}:{os.getpid()}"
+
+
+def _is_dead_local_worker(owner: str) -> bool:
+    """Whether a lease owner is a <hostname>:<pid> worker on this machine that no longer runs."""
+    host, _, pid = owner.rpartition(":")
+    if host != socket.gethostname() or not pid.isdigit() or int(pid) == os.getpid():
+        return False
+    try:
+        os.kill(int(pid), 0)
+    except ProcessLookupError:
+        return True
+    except PermissionError:
+        pass
+    return False
+
+
+def acquire_process_lock(path: str) -> Optional[IO]:
+    """
+    Take an exclusive lock on `path` without waiting. Returns the open lock
+    file, or None if another process holds the lock; it is released when the
+    file is closed or the process exits.
+    """
+    import fcntl
+    os.makedirs(os.path.dirname(os.path.abspath(path)), exist_ok=True)
+    lock_file = open(path, "a")
+    try:
+        fcntl.flock(lock_file, fcntl.LOCK_EX | fcntl.LOCK_NB)
+    except BlockingIOError:
+        lock_file.close()
+        return None
+    return lock_file
+
+
+class Lease:
+    """A worker's claim on a running queue item, renewed every third of its length."""
+
+    def __init__(self, queue: JobQueue, job_id: str, owner: str, seconds: float = QUEUE_LEASE_SECONDS):
+        self.queue = queue
+        self.job_id = job_id
+        self.owner = owner
+        self.seconds = seconds
+        self._renewed_at = time.monotonic()
+
+    def renew_if_due(self) -> bool:
+        """Renew the lease when due; False once it has been lost to another worker."""
+        if time.monotonic() - self._renewed_at < self.seconds / 3:
+            return True
+        self._renewed_at = time.monotonic()
+        return self.queue.heartbeat(self.job_id, self.owner, self.seconds)
+
+
+async def run_cancellable(
+    job_id: str,
+    store: JobStore,
+    job: Awaitable,
+    poll_interval: float = WORKER_POLL_INTERVAL,
+    lease: Optional[Lease] = None
+) -> Optional[str]:
+    """
+    Run a job, stopping it if its status becomes "cancelled" (DELETE /jobs/{job_id})
+    or its lease is lost. The job's task is cancelled, which aborts awaited
+    provider calls, and its cancel event is set for work running in threads
+    (SDK calls, the render). Returns "cancelled", "lease_lost" or None.
+    """
+    cancel_event = threading.Event()
+    stopped_because = None
+
+    async def run():
+        current_cancel_event.set(cancel_event)
+        await job
+
+    task = asyncio.create_task(run())
+    try:
+        while not task.done():
+            await asyncio.wait({task}, timeout=poll_interval)
+            if task.done():
+                break
+            # Uncached: running jobs are never cached, and these polls would only skew its hit ratio
+            record = store.get_uncached(job_id)
+            if record is not None and record.status == "cancelled":
+                stopped_because = "cancelled"
+            elif lease is not None and not lease.renew_if_due():
+                # Re-queued after a missed renewal (e.g. a stalled node); another worker owns it now
+                stopped_because = "lease_lost"
+            if stopped_because:
+                cancel_event.set()  # Before cancelling, so threads stop as soon as possible
+                task.cancel()
+                break
+        try:
+            await task
+        except asyncio.CancelledError:
+            if not cancel_event.is_set():
+                raise
+    finally:
+        if not task.done():
+            task.cancel()  # The worker itself is shutting down
+    return stopped_because
+
+
+async def run_queue_item(
+    item: QueueItem,
+    queue: JobQueue,
+    store: JobStore,
+    poll_interval: float = WORKER_POLL_INTERVAL,
+    worker_id: str = ""
+) -> None:
+    """Run one claimed queue item to completion and release it."""
+    # Imported here so the API process, which only enqueues, never loads the generators
+    from .jobs.runner import process_content_generation
+
+    try:
+        record = store.get_uncached(item.job_id)
+        if record is None:
+            print(f"Worker: dropping queue item for unknown job {item.job_id}")
+            return
+        request = ContentRequest.model_validate_json(item.payload)
+        # Conditional, so a job cancelled after it was claimed is not started
+        started = store.transition(item.job_id, ACTIVE_STATUSES, status="processing", started_at=datetime.now().isoformat())
+        if started is None:
+            record = store.get_uncached(item.job_id)
+            print(f"Worker: skipping job {item.job_id} ({record.status})")
+            if record.status == "cancelled":
+                discard_output(store, record, PUBLIC_VIDEO_DIR)
+            return
+        os.makedirs(record.output_dir, exist_ok=True)
+        stopped_because = await run_cancellable(
+            item.job_id, store, process_content_generation(item.job_id, request, record.output_dir), poll_interval,
+            lease=Lease(queue, item.job_id, worker_id)
+        )
+        if stopped_because == "cancelled":
+            print(f"Worker: job {item.job_id} cancelled")
+            discard_output(store, record, PUBLIC_VIDEO_DIR)
+        elif stopped_because == "lease_lost":
+            print(f"Worker: lost the lease on job {item.job_id}; it was re-queued")
+    finally:
+        queue.complete(item.job_id, owner=worker_id)
+
+
+async def worker_loop(
+    job_class: str,
+    queue: JobQueue,
+    store: JobStore,
+    stop_event: asyncio.Event,
+    poll_interval: float = WORKER_POLL_INTERVAL,
+    worker_id: str = ""
+) -> None:
+    """Claim and run jobs of one class until `stop_event` is set."""
+    while not stop_event.is_set():
+        item = queue.claim(job_class, owner=worker_id)
+        if item is None:
+            try:
+                await asyncio.wait_for(stop_event.wait(), timeout=poll_interval)
+            except asyncio.TimeoutError:
+                pass
+            continue
+        try:
+            await run_queue_item(item, queue, store, poll_interval, worker_id)
+        except Exception as e:
+            # process_content_generation records job failures itself; this only
+            # guards the loop against errors in the queue bookkeeping.
+            print(f"Worker ({job_class}): error running job {item.job_id}: {e}")
+
+
+def requeue_interrupted(queue: JobQueue) -> int:
+    """
+    Re-queue jobs whose worker is gone: expired leases (any node) and leases
+    held by dead worker processes on this machine, which need not wait for
+    expiry. Checkpointed stages are skipped when they run again, so finished
+    provider calls are not repeated.
+    """
+    dead = [owner for owner in queue.running_owners() if _is_dead_local_worker(owner)]
+    return queue.requeue_expired() + (queue.requeue_running(owners=dead) if dead else 0)
+
+
+async def reap_expired_leases(queue: JobQueue, stop_event: asyncio.Event, interval: float) -> None:
+    """Every worker node re-queues lapsed leases, so a dead node's jobs move elsewhere."""
+    while not stop_event.is_set():
+        try:
+            await asyncio.wait_for(stop_event.wait(), timeout=interval)
+        except asyncio.TimeoutError:
+            pass
+        resumed = queue.requeue_expired()
+        if resumed:
+            print(f"Worker: re-queued {resumed} job(s) whose lease expired")
+
+
+async def run_worker(
+    concurrency: Optional[Dict[str, int]] = None,
+    stop_event: Optional[asyncio.Event] = None,
+    worker_id: Optional[str] = None,
+    profile: Optional[Iterable[str]] = None
+) -> None:
+    """
+    Start `concurrency[job_class]` worker loops per job class and wait for them.
+    With a `profile` (job classes, default WORKER_PROFILE) only those classes are served.
+    """
+    concurrency = concurrency or WORKER_CONCURRENCY
+    profile = WORKER_PROFILE if profile is None else set(profile)
+    if profile:
+        unknown = profile - set(JOB_CLASSES.values())
+        if unknown:
+            raise ValueError(f"Unknown job class in worker profile: {', '.join(sorted(unknown))}")
+        concurrency = {job_class: count for job_class, count in concurrency.items() if job_class in profile}
+    for content_type in served_content_types(concurrency):
+        keys = missing_keys(content_type)
+        if keys:
+            print(f"Worker: {content_type} jobs will fail, {', '.join(keys)} not set")
+    stop_event = stop_event or asyncio.Event()
+    worker_id = worker_id or default_worker_id()
+    queue = get_job_queue()
+    store = get_job_store()
+
+    resumed = requeue_interrupted(queue)
+    if resumed:
+        print(f"Worker: re-queued {resumed} interrupted job(s)")
+
+    tasks = [
+        asyncio.create_task(worker_loop(job_class, queue, store, stop_event, worker_id=worker_id))
+        for job_class, count in concurrency.items()
+        for _ in range(count)
+    ]
+    reaper_task = asyncio.create_task(reap_expired_leases(queue, stop_event, QUEUE_LEASE_SECONDS / 2))
+    # Jobs record their metrics here; the API reads the snapshots when /metrics is scraped
+    metrics_task = asyncio.create_task(flush_forever(METRICS_DIR, METRICS_FLUSH_INTERVAL))
+    # In the background: jobs are claimed meanwhile, and simply wait for the model like the warm-up does
+    warm_up_task = None
+    if OLLAMA_WARMUP and uses_ollama(served_content_types(concurrency)):
+        warm_up_task = asyncio.create_task(warm_up_ollama())
+    print(f"Worker {worker_id} started with concurrency {concurrency} "
+          f"serving {', '.join(served_content_types(concurrency)) or 'nothing'}")
+    try:
+        await asyncio.gather(*tasks)
+    finally:
+        for task in tasks:
+            task.cancel()
+        reaper_task.cancel()
+        metrics_task.cancel()
+        if warm_up_task is not None:
+            warm_up_task.cancel()
+        await close_ollama_client()
+        # Only loaded (with moviepy) once a video job ran in this process
+        video = sys.modules.get("app.generators.video")
+        if video is not None:
+            await asyncio.to_thread(video.shutdown_render_pool)
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description="Run content generation workers.")
+    parser.add_argument("--concurrency", help='Workers per job class, e.g. "video=2" (default: WORKER_CONCURRENCY)')
+    parser.add_argument("--profile", help='Job classes to serve, e.g. "text" (default: WORKER_PROFILE, or all)')
+    parser.add_argument("--worker-id", help="Lease owner name (default: WORKER_ID or <hostname>:<pid>)")
+    args = parser.parse_args()
+    concurrency = {job_class: int(count) for job_class, count in _parse_mapping(args.concurrency).items()} \
+        if args.concurrency else None
+    profile = [name.strip() for name in args.profile.split(",") if name.strip()] if args.profile else None
+
+    async def _main():
+        stop_event = asyncio.Event()
+        loop = asyncio.get_running_loop()
+        for sig in (signal.SIGINT, signal.SIGTERM):
+            loop.add_signal_handler(sig, stop_event.set)
+        await run_worker(concurrency=concurrency, stop_event=stop_event, worker_id=args.worker_id,
+                         profile=profile)
+
+    asyncio.run(_main())
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,26 @@
+import atexit
+import os
+import shutil
+import tempfile
+
+# Importing app.main opens the job store, and jobs flush metrics snapshots, under
+# OUTPUT_DIR. Point every such path at a scratch directory before app.config is
+# imported, so a test run leaves nothing behind in the checkout.
+_output_dir = tempfile.mkdtemp(prefix="content-creator-tests-")
+atexit.register(shutil.rmtree, _output_dir, ignore_errors=True)
+os.environ["OUTPUT_DIR"] = _output_dir
+for _setting, _name in [("JOB_STORE_PATH", "jobs.db"), ("WORKER_LOCK_PATH", ".worker.lock"),
+                        ("BLOB_STORE_DIR", ".blobs"), ("LLM_CACHE_PATH", "llm_cache.db"),
+                        ("METRICS_DIR", ".metrics")]:
+    os.environ[_setting] = os.path.join(_output_dir, _name)
+
+import pytest
+
+from app.llm_cache import LLMCache
+
+@pytest.fixture(autouse=True)
+def llm_cache(tmp_path_factory, monkeypatch):
+    """A fresh LLM response cache per test, so responses never leak between tests."""
+    cache = LLMCache(str(tmp_path_factory.mktemp("llm_cache") / "llm_cache.db"), max_bytes=1024 * 1024, ttl_seconds=3600)
+    monkeypatch.setattr("app.llm_cache.get_llm_cache", lambda: cache)
+    return cache
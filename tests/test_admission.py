@@ -0,0 +1,67 @@
+import pytest
+from datetime import datetime
+
+from app.jobs.admission import AdmissionController, QueueFullError
+from app.jobs.queue import MemoryJobQueue
+from app.jobs.store import MemoryJobStore
+from app.models import JobEvent, JobRecord
+
+JOB_CLASSES = {"article": "text", "story": "video", "educational": "video"}
+
+def make_controller(limits, total_limit=0):
+    store, queue = MemoryJobStore(), MemoryJobQueue()
+    controller = AdmissionController(
+        store,
+        queue,
+        job_classes=JOB_CLASSES,
+        limits=limits,
+        concurrency={"text": 4, "video": 1},
+        job_seconds={"text": 10, "video": 120},
+        total_limit=total_limit,
+        fast_lane={"text"}
+    )
+    return controller, store, queue
+
+def enqueue(store, queue, job_id, content_type):
+    store.create(JobRecord(job_id=job_id, status="queued", content_type=content_type,
+                           created_at=datetime.now().isoformat(), output_dir=f"output/{job_id}"))
+    queue.enqueue(job_id, JOB_CLASSES[content_type], "{}")
+
+def test_per_type_limit_rejects_with_retry_after():
+    controller, store, queue = make_controller({"story": 2, "article": 100})
+    enqueue(store, queue, "s1", "story")
+    controller.check({"story": 1})
+    enqueue(store, queue, "s2", "story")
+
+    with pytest.raises(QueueFullError) as error:
+        controller.check({"story": 1})
+    # One video worker at 120 s per job, one job over the limit
+    assert error.value.retry_after == 120
+    # Text jobs have their own limit and are still admitted
+    controller.check({"article": 1})
+
+def test_batch_is_rejected_as_a_whole():
+    controller, _, _ = make_controller({"article": 3})
+    controller.check({"article": 3})
+    with pytest.raises(QueueFullError):
+        controller.check({"article": 4})
+
+def test_total_limit_spares_the_fast_lane():
+    controller, store, queue = make_controller({}, total_limit=2)
+    enqueue(store, queue, "s1", "story")
+    enqueue(store, queue, "e1", "educational")
+
+    with pytest.raises(QueueFullError):
+        controller.check({"story": 1})
+    controller.check({"article": 50})
+
+def test_retry_after_follows_observed_throughput():
+    controller, _, _ = make_controller({})
+    assert controller.throughput("video") == pytest.approx(1 / 120)
+    for seq in range(1, 11):
+        controller.observe(JobEvent(seq=seq, job_id=f"j{seq}", event="status",
+                                    data={"status": "completed", "content_type": "story"},
+                                    created_at=datetime.now().isoformat()))
+    # Ten jobs finished within the last second: far faster than the configured estimate
+    assert controller.throughput("video") == pytest.approx(10.0)
+    assert controller.retry_after("video", 30) == 3
@@ -0,0 +1,72 @@
+import os
+import pytest
+from unittest.mock import patch
+
+from app.jobs.blobs import BlobStore, cached_file
+
+@pytest.fixture
+def blobs(tmp_path):
+    store = BlobStore(str(tmp_path / "blobs"))
+    with patch('app.jobs.blobs.get_blob_store', return_value=store):
+        yield store
+
+def write(path, content: bytes):
+    os.makedirs(os.path.dirname(path), exist_ok=True)
+    with open(path, "wb") as f:
+        f.write(content)
+    return str(path)
+
+def test_identical_files_share_one_blob(blobs, tmp_path):
+    first = write(tmp_path / "job-1" / "main.jpg", b"pixels")
+    second = write(tmp_path / "job-2" / "main.jpg", b"pixels")
+
+    digest = blobs.add(first)
+    assert blobs.add(second) == digest
+    assert os.path.samefile(first, second)
+    assert os.path.samefile(first, blobs.blob_path(digest))
+    assert blobs.refcount(digest) == 2
+
+def test_garbage_collection_removes_unreferenced_blobs(blobs, tmp_path):
+    first = write(tmp_path / "job-1" / "main.jpg", b"pixels")
+    second = write(tmp_path / "job-2" / "main.jpg", b"pixels")
+    digest = blobs.add(first)
+    blobs.add(second)
+    blobs.remember({"prompt": "a cat"}, digest)
+
+    os.remove(first)
+    assert blobs.collect_garbage() == (0, 0)
+    os.remove(second)
+    assert blobs.collect_garbage() == (1, len(b"pixels"))
+    assert blobs.refcount(digest) == -1
+    assert blobs.lookup({"prompt": "a cat"}) is None
+
+@pytest.mark.asyncio
+async def test_cached_file_links_artifacts_generated_from_the_same_inputs(blobs, tmp_path):
+    calls = []
+    async def produce(path):
+        calls.append(path)
+        write(path, b"speech")
+
+    first = str(tmp_path / "job-1" / "voice_over.mp3")
+    second = str(tmp_path / "job-2" / "voice_over.mp3")
+    os.makedirs(os.path.dirname(second))
+    await cached_file({"text": "Hello"}, first, lambda: produce(first))
+    await cached_file({"text": "Hello"}, second, lambda: produce(second))
+    await cached_file({"text": "Bye"}, second, lambda: produce(second))
+
+    assert calls == [first, second]
+    assert open(first, "rb").read() == b"speech"
+
+@pytest.mark.asyncio
+async def test_regenerating_a_linked_file_leaves_the_blob_intact(blobs, tmp_path):
+    path = str(tmp_path / "job-1" / "main.jpg")
+    async def produce(content):
+        with open(path, "wb") as f:
+            f.write(content)
+
+    os.makedirs(os.path.dirname(path))
+    await cached_file({"prompt": "a cat"}, path, lambda: produce(b"cat"))
+    await cached_file({"prompt": "a dog"}, path, lambda: produce(b"dog"))
+
+    assert open(blobs.blob_path(blobs.lookup({"prompt": "a cat"})), "rb").read() == b"cat"
+    assert open(path, "rb").read() == b"dog"
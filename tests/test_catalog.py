@@ -0,0 +1,91 @@
+import os
+import pytest
+from unittest.mock import patch
+
+from app.jobs.catalog import (
+    link_or_copy,
+    publish_video_sync,
+    backfill_catalog,
+    encode_cursor,
+    decode_cursor,
+)
+from app.jobs.store import SQLiteJobStore, MemoryJobStore
+from app.models import JobRecord, VideoInfo
+
+@pytest.fixture(params=["sqlite", "memory"])
+def store(request, tmp_path):
+    if request.param == "sqlite":
+        backend = SQLiteJobStore(str(tmp_path / "jobs.db"))
+    else:
+        backend = MemoryJobStore()
+    yield backend
+    backend.close()
+
+def make_video(job_id: str, created_at: str, content_type: str = "story") -> VideoInfo:
+    return VideoInfo(job_id=job_id, content_type=content_type, created_at=created_at,
+                     video_url=f"/static/videos/{job_id}.mp4")
+
+def make_render(tmp_path, job_id: str, status: str = "completed") -> JobRecord:
+    output_dir = tmp_path / "output" / job_id
+    output_dir.mkdir(parents=True)
+    (output_dir / "content_video.mp4").write_bytes(b"\x00" * 64)
+    return JobRecord(job_id=job_id, status=status, content_type="story",
+                     created_at="2024-01-01T12:00:00", output_dir=str(output_dir))
+
+def test_link_or_copy_prefers_hardlink_then_symlink_then_copy(tmp_path):
+    source = tmp_path / "render.mp4"
+    source.write_bytes(b"video")
+
+    assert link_or_copy(str(source), str(tmp_path / "a.mp4")) == "hardlink"
+    assert os.stat(tmp_path / "a.mp4").st_ino == os.stat(source).st_ino
+
+    with patch("app.jobs.catalog.os.link", side_effect=OSError("cross-device link")):
+        assert link_or_copy(str(source), str(tmp_path / "b.mp4")) == "symlink"
+        with patch("app.jobs.catalog.os.symlink", side_effect=OSError("not supported")):
+            assert link_or_copy(str(source), str(tmp_path / "c.mp4")) == "copy"
+    assert (tmp_path / "b.mp4").read_bytes() == (tmp_path / "c.mp4").read_bytes() == b"video"
+
+def test_publish_adds_catalog_entry(store, tmp_path):
+    record = make_render(tmp_path, "job-1")
+    public_dir = str(tmp_path / "public")
+
+    video = publish_video_sync(store, record, public_dir)
+
+    assert os.path.isfile(os.path.join(public_dir, "job-1.mp4"))
+    assert video.file_size == 64
+    assert store.list_videos() == [video]
+
+def test_list_videos_keyset_pagination(store):
+    # Two videos share a timestamp, so the job_id tiebreak matters
+    for job_id, created_at in [("a", "2024-01-01T10:00:00"), ("b", "2024-01-01T11:00:00"),
+                               ("c", "2024-01-01T11:00:00"), ("d", "2024-01-01T12:00:00")]:
+        store.add_video(make_video(job_id, created_at))
+
+    pages, after = [], None
+    while True:
+        page = store.list_videos(after=after, limit=2)
+        if not page:
+            break
+        pages.append([video.job_id for video in page])
+        after = decode_cursor(encode_cursor(page[-1]))
+    assert pages == [["d", "c"], ["b", "a"]]
+
+    store.add_video(make_video("e", "2024-01-01T09:00:00", content_type="educational"))
+    assert [v.job_id for v in store.list_videos(content_types=["educational"])] == ["e"]
+    assert [v.job_id for v in store.list_videos(since="2024-01-01T11:00:00")] == ["d", "c", "b"]
+    store.remove_video("d")
+    assert store.list_videos(limit=1)[0].job_id == "c"
+
+def test_decode_cursor_rejects_garbage():
+    with pytest.raises(ValueError):
+        decode_cursor("not-a-cursor")
+
+def test_backfill_publishes_only_uncatalogued_renders(store, tmp_path):
+    public_dir = str(tmp_path / "public")
+    store.create(make_render(tmp_path, "old-render"))
+    store.create(make_render(tmp_path, "failed-render", status="failed"))
+    store.add_video(make_video("already", "2024-01-01T12:00:00"))
+
+    assert backfill_catalog(store, ["story"], public_dir) == 1
+    assert os.listdir(public_dir) == ["old-render.mp4"]
+    assert backfill_catalog(store, ["story"], public_dir) == 0
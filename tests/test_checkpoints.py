@@ -0,0 +1,83 @@
+import pytest
+import os
+from unittest.mock import AsyncMock
+
+from app.jobs.checkpoints import checkpointed, completed_stages, load_checkpoint, save_checkpoint
+from app.jobs.pipeline import Stage, run_stages
+
+pytestmark = pytest.mark.asyncio
+
+def build_stages(output_dir, image_calls, video_fails):
+    async def images(deps):
+        image_calls.append(1)
+        path = os.path.join(output_dir, "main.jpg")
+        with open(path, "wb") as f:
+            f.write(b"image bytes")
+        return [path]
+
+    async def video(deps):
+        if video_fails:
+            raise RuntimeError("render crashed")
+        return f"video from {len(deps['images'])} images"
+
+    return [Stage("images", images), Stage("video", video, deps=("images",))]
+
+async def test_resume_skips_checkpointed_stages(tmp_path):
+    output_dir = str(tmp_path)
+    image_calls = []
+
+    stages = [checkpointed(stage, output_dir) for stage in build_stages(output_dir, image_calls, video_fails=True)]
+    with pytest.raises(RuntimeError):
+        await run_stages(stages)
+    assert completed_stages(output_dir) == ["images"]
+
+    skipped = []
+    stages = [
+        checkpointed(stage, output_dir, on_skip=skipped.append)
+        for stage in build_stages(output_dir, image_calls, video_fails=False)
+    ]
+    results, _ = await run_stages(stages)
+
+    assert len(image_calls) == 1  # The image stage was not paid for twice
+    assert skipped == ["images"]
+    assert results["video"] == "video from 1 images"
+    assert completed_stages(output_dir) == ["images", "video"]
+
+async def test_checkpoint_invalidated_when_output_changes(tmp_path):
+    artifact = tmp_path / "voice_over.mp3"
+    artifact.write_bytes(b"original audio")
+    save_checkpoint(str(tmp_path), "voice_over", {"script": "text"}, str(artifact))
+    assert load_checkpoint(str(tmp_path), "voice_over", {"script": "text"})["result"] == str(artifact)
+
+    # Different inputs do not reuse the checkpoint
+    assert load_checkpoint(str(tmp_path), "voice_over", {"script": "other text"}) is None
+
+    artifact.write_bytes(b"truncated")
+    assert load_checkpoint(str(tmp_path), "voice_over", {"script": "text"}) is None
+
+    artifact.unlink()
+    assert load_checkpoint(str(tmp_path), "voice_over", {"script": "text"}) is None
+
+async def test_checkpointed_stage_runs_when_no_checkpoint(tmp_path):
+    func = AsyncMock(return_value="script text")
+    stage = checkpointed(Stage("script", func), str(tmp_path))
+    assert await stage.func({}) == "script text"
+    assert await stage.func({}) == "script text"
+    func.assert_called_once()
+
+async def test_outputs_are_hashed_off_the_event_loop(tmp_path, monkeypatch):
+    import threading
+    from app.jobs import checkpoints
+    hashed_on = []
+    real_sha256 = checkpoints.file_sha256
+    def file_sha256(path):
+        hashed_on.append(threading.current_thread())
+        return real_sha256(path)
+    monkeypatch.setattr(checkpoints, "file_sha256", file_sha256)
+
+    output_dir = str(tmp_path)
+    for _ in range(2):  # Checkpointed, then validated when skipped
+        await run_stages([checkpointed(stage, output_dir) for stage in build_stages(output_dir, [], video_fails=False)])
+
+    assert len(hashed_on) == 2
+    assert threading.main_thread() not in hashed_on
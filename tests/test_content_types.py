@@ -0,0 +1,71 @@
+import json
+import pytest
+from unittest.mock import AsyncMock, patch
+
+from app.content_types import get_content_type, served_content_types
+from app.jobs.runner import process_content_generation
+from app.jobs.store import MemoryJobStore
+from app.models import ContentRequest, JobRecord
+from app.worker import run_worker
+
+@pytest.fixture
+def store():
+    store = MemoryJobStore()
+    with patch('app.jobs.runner.get_job_store', return_value=store):
+        yield store
+
+def create_job(store, tmp_path, content_type):
+    store.create(JobRecord(job_id="job-1", status="processing", content_type=content_type,
+                           created_at="2024-01-01T00:00:00", output_dir=str(tmp_path)))
+
+def test_unknown_content_type_is_rejected():
+    with pytest.raises(ValueError, match="Unsupported content type"):
+        get_content_type("haiku")
+
+def test_profile_selects_content_types_by_job_class():
+    assert served_content_types({"text"}) == ["article", "tweet_thread", "book_chapter"]
+    assert served_content_types({"audio", "video"}) == ["podcast", "story", "educational"]
+
+@pytest.mark.asyncio
+async def test_unknown_profile_is_rejected():
+    with pytest.raises(ValueError, match="render"):
+        await run_worker(profile=["render"])
+
+@pytest.mark.asyncio
+async def test_registered_stages_produce_the_declared_output(store, tmp_path):
+    create_job(store, tmp_path, "tweet_thread")
+    request = ContentRequest(content_type="tweet_thread", topic="Queues")
+    with patch('app.content_types.text.generate_tweet_thread', new=AsyncMock(return_value=["1/2", "2/2"])):
+        await process_content_generation("job-1", request, str(tmp_path))
+
+    job = store.get("job-1")
+    assert job.status == "completed"
+    assert (job.output_filename, job.media_type) == ("tweet_thread.json", "application/json")
+    assert json.loads((tmp_path / "tweet_thread.json").read_text()) == ["1/2", "2/2"]
+    assert list(job.stage_timings) == ["text"]
+
+@pytest.mark.asyncio
+async def test_stage_errors_fail_the_job(store, tmp_path):
+    create_job(store, tmp_path, "podcast")
+    await process_content_generation("job-1", ContentRequest(content_type="podcast", topic="Queues"), str(tmp_path))
+
+    job = store.get("job-1")
+    assert job.status == "failed"
+    assert "Podcast options not provided" in job.error
+
+@pytest.mark.asyncio
+async def test_article_is_written_as_it_streams(store, tmp_path):
+    create_job(store, tmp_path, "article")
+    seen_on_disk = []
+    async def stream_article(**kwargs):
+        for chunk in ["Queues ", "are ", "lines."]:
+            yield chunk
+            seen_on_disk.append((tmp_path / "article.txt").read_text())
+
+    with patch('app.content_types.text.stream_article', new=stream_article):
+        await process_content_generation("job-1", ContentRequest(content_type="article", topic="Queues"), str(tmp_path))
+
+    assert store.get("job-1").status == "completed"
+    # Each chunk is on disk before the next one is requested
+    assert seen_on_disk == ["Queues ", "Queues are ", "Queues are lines."]
+    assert (tmp_path / "article.txt").read_text() == "Queues are lines."
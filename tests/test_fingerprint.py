@@ -0,0 +1,15 @@
+from app.jobs.fingerprint import request_fingerprint
+from app.models import ContentRequest, ArticleOptions
+
+def test_fingerprint_ignores_key_order_defaults_and_priority():
+    explicit = ContentRequest.model_validate_json(
+        '{"topic": "Tides", "content_type": "article", "style_tone": null, "priority": 5}'
+    )
+    minimal = ContentRequest(content_type="article", topic="Tides")
+    assert request_fingerprint(explicit) == request_fingerprint(minimal)
+
+def test_fingerprint_changes_with_content_inputs():
+    base = ContentRequest(content_type="article", topic="Tides")
+    assert request_fingerprint(base) != request_fingerprint(ContentRequest(content_type="article", topic="Waves"))
+    with_options = ContentRequest(content_type="article", topic="Tides", article_options=ArticleOptions(custom_instructions="For kids"))
+    assert request_fingerprint(base) != request_fingerprint(with_options)
@@ -0,0 +1,144 @@
+import asyncio
+import pytest
+from datetime import datetime
+
+from app.jobs.events import EventBroker, is_terminal_event
+from app.jobs.store import CachedJobStore, SQLiteJobStore, MemoryJobStore
+from app.models import JobRecord
+
+def make_record(job_id: str, content_type: str = "story") -> JobRecord:
+    return JobRecord(
+        job_id=job_id,
+        status="queued",
+        content_type=content_type,
+        created_at=datetime.now().isoformat(),
+        output_dir=f"output/{job_id}"
+    )
+
+@pytest.fixture(params=["sqlite", "memory"])
+def store(request, tmp_path):
+    if request.param == "sqlite":
+        backend = SQLiteJobStore(str(tmp_path / "jobs.db"))
+    else:
+        backend = MemoryJobStore()
+    yield backend
+    backend.close()
+
+def test_status_changes_are_logged_as_events(store):
+    store.create(make_record("job-1"))
+    store.update("job-1", status="processing")
+    store.update("job-1", audio_url="/podcast/job-1")  # No status change, no event
+    store.update("job-1", status="completed", output_filename="video.mp4")
+
+    events = store.events_since(0, job_id="job-1")
+    assert [event.data["status"] for event in events] == ["queued", "processing", "completed"]
+    assert events[-1].data["output_filename"] == "video.mp4"
+    assert is_terminal_event(events[-1])
+    assert store.last_event_seq() == events[-1].seq
+
+def test_events_since_resumes_after_a_sequence_number(store):
+    store.create(make_record("job-1"))
+    store.create(make_record("job-2"))
+    store.publish_event("job-1", "progress", {"stage": "script", "state": "started"})
+
+    first = store.events_since(0)
+    assert [event.job_id for event in first] == ["job-1", "job-2", "job-1"]
+    assert store.events_since(first[1].seq) == first[2:]
+    assert [event.event for event in store.events_since(0, job_id="job-2")] == ["status"]
+
+def test_prune_events_drops_old_events(store):
+    store.create(make_record("job-1"))
+    store.prune_events(datetime.now().isoformat())
+    assert store.events_since(0) == []
+    # Sequence numbers keep growing so reconnecting clients never see a reused id
+    store.publish_event("job-1", "progress", {"percent": 50})
+    assert store.events_since(0)[0].seq > 1
+
+@pytest.mark.asyncio
+async def test_broker_delivers_to_job_and_wildcard_subscribers(store):
+    broker = EventBroker(store, poll_interval=0.01)
+    await broker.start()
+    try:
+        job_subscription = broker.subscribe(["job-1"])
+        all_subscription = broker.subscribe()
+        all_subscription.subscribe_all()
+
+        store.create(make_record("job-1"))
+        store.create(make_record("job-2"))
+
+        event = await asyncio.wait_for(job_subscription.get(), timeout=2)
+        assert (event.job_id, event.data["status"]) == ("job-1", "queued")
+        seen = [await asyncio.wait_for(all_subscription.get(), timeout=2) for _ in range(2)]
+        assert [event.job_id for event in seen] == ["job-1", "job-2"]
+        assert job_subscription.queue.empty()
+    finally:
+        await broker.stop()
+    assert await job_subscription.get() is None
+
+@pytest.mark.asyncio
+async def test_broker_notices_writes_from_another_process(tmp_path):
+    path = str(tmp_path / "jobs.db")
+    api_store = SQLiteJobStore(path)
+    worker_store = SQLiteJobStore(path)  # Separate connection, no in-process listener
+    broker = EventBroker(api_store, poll_interval=0.01)
+    await broker.start()
+    try:
+        subscription = broker.subscribe(["job-1"])
+        worker_store.create(make_record("job-1"))
+        event = await asyncio.wait_for(subscription.get(), timeout=2)
+        assert event.data["status"] == "queued"
+    finally:
+        await broker.stop()
+        api_store.close()
+        worker_store.close()
+
+@pytest.mark.asyncio
+async def test_finished_jobs_cached_by_the_api_follow_changes_from_another_process(tmp_path):
+    path = str(tmp_path / "jobs.db")
+    api_store = CachedJobStore(SQLiteJobStore(path))
+    other_store = SQLiteJobStore(path)  # Another API process, the worker or the reaper
+    api_store.create(make_record("job-1"))
+    api_store.update("job-1", status="failed")
+    assert api_store.get("job-1").status == "failed"  # Now cached
+
+    broker = EventBroker(api_store, poll_interval=0.01)
+    await broker.start()
+    try:
+        subscription = broker.subscribe(["job-1"])
+        other_store.transition("job-1", ["failed"], status="queued")
+        await asyncio.wait_for(subscription.get(), timeout=2)
+        assert api_store.get("job-1").status == "queued"
+    finally:
+        await broker.stop()
+        api_store.close()
+        other_store.close()
+
+@pytest.mark.asyncio
+async def test_slow_subscriber_is_closed_instead_of_growing_without_bound(store):
+    broker = EventBroker(store)
+    subscription = broker.subscribe(["job-1"])
+    subscription.queue = asyncio.Queue(maxsize=2)
+    store.create(make_record("job-1"))
+    for percent in (10, 20, 30):
+        store.publish_event("job-1", "progress", {"percent": percent})
+    broker.dispatch()
+
+    assert subscription.closed
+    assert "job-1" not in broker._by_job
+
+def test_websocket_reports_malformed_commands_and_keeps_the_connection(monkeypatch):
+    from starlette.testclient import TestClient
+    import app.main as main
+    store = MemoryJobStore()
+    store.create(make_record("job-1"))
+    monkeypatch.setattr(main, "job_store", store)
+
+    with TestClient(main.app).websocket_connect("/ws/jobs") as websocket:
+        for command in [{"subscribe": "job-1"}, {"subscribe": [1]}, {"unsubscribe": "*"}, ["job-1"]]:
+            websocket.send_json(command)
+            assert websocket.receive_json()["event"] == "error"
+        websocket.send_text("not json")
+        assert websocket.receive_json()["event"] == "error"
+
+        websocket.send_json({"subscribe": ["job-1"]})
+        assert websocket.receive_json() == {"job_id": "job-1", "event": "status", "data": {"status": "queued"}}
@@ -0,0 +1,262 @@
+import pytest
+import sqlite3
+import asyncio
+import time
+from unittest.mock import AsyncMock, patch
+
+from app.jobs.queue import SQLiteJobQueue, MemoryJobQueue, QueueItem
+from app.jobs.store import MemoryJobStore
+from app.models import JobRecord, ContentRequest
+from app.cancellation import cancel_requested
+from app.worker import Lease, run_cancellable, worker_loop
+
+@pytest.fixture(params=["sqlite", "memory"])
+def queue(request, tmp_path):
+    if request.param == "sqlite":
+        backend = SQLiteJobQueue(str(tmp_path / "jobs.db"))
+    else:
+        backend = MemoryJobQueue()
+    yield backend
+    backend.close()
+
+def test_claim_is_fifo_within_a_priority(queue):
+    for job_id in ["a", "b", "c"]:
+        queue.enqueue(job_id, "text", "{}")
+    assert [queue.claim("text").job_id for _ in range(3)] == ["a", "b", "c"]
+    assert queue.claim("text") is None
+
+def test_claim_prefers_higher_priority(queue):
+    queue.enqueue("low", "video", "{}", priority=0)
+    queue.enqueue("high", "video", "{}", priority=5)
+    queue.enqueue("low-2", "video", "{}", priority=0)
+    assert [queue.claim("video").job_id for _ in range(3)] == ["high", "low", "low-2"]
+
+def test_job_classes_are_independent(queue):
+    queue.enqueue("render", "video", "{}")
+    assert queue.claim("text") is None
+    assert queue.claim("video").job_id == "render"
+
+def test_depth_reports_queued_and_running(queue):
+    queue.enqueue("a", "text", "{}")
+    queue.enqueue("b", "text", "{}")
+    queue.enqueue("c", "video", "{}")
+    queue.claim("text")
+    assert queue.depth() == {
+        "text": {"queued": 1, "running": 1},
+        "video": {"queued": 1, "running": 0},
+    }
+    queue.complete("a")
+    assert queue.depth()["text"] == {"queued": 1, "running": 0}
+
+def test_sqlite_claim_is_exclusive_across_connections(tmp_path):
+    path = str(tmp_path / "jobs.db")
+    first, second = SQLiteJobQueue(path), SQLiteJobQueue(path)
+    first.enqueue("only", "text", "{}")
+    claims = [first.claim("text"), second.claim("text")]
+    assert [item.job_id for item in claims if item] == ["only"]
+
+@pytest.mark.asyncio
+async def test_worker_loop_runs_and_releases_jobs(tmp_path):
+    queue, store = MemoryJobQueue(), MemoryJobStore()
+    request = ContentRequest(content_type="article", topic="Queues")
+    store.create(JobRecord(
+        job_id="job-1",
+        status="queued",
+        content_type="article",
+        created_at="2024-01-01T00:00:00",
+        output_dir=str(tmp_path / "job-1")
+    ))
+    queue.enqueue("job-1", "text", request.model_dump_json())
+
+    stop_event = asyncio.Event()
+    async def fake_process(job_id, received_request, output_dir):
+        assert received_request == request
+        stop_event.set()
+
+    with patch('app.jobs.runner.process_content_generation', new=AsyncMock(side_effect=fake_process)) as mock_process:
+        await asyncio.wait_for(worker_loop("text", queue, store, stop_event, poll_interval=0.01), timeout=5)
+
+    mock_process.assert_called_once()
+    assert store.get("job-1").status == "processing"
+    assert queue.depth()["text"] == {"queued": 0, "running": 0}
+
+def test_requeue_running_puts_claimed_items_back(queue):
+    queue.enqueue("a", "video", "{}")
+    queue.enqueue("b", "video", "{}")
+    assert queue.claim("video").job_id == "a"
+    assert queue.requeue_running() == 1
+    assert queue.depth()["video"] == {"queued": 2, "running": 0}
+    assert queue.claim("video").job_id == "a"  # Keeps its original place in line
+
+def test_enqueue_many_keeps_submission_order(queue):
+    queue.enqueue_many([
+        QueueItem(job_id=job_id, job_class="text", priority=0, payload="{}")
+        for job_id in ["b1", "b2", "b3"]
+    ])
+    assert [queue.claim("text").job_id for _ in range(3)] == ["b1", "b2", "b3"]
+    assert queue.claim("text") is None
+
+def test_remove_drops_only_unclaimed_items(queue):
+    queue.enqueue("a", "text", "{}")
+    queue.enqueue("b", "text", "{}")
+    assert queue.claim("text").job_id == "a"
+    assert queue.remove("a") is False  # Running: its worker stops it
+    assert queue.remove("b") is True
+    assert queue.depth()["text"] == {"queued": 0, "running": 1}
+
+@pytest.mark.asyncio
+async def test_worker_cancels_running_job_and_removes_its_output(tmp_path):
+    queue, store = MemoryJobQueue(), MemoryJobStore()
+    output_dir = tmp_path / "job-1"
+    store.create(JobRecord(job_id="job-1", status="queued", content_type="article",
+                           created_at="2024-01-01T00:00:00", output_dir=str(output_dir)))
+    queue.enqueue("job-1", "text", ContentRequest(content_type="article", topic="Queues").model_dump_json())
+
+    stop_event = asyncio.Event()
+    seen_in_thread = []
+    async def slow_process(job_id, request, output_dir):
+        (tmp_path / "job-1" / "partial.txt").write_text("...")
+        store.transition(job_id, ["processing"], status="cancelled")
+        try:
+            await asyncio.sleep(60)
+        finally:
+            # Threads doing the job's blocking work see the cancellation too
+            seen_in_thread.append(await asyncio.to_thread(cancel_requested))
+            stop_event.set()
+
+    with patch('app.jobs.runner.process_content_generation', new=slow_process):
+        await asyncio.wait_for(worker_loop("text", queue, store, stop_event, poll_interval=0.01), timeout=5)
+
+    assert seen_in_thread == [True]
+    assert store.get("job-1").status == "cancelled"
+    assert not output_dir.exists()
+    assert queue.depth()["text"] == {"queued": 0, "running": 0}
+
+@pytest.mark.asyncio
+async def test_worker_skips_job_cancelled_before_it_started(tmp_path):
+    queue, store = MemoryJobQueue(), MemoryJobStore()
+    store.create(JobRecord(job_id="job-1", status="cancelled", content_type="article",
+                           created_at="2024-01-01T00:00:00", output_dir=str(tmp_path / "job-1")))
+    queue.enqueue("job-1", "text", ContentRequest(content_type="article", topic="Queues").model_dump_json())
+
+    with patch('app.jobs.runner.process_content_generation', new=AsyncMock()) as mock_process:
+        stop_event = asyncio.Event()
+        loop_task = asyncio.create_task(worker_loop("text", queue, store, stop_event, poll_interval=0.01))
+        await asyncio.sleep(0.1)
+        stop_event.set()
+        await loop_task
+
+    mock_process.assert_not_called()
+    assert store.get("job-1").status == "cancelled"
+
+def test_heartbeat_renews_only_the_owners_lease(queue):
+    queue.enqueue("a", "video", "{}")
+    queue.claim("video", owner="node-1:10", lease_seconds=30)
+    assert queue.heartbeat("a", "node-1:10", lease_seconds=30) is True
+    assert queue.heartbeat("a", "node-2:20") is False
+    assert queue.running_owners() == ["node-1:10"]
+
+def test_expired_leases_are_requeued_for_another_worker(queue):
+    queue.enqueue("a", "video", "{}")
+    queue.enqueue("b", "video", "{}")
+    queue.claim("video", owner="node-1:10", lease_seconds=10)
+    queue.claim("video", owner="node-2:20", lease_seconds=1000)
+    assert queue.requeue_expired(now=time.time() + 100) == 1
+    assert queue.depth()["video"] == {"queued": 1, "running": 1}
+
+    assert queue.claim("video", owner="node-3:30").job_id == "a"
+    # The stalled worker's late completion leaves the new claim alone
+    queue.complete("a", owner="node-1:10")
+    assert queue.heartbeat("a", "node-1:10") is False
+    assert queue.depth()["video"] == {"queued": 0, "running": 2}
+    queue.complete("a", owner="node-3:30")
+    assert queue.depth()["video"] == {"queued": 0, "running": 1}
+
+def test_items_enqueued_claimed_are_requeued_when_their_owner_stops(queue):
+    queue.enqueue("a", "text", "{}")
+    # A sync job the API runs itself: workers do not claim it while the API's lease is live
+    queue.enqueue_claimed("sync-1", "text", "{}", owner="api:10", lease_seconds=10)
+    assert queue.claim("text", owner="node-1:20").job_id == "a"
+    assert queue.claim("text", owner="node-1:20") is None
+    assert queue.heartbeat("sync-1", "api:10") is True
+
+    assert queue.requeue_expired(now=time.time() + 100) == 2
+    assert {queue.claim("text", owner="node-2:30").job_id for _ in range(2)} == {"a", "sync-1"}
+
+def test_enqueue_replaces_an_item_its_worker_has_not_released(queue):
+    queue.enqueue("a", "text", '{"attempt": 1}')
+    queue.claim("text", owner="node-1:10")
+    # Resumed before the failed run's worker completed its item
+    queue.enqueue("a", "text", '{"attempt": 2}')
+    queue.complete("a", owner="node-1:10")
+
+    item = queue.claim("text", owner="node-2:20")
+    assert (item.job_id, item.payload) == ("a", '{"attempt": 2}')
+    assert queue.running_owners() == ["node-2:20"]
+
+    # An item still waiting in the queue is replaced too, never claimed twice
+    queue.enqueue("b", "text", '{"attempt": 1}')
+    queue.enqueue("b", "text", '{"attempt": 2}', priority=5)
+    assert queue.claim("text").payload == '{"attempt": 2}'
+    assert queue.claim("text") is None
+
+def test_requeue_running_can_target_owners(queue):
+    queue.enqueue("a", "video", "{}")
+    queue.enqueue("b", "video", "{}")
+    queue.claim("video", owner="node-1:10")
+    queue.claim("video", owner="node-2:20")
+    assert queue.requeue_running(owners=["node-1:10"]) == 1
+    assert queue.running_owners() == ["node-2:20"]
+
+def test_sqlite_queue_adds_lease_columns_to_existing_table(tmp_path):
+    path = str(tmp_path / "jobs.db")
+    with sqlite3.connect(path) as conn:
+        conn.execute(
+            "CREATE TABLE job_queue (seq INTEGER PRIMARY KEY AUTOINCREMENT, job_id TEXT NOT NULL UNIQUE, "
+            "job_class TEXT NOT NULL, priority INTEGER NOT NULL DEFAULT 0, state TEXT NOT NULL DEFAULT 'queued', "
+            "payload TEXT NOT NULL, enqueued_at TEXT NOT NULL, started_at TEXT)"
+        )
+        conn.execute("INSERT INTO job_queue (job_id, job_class, state, payload, enqueued_at) "
+                     "VALUES ('old', 'video', 'running', '{}', '2024-01-01T00:00:00')")
+    queue = SQLiteJobQueue(path)
+    # Claimed before leases existed: no expiry, so it is picked up again
+    assert queue.requeue_expired() == 1
+    assert queue.claim("video", owner="node-1:10").job_id == "old"
+    queue.close()
+
+@pytest.mark.asyncio
+async def test_job_stops_when_its_lease_is_lost():
+    queue, store = MemoryJobQueue(), MemoryJobStore()
+    queue.enqueue("a", "video", "{}")
+    queue.claim("video", owner="node-1:10", lease_seconds=0.03)
+    queue.requeue_expired(now=time.time() + 1)  # Another node reaped it
+
+    stopped_because = await asyncio.wait_for(
+        run_cancellable("a", store, asyncio.sleep(60), poll_interval=0.01,
+                        lease=Lease(queue, "a", "node-1:10", seconds=0.03)),
+        timeout=5,
+    )
+    assert stopped_because == "lease_lost"
+
+@pytest.mark.asyncio
+async def test_status_polls_are_not_counted_as_job_store_cache_lookups():
+    from app.jobs.store import CachedJobStore
+    from app.metrics import CACHE_REQUESTS
+    store = CachedJobStore(MemoryJobStore())
+    store.create(JobRecord(job_id="a", status="processing", content_type="article",
+                           created_at="2024-01-01T00:00:00", output_dir="output/a"))
+    before = CACHE_REQUESTS.value(cache="job_store", result="miss")
+
+    assert await run_cancellable("a", store, asyncio.sleep(0.05), poll_interval=0.01) is None
+    assert CACHE_REQUESTS.value(cache="job_store", result="miss") == before
+
+def test_only_one_process_holds_the_worker_lock(tmp_path):
+    from app.worker import acquire_process_lock
+    path = str(tmp_path / ".worker.lock")
+    first = acquire_process_lock(path)
+    assert first is not None
+    assert acquire_process_lock(path) is None
+    first.close()
+    second = acquire_process_lock(path)
+    assert second is not None
+    second.close()
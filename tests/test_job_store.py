@@ -0,0 +1,149 @@
+import pytest
+from datetime import datetime, timedelta
+from unittest.mock import patch
+
+from app.jobs.store import (
+    SQLiteJobStore,
+    MemoryJobStore,
+    CachedJobStore,
+    JobNotFoundError,
+    DuplicateJobError,
+    create_job_store,
+)
+from app.models import JobRecord
+
+def make_record(job_id: str, content_type: str = "story", status: str = "processing", age_minutes: int = 0) -> JobRecord:
+    created_at = (datetime(2024, 1, 1, 12, 0) - timedelta(minutes=age_minutes)).isoformat()
+    return JobRecord(
+        job_id=job_id,
+        status=status,
+        content_type=content_type,
+        created_at=created_at,
+        output_dir=f"output/{job_id}"
+    )
+
+@pytest.fixture(params=["sqlite", "memory"])
+def store(request, tmp_path):
+    if request.param == "sqlite":
+        backend = SQLiteJobStore(str(tmp_path / "jobs.db"))
+    else:
+        backend = MemoryJobStore()
+    yield backend
+    backend.close()
+
+def test_create_and_get_roundtrip(store):
+    store.create(make_record("job-1"))
+    record = store.get("job-1")
+    assert record.job_id == "job-1"
+    assert record.status == "processing"
+    assert record.updated_at == record.created_at
+    assert store.get("missing") is None
+
+def test_update_merges_fields(store):
+    store.create(make_record("job-1"))
+    store.update("job-1", status="completed", output_filename="article.txt", media_type="text/plain")
+    record = store.get("job-1")
+    assert record.status == "completed"
+    assert record.output_filename == "article.txt"
+    assert record.content_type == "story"  # Untouched fields are kept
+
+def test_update_unknown_job_raises(store):
+    with pytest.raises(JobNotFoundError):
+        store.update("missing", status="failed")
+
+def test_list_jobs_filters_and_orders_newest_first(store):
+    store.create(make_record("old-story", "story", "completed", age_minutes=30))
+    store.create(make_record("new-story", "story", "completed", age_minutes=1))
+    store.create(make_record("edu", "educational", "completed", age_minutes=10))
+    store.create(make_record("running", "story", "processing", age_minutes=5))
+    store.create(make_record("article", "article", "completed", age_minutes=2))
+
+    jobs = store.list_jobs(status="completed", content_types=["story", "educational"])
+    assert [job.job_id for job in jobs] == ["new-story", "edu", "old-story"]
+
+    since = (datetime(2024, 1, 1, 12, 0) - timedelta(minutes=15)).isoformat()
+    jobs = store.list_jobs(status="completed", content_types=["story"], since=since)
+    assert [job.job_id for job in jobs] == ["new-story"]
+
+    assert len(store.list_jobs(status="completed", limit=2)) == 2
+
+def test_create_many_and_jobs_in_batch(store):
+    records = [
+        make_record(f"batch-{index}", content_type="tweet_thread").model_copy(
+            update={"batch_id": "b1", "batch_index": index})
+        for index in range(3)
+    ]
+    store.create_many(list(reversed(records)))
+    store.create(make_record("solo"))
+
+    assert [job.job_id for job in store.jobs_in_batch("b1")] == ["batch-0", "batch-1", "batch-2"]
+    assert store.jobs_in_batch("missing") == []
+    assert len(store.events_since(0)) == 4
+
+def test_find_by_fingerprint_returns_newest_match_in_state(store):
+    for job_id, status, age in [("old", "completed", 30), ("new", "completed", 10), ("running", "processing", 0)]:
+        store.create(make_record(job_id, status=status, age_minutes=age).model_copy(update={"fingerprint": "fp"}))
+    store.create(make_record("other", status="completed").model_copy(update={"fingerprint": "other-fp"}))
+
+    assert store.find_by_fingerprint("fp", ["completed"]).job_id == "new"
+    assert store.find_by_fingerprint("fp", ["queued", "processing"]).job_id == "running"
+    assert store.find_by_fingerprint("fp", ["failed"]) is None
+
+def test_idempotency_keys_are_unique(store):
+    store.create(make_record("first").model_copy(update={"idempotency_key": "key-1"}))
+    with pytest.raises(DuplicateJobError):
+        store.create(make_record("second").model_copy(update={"idempotency_key": "key-1"}))
+    assert store.get("second") is None
+    assert store.find_by_idempotency_key("key-1").job_id == "first"
+
+    # Releasing the key lets a new job take it
+    store.update("first", idempotency_key=None)
+    store.create(make_record("third").model_copy(update={"idempotency_key": "key-1"}))
+    assert store.find_by_idempotency_key("key-1").job_id == "third"
+
+def test_transition_only_applies_from_expected_status(store):
+    store.create(make_record("job-1", status="queued"))
+    assert store.transition("job-1", ["completed", "failed"], status="expired") is None
+    assert store.get("job-1").status == "queued"
+    assert store.transition("job-1", ["queued"], status="processing").status == "processing"
+    assert store.transition("missing", ["queued"], status="processing") is None
+
+def test_sqlite_store_persists_across_instances(tmp_path):
+    path = str(tmp_path / "jobs.db")
+    first = SQLiteJobStore(path)
+    first.create(make_record("job-1"))
+    first.update("job-1", status="failed", error="boom")
+    first.close()
+
+    second = SQLiteJobStore(path)
+    record = second.get("job-1")
+    assert record.status == "failed"
+    assert record.error == "boom"
+    journal_mode = second._connect().execute("PRAGMA journal_mode").fetchone()[0]
+    assert journal_mode == "wal"
+    second.close()
+
+def test_cached_store_only_caches_terminal_jobs():
+    backend = MemoryJobStore()
+    store = CachedJobStore(backend, max_size=2)
+    store.create(make_record("job-1"))
+    store.update("job-1", status="completed")
+
+    # Served from the LRU without touching the backend
+    with patch.object(backend, "get", side_effect=AssertionError("backend hit")):
+        assert store.get("job-1").status == "completed"
+
+    # Running jobs always read through, as another process may update them
+    store.create(make_record("job-2"))
+    backend.update("job-2", status="completed")
+    assert store.get("job-2").status == "completed"
+
+def test_cached_store_is_bounded():
+    store = CachedJobStore(MemoryJobStore(), max_size=2)
+    for job_id in ["a", "b", "c"]:
+        store.create(make_record(job_id, status="completed"))
+    assert list(store._cache.keys()) == ["b", "c"]
+
+def test_create_job_store_rejects_unknown_backend():
+    with pytest.raises(ValueError):
+        create_job_store("redis")
@@ -0,0 +1,105 @@
+import pytest
+from unittest.mock import AsyncMock, patch
+
+from app.llm_cache import LLMCache, cache_key, current_cache_mode
+from app.llm_clients import CompletionError, generate_text_completion, stream_text_completion
+
+@pytest.fixture
+def provider():
+    with patch('app.llm_clients.LLM_PROVIDER', 'openai'), \
+         patch('app.llm_clients._generate_text_completion', new_callable=AsyncMock) as complete:
+        complete.return_value = "Queues are lines."
+        yield complete
+
+def test_entries_expire_after_the_ttl(tmp_path, monkeypatch):
+    cache = LLMCache(str(tmp_path / "cache.db"), max_bytes=1024, ttl_seconds=60)
+    monkeypatch.setattr("app.llm_cache.time.time", lambda: 1000.0)
+    cache.put("a", "first")
+    assert cache.get("a") == "first"
+    monkeypatch.setattr("app.llm_cache.time.time", lambda: 1061.0)
+    assert cache.get("a") is None
+    assert cache.stats() == {"entries": 0, "size_bytes": 0, "hits": 1, "misses": 1}
+
+def test_least_recently_used_entries_are_evicted_beyond_the_size_cap(tmp_path, monkeypatch):
+    cache = LLMCache(str(tmp_path / "cache.db"), max_bytes=20, ttl_seconds=0)
+    for now, key in enumerate(["a", "b"]):
+        monkeypatch.setattr("app.llm_cache.time.time", lambda now=now: float(now))
+        cache.put(key, "x" * 8)
+    monkeypatch.setattr("app.llm_cache.time.time", lambda: 2.0)
+    assert cache.get("a") == "x" * 8  # Now b is the least recently used
+    monkeypatch.setattr("app.llm_cache.time.time", lambda: 3.0)
+    cache.put("c", "x" * 8)
+
+    assert cache.get("b") is None
+    assert cache.get("a") == cache.get("c") == "x" * 8
+    assert cache.stats()["size_bytes"] == 16
+
+def test_keys_ignore_whitespace_but_not_parameters():
+    key = cache_key("openai", "gpt-4", "Write about\n    queues ", None, 0.7, 500)
+    assert cache_key("openai", "gpt-4", "Write  about\r\nqueues", "", 0.7, 500) == key
+    assert cache_key("openai", "gpt-4", "Write about\nqueues", None, 0.2, 500) != key
+    assert cache_key("ollama", "llama2", "Write about\nqueues", None, 0.7, 500) != key
+
+@pytest.mark.asyncio
+async def test_identical_prompts_are_answered_from_the_cache(provider, llm_cache):
+    assert await generate_text_completion("Write about queues", max_tokens=500) == "Queues are lines."
+    assert await generate_text_completion("Write about  queues ", max_tokens=500) == "Queues are lines."
+    await generate_text_completion("Write about queues", max_tokens=800)
+
+    assert provider.await_count == 2
+    assert llm_cache.stats()["hits"] == 1
+
+@pytest.mark.asyncio
+async def test_errors_are_not_cached(provider):
+    provider.return_value = "Error: rate limited"
+    await generate_text_completion("Write about queues")
+    await generate_text_completion("Write about queues")
+    assert provider.await_count == 2
+
+@pytest.mark.asyncio
+async def test_cache_modes(provider):
+    assert await generate_text_completion("Write about queues", cache="only") == \
+        "Error: No cached response for this prompt (cache=only)."
+    provider.assert_not_awaited()
+
+    await generate_text_completion("Write about queues")
+    provider.return_value = "Queues are FIFO."
+    # bypass calls the provider and refreshes the entry, which `only` then serves
+    assert await generate_text_completion("Write about queues", cache="bypass") == "Queues are FIFO."
+    assert await generate_text_completion("Write about queues", cache="only") == "Queues are FIFO."
+    assert provider.await_count == 2
+
+    # Jobs set the mode from their request
+    token = current_cache_mode.set("bypass")
+    try:
+        await generate_text_completion("Write about queues")
+    finally:
+        current_cache_mode.reset(token)
+    assert provider.await_count == 3
+
+@pytest.mark.asyncio
+async def test_streamed_responses_are_cached_once_complete(llm_cache):
+    calls = []
+    async def stream(*args):
+        calls.append(args)
+        for text in ["Queues ", "are ", "lines.\n"]:
+            yield text
+
+    async def collect(prompt="Write about queues", **kwargs):
+        return [text async for text in stream_text_completion(prompt, **kwargs)]
+
+    with patch('app.llm_clients.LLM_PROVIDER', 'openai'), patch('app.llm_clients._stream_text_completion', new=stream):
+        assert await collect() == ["Queues ", "are ", "lines.\n"]
+        # Stored stripped, as the non-streaming calls that share the entry return their text
+        assert await collect() == ["Queues are lines."]
+        assert await generate_text_completion("Write about queues") == "Queues are lines."
+        assert len(calls) == 1
+        with pytest.raises(CompletionError, match="cache=only"):
+            await collect("Write about stacks", cache="only")
+
+@pytest.mark.asyncio
+async def test_prompts_meant_to_vary_skip_the_cache(provider, llm_cache):
+    await generate_text_completion("Pick any topic", cacheable=False)
+    await generate_text_completion("Pick any topic", cacheable=False)
+    assert provider.await_count == 2
+    assert llm_cache.stats() == {"entries": 0, "size_bytes": 0, "hits": 0, "misses": 0}
@@ -72,3 +72,109 @@ async def test_generate_text_completion_anthropic_api_exception():
 
             result = await generate_text_completion("test prompt for anthropic exception")
             assert "Error: Anthropic generation failed. Reason: Anthropic API Error" in result
+
+async def collect_stream(**kwargs):
+    from app.llm_clients import stream_text_completion
+    return [chunk async for chunk in stream_text_completion("test prompt", **kwargs)]
+
+@pytest.mark.asyncio
+async def test_stream_text_completion_relays_openai_deltas():
+    from types import SimpleNamespace
+    async def chunks():
+        for text in ["Once", None, " upon"]:
+            yield SimpleNamespace(choices=[SimpleNamespace(delta=SimpleNamespace(content=text))])
+
+    client = AsyncMock()
+    client.chat.completions.create = AsyncMock(return_value=chunks())
+    with patch('app.llm_clients.LLM_PROVIDER', 'openai'), patch('app.llm_clients.openai_client', client):
+        assert await collect_stream() == ["Once", " upon"]
+    assert client.chat.completions.create.call_args.kwargs["stream"] is True
+
+@pytest.mark.asyncio
+async def test_stream_text_completion_reads_anthropic_stream():
+    from types import SimpleNamespace
+    async def events():
+        for text in ["Hello", " there"]:
+            yield SimpleNamespace(completion=text)
+
+    client = AsyncMock()
+    client.completions.create = AsyncMock(return_value=events())
+    with patch('app.llm_clients.LLM_PROVIDER', 'anthropic'), patch('app.llm_clients.anthropic_client', client):
+        assert await collect_stream() == ["Hello", " there"]
+    assert client.completions.create.call_args.kwargs["stream"] is True
+
+@pytest.mark.asyncio
+async def test_stream_text_completion_parses_ollama_lines():
+    import httpx
+    from app.llm_clients import CompletionError
+
+    def respond(request):
+        lines = ['{"response": "Why", "done": false}', '{"response": " blue", "done": false}', '{"response": "", "done": true}']
+        return httpx.Response(200, text="\n".join(lines))
+
+    def ollama(handler):
+        return httpx.AsyncClient(transport=httpx.MockTransport(handler), base_url="http://ollama")
+
+    with patch('app.llm_clients.LLM_PROVIDER', 'ollama'), patch('app.providers.get_ollama_client', return_value=ollama(respond)):
+        assert await collect_stream() == ["Why", " blue"]
+
+    failing = ollama(lambda request: httpx.Response(500))
+    with patch('app.llm_clients.LLM_PROVIDER', 'ollama'), patch('app.providers.get_ollama_client', return_value=failing):
+        with pytest.raises(CompletionError, match="500"):
+            # The first response is cached by now
+            await collect_stream(cache="bypass")
+
+def ollama_client(handler):
+    import httpx
+    return httpx.AsyncClient(transport=httpx.MockTransport(handler), base_url="http://ollama")
+
+@pytest.mark.asyncio
+async def test_generate_text_completion_routes_to_ollama():
+    import json
+    import httpx
+    from app import config
+    from app.metrics import PROVIDER_SECONDS
+    payloads = []
+    def respond(request):
+        payloads.append(json.loads(request.content))
+        return httpx.Response(200, json={"response": " Blue. ", "done": True})
+
+    def completions():
+        series = {tuple(key): value for key, value in PROVIDER_SECONDS.snapshot()["series"]}
+        return series.get(("ollama", "completion", "none", "ok"), {}).get("count", 0)
+
+    before = completions()
+    with patch('app.llm_clients.LLM_PROVIDER', 'ollama'), \
+         patch('app.providers.get_ollama_client', return_value=ollama_client(respond)), \
+         patch.object(config, 'OLLAMA_KEEP_ALIVE', '-1'), patch.object(config, 'OLLAMA_NUM_CTX', 8192):
+        result = await generate_text_completion("Why is the sky blue?", max_tokens=50, system_prompt="Be brief.")
+
+    assert result == "Blue."
+    assert payloads == [{
+        "model": config.OLLAMA_MODEL_NAME, "keep_alive": -1, "prompt": "Why is the sky blue?", "stream": False,
+        "system": "Be brief.", "options": {"temperature": 0.7, "num_predict": 50, "num_ctx": 8192}
+    }]
+    # Timed once, by generate_text_completion
+    assert completions() == before + 1
+
+@pytest.mark.asyncio
+async def test_ollama_requests_are_limited_to_num_parallel():
+    import asyncio
+    import httpx
+    from app import config
+    from app.llm_clients import generate_ollama_completion
+    in_flight, peak = 0, 0
+    async def respond(request):
+        nonlocal in_flight, peak
+        in_flight += 1
+        peak = max(peak, in_flight)
+        await asyncio.sleep(0.01)
+        in_flight -= 1
+        return httpx.Response(200, json={"response": "ok", "done": True})
+
+    with patch.object(config, 'OLLAMA_NUM_PARALLEL', 2), \
+         patch('app.providers._create_ollama_client', return_value=ollama_client(respond)):
+        results = await asyncio.gather(*(generate_ollama_completion(f"prompt {i}") for i in range(6)))
+
+    assert results == ["ok"] * 6
+    assert peak == 2
@@ -0,0 +1,128 @@
+import json
+import os
+import time
+import pytest
+
+from app.metrics import (
+    Counter,
+    Histogram,
+    Registry,
+    collect,
+    merge,
+    render,
+    timed,
+    current_content_type,
+    write_snapshot,
+    PROVIDER_SECONDS,
+)
+
+@pytest.fixture
+def registry():
+    registry = Registry()
+    registry.register(Histogram("test_seconds", "Test durations.", ("stage",), buckets=(0.1, 1.0)))
+    registry.register(Counter("content_cache_requests_total", "Cache lookups.", ("cache", "result")))
+    return registry
+
+def test_histogram_renders_cumulative_buckets(registry):
+    histogram = registry._metrics["test_seconds"]
+    for value in (0.05, 0.1, 0.5, 3.0):
+        histogram.observe(value, stage="render")
+
+    text = render(registry.snapshot())
+    assert '# TYPE test_seconds histogram' in text
+    assert 'test_seconds_bucket{stage="render",le="0.1"} 2' in text
+    assert 'test_seconds_bucket{stage="render",le="1"} 3' in text
+    assert 'test_seconds_bucket{stage="render",le="+Inf"} 4' in text
+    assert 'test_seconds_sum{stage="render"} 3.65' in text
+    assert 'test_seconds_count{stage="render"} 4' in text
+
+def test_labels_must_match(registry):
+    with pytest.raises(ValueError):
+        registry._metrics["test_seconds"].observe(1.0, provider="openai")
+
+def test_merge_adds_series_from_each_process(registry):
+    registry._metrics["test_seconds"].observe(0.5, stage="render")
+    registry._metrics["content_cache_requests_total"].inc(cache="prompt_template", result="hit")
+    snapshot = registry.snapshot()
+
+    merged = merge([snapshot, json.loads(json.dumps(snapshot))])
+    (key, histogram), = merged["test_seconds"]["series"]
+    assert histogram["count"] == 2 and histogram["counts"] == [0, 2, 0]
+    assert merged["content_cache_requests_total"]["series"] == [[["prompt_template", "hit"], 2]]
+
+def test_collect_reads_live_snapshots_and_derives_hit_ratio(registry, tmp_path, monkeypatch):
+    counter = registry._metrics["content_cache_requests_total"]
+    counter.inc(3, cache="prompt_template", result="hit")
+    counter.inc(cache="prompt_template", result="miss")
+    # Written "by another process": this pid's own file is never read back
+    monkeypatch.setattr("app.metrics.os.getpid", lambda: 1)
+    write_snapshot(str(tmp_path), registry)
+    monkeypatch.undo()
+    # A snapshot left by a process that is gone is removed
+    (tmp_path / "999999999.json").write_text("{}")
+
+    snapshot = collect(str(tmp_path), Registry())
+    assert snapshot["content_cache_hit_ratio"]["series"] == [[["prompt_template"], 0.75]]
+    assert not (tmp_path / "999999999.json").exists()
+
+def test_collect_drops_snapshots_other_nodes_stopped_writing(registry, tmp_path):
+    registry._metrics["content_cache_requests_total"].inc(cache="prompt_template", result="hit")
+    for name in ("render-node-42.json", "old-node-43.json"):
+        (tmp_path / name).write_text(json.dumps(registry.snapshot()))
+    stale = time.time() - 3600
+    os.utime(tmp_path / "old-node-43.json", (stale, stale))
+
+    snapshot = collect(str(tmp_path), Registry())
+    assert snapshot["content_cache_requests_total"]["series"] == [[["prompt_template", "hit"], 1]]
+    assert not (tmp_path / "old-node-43.json").exists()
+
+@pytest.mark.asyncio
+async def test_timed_records_outcome_and_content_type():
+    @timed("openai", "test_completion")
+    async def complete(fail: bool):
+        return "Error: quota exceeded" if fail else "Once upon a time"
+
+    token = current_content_type.set("article")
+    try:
+        await complete(False)
+        await complete(True)
+    finally:
+        current_content_type.reset(token)
+
+    series = {tuple(key): value for key, value in PROVIDER_SECONDS.snapshot()["series"]}
+    assert series[("openai", "test_completion", "article", "ok")]["count"] == 1
+    assert series[("openai", "test_completion", "article", "error")]["count"] == 1
+
+@pytest.mark.asyncio
+async def test_timed_streams_record_time_to_first_chunk():
+    from app.metrics import PROVIDER_FIRST_CHUNK_SECONDS
+
+    @timed("openai", "test_stream")
+    async def stream():
+        yield "Once"
+        yield " upon"
+
+    assert [chunk async for chunk in stream()] == ["Once", " upon"]
+    series = {tuple(key): value for key, value in PROVIDER_FIRST_CHUNK_SECONDS.snapshot()["series"]}
+    assert series[("openai", "test_stream", "none")]["count"] == 1
+    series = {tuple(key): value for key, value in PROVIDER_SECONDS.snapshot()["series"]}
+    assert series[("openai", "test_stream", "none", "ok")]["count"] == 1
+
+@pytest.mark.asyncio
+async def test_anthropic_generators_are_timed(monkeypatch):
+    from app.generators.anthropic_content import generate_podcast_script_anthropic, generate_story_anthropic
+    from app.generators.educational import generate_educational_content
+    for module in ["anthropic_content", "educational"]:
+        monkeypatch.setattr(f"app.generators.{module}.TEST_MODE", True)
+
+    token = current_content_type.set("story")
+    try:
+        await generate_story_anthropic("A knight")
+        await generate_educational_content("Queues")
+        await generate_podcast_script_anthropic("Queues")
+    finally:
+        current_content_type.reset(token)
+
+    series = {tuple(key): value for key, value in PROVIDER_SECONDS.snapshot()["series"]}
+    for operation in ["story", "educational", "podcast_script"]:
+        assert series[("anthropic", operation, "story", "ok")]["count"] >= 1
@@ -0,0 +1,67 @@
+import pytest
+import asyncio
+import time
+
+from app.jobs.pipeline import Stage, StageGraphError, run_stages, validate_stages
+
+pytestmark = pytest.mark.asyncio
+
+def sleeper(seconds: float, value):
+    async def stage(deps):
+        await asyncio.sleep(seconds)
+        return value
+    return stage
+
+async def test_independent_stages_run_concurrently():
+    stages = [
+        Stage("images", sleeper(0.2, "images")),
+        Stage("voice_over", sleeper(0.2, "voice")),
+        Stage("background_music", sleeper(0.2, "music")),
+    ]
+    started = time.perf_counter()
+    results, timings = await run_stages(stages)
+    elapsed = time.perf_counter() - started
+
+    assert results == {"images": "images", "voice_over": "voice", "background_music": "music"}
+    assert elapsed < 0.5  # Roughly max(stage), not sum(stage)
+    assert set(timings) == {"images", "voice_over", "background_music"}
+
+async def test_stage_receives_dependency_results():
+    async def video(deps):
+        return f"{deps['images']}+{deps['voice_over']}"
+
+    stages = [
+        Stage("video", video, deps=("images", "voice_over")),
+        Stage("images", sleeper(0.01, "img")),
+        Stage("voice_over", sleeper(0.02, "vo")),
+    ]
+    completed = []
+    results, _ = await run_stages(stages, on_stage_complete=lambda name, result, seconds: completed.append(name))
+    assert results["video"] == "img+vo"
+    assert completed[-1] == "video"
+
+async def test_failing_stage_cancels_running_stages():
+    cancelled = asyncio.Event()
+
+    async def slow(deps):
+        try:
+            await asyncio.sleep(5)
+        except asyncio.CancelledError:
+            cancelled.set()
+            raise
+
+    async def broken(deps):
+        raise RuntimeError("provider down")
+
+    with pytest.raises(RuntimeError, match="provider down"):
+        await run_stages([Stage("slow", slow), Stage("broken", broken)])
+    assert cancelled.is_set()
+
+async def test_validate_stages_rejects_bad_graphs():
+    noop = sleeper(0, None)
+    with pytest.raises(StageGraphError, match="unknown stage"):
+        validate_stages([Stage("video", noop, deps=("images",))])
+    with pytest.raises(StageGraphError, match="cycle"):
+        validate_stages([Stage("a", noop, deps=("b",)), Stage("b", noop, deps=("a",))])
+    with pytest.raises(StageGraphError, match="Duplicate"):
+        validate_stages([Stage("a", noop), Stage("a", noop)])
@@ -128,3 +128,16 @@ def test_load_prompt_handles_io_error_gracefully():
             m.side_effect = IOError("Disk full")
             result = load_prompt("any_prompt.txt")
     assert "Error loading prompt 'any_prompt.txt': Disk full" in result
+
+def test_load_prompt_reads_an_unchanged_template_once(tmp_path):
+    template = tmp_path / "cached_prompt.txt"
+    template.write_text("Write about {topic}.", encoding="utf-8")
+    with patch('app.utils.prompt_loader.PROMPTS_DIR', tmp_path):
+        with patch('builtins.open', wraps=open) as m:
+            assert load_prompt("cached_prompt.txt", topic="cats") == "Write about cats."
+            assert load_prompt("cached_prompt.txt", topic="dogs") == "Write about dogs."
+        assert m.call_count == 1
+
+        # Editing the template invalidates the cached copy
+        template.write_text("Describe {topic} in detail.", encoding="utf-8")
+        assert load_prompt("cached_prompt.txt", topic="cats") == "Describe cats in detail."
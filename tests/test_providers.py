@@ -0,0 +1,205 @@
+import pytest
+from unittest.mock import MagicMock, patch
+
+from app import config, providers
+from app.import_budget import measure
+
+@pytest.fixture(autouse=True)
+def fresh_clients():
+    providers.reset_clients()
+    yield
+    providers.reset_clients()
+
+def test_client_is_created_once_on_first_use(monkeypatch):
+    monkeypatch.setattr(config, "STABILITY_KEY", "sk-test")
+    factory = MagicMock()
+    with patch.dict(providers._FACTORIES, {"stability": ("stability", factory)}):
+        assert providers.get_stability_client() is providers.get_stability_client()
+    factory.assert_called_once_with("sk-test")
+
+def test_missing_key_fails_only_when_the_client_is_needed(monkeypatch):
+    monkeypatch.setattr(config, "ELEVENLABS_KEY", None)
+    with pytest.raises(providers.ProviderNotConfiguredError, match="ELEVENLABS_KEY"):
+        providers.get_async_elevenlabs_client()
+
+def test_missing_keys_are_checked_per_content_type(monkeypatch):
+    monkeypatch.setattr(config, "TEST_MODE", False)
+    monkeypatch.setattr(config, "LLM_PROVIDER", "openai")
+    monkeypatch.setattr(config, "OPENAI_KEY", "sk-test")
+    monkeypatch.setattr(config, "STABILITY_KEY", None)
+    monkeypatch.setattr(config, "ELEVENLABS_KEY", None)
+
+    assert providers.missing_keys("article") == []
+    assert providers.missing_keys("podcast") == ["ELEVENLABS_KEY"]
+    assert providers.missing_keys("story") == ["ELEVENLABS_KEY", "STABILITY_KEY"]
+
+    monkeypatch.setattr(config, "TEST_MODE", True)
+    assert providers.missing_keys("story") == []
+
+def test_text_worker_starts_without_keys_or_media_packages(monkeypatch):
+    for key in providers.PROVIDER_KEYS.values():
+        monkeypatch.delenv(key, raising=False)
+    report = measure(["app.worker", "app.jobs.runner"])
+    assert report.heavy == []
+    assert report.total_seconds > 0
+
+@pytest.mark.asyncio
+async def test_ollama_client_is_pooled_and_closed_at_shutdown():
+    client = providers.get_ollama_client()
+    assert providers.get_ollama_client() is client
+    assert str(client.base_url).rstrip("/") == config.OLLAMA_API_BASE_URL
+    await providers.close_ollama_client()
+    assert client.is_closed
+
+@pytest.mark.asyncio
+async def test_ollama_warm_up_loads_the_model(monkeypatch):
+    import json
+    import httpx
+    monkeypatch.setattr(config, "OLLAMA_KEEP_ALIVE", "1h")
+    monkeypatch.setattr(config, "OLLAMA_NUM_CTX", 4096)
+    requests = []
+    def respond(request):
+        requests.append((request.url.path, json.loads(request.content)))
+        return httpx.Response(200, json={"done": True})
+
+    client = httpx.AsyncClient(transport=httpx.MockTransport(respond), base_url="http://ollama")
+    with patch('app.providers._create_ollama_client', return_value=client):
+        assert await providers.warm_up_ollama()
+        await providers.close_ollama_client()
+    # Loaded with the settings real requests use, so they do not trigger a reload
+    assert requests == [("/api/generate", {"model": config.OLLAMA_MODEL_NAME, "keep_alive": "1h", "options": {"num_ctx": 4096}})]
+
+    failing = httpx.AsyncClient(transport=httpx.MockTransport(lambda request: httpx.Response(404)))
+    with patch('app.providers._create_ollama_client', return_value=failing):
+        assert not await providers.warm_up_ollama()
+        await providers.close_ollama_client()
+
+# How long each fake provider call takes; blocking the loop for it would show up as lag
+CALL_SECONDS = 0.3
+
+def fake_clients():
+    """Fakes for every provider client: Stability blocks its thread, the async ones only await."""
+    import asyncio
+    import time
+    from types import SimpleNamespace
+
+    response = SimpleNamespace(
+        completion="Once upon a time",
+        choices=[SimpleNamespace(message=SimpleNamespace(content="Speaker 1: Queues hold work\nSpeaker 2: In order"))]
+    )
+    def blocking(result):
+        def call(*args, **kwargs):
+            time.sleep(CALL_SECONDS)
+            return result() if callable(result) else result
+        return call
+    async def events():
+        yield SimpleNamespace(completion="Once", choices=[SimpleNamespace(delta=SimpleNamespace(content="Once"))])
+    async def awaiting(*args, stream=False, **kwargs):
+        await asyncio.sleep(CALL_SECONDS)
+        return events() if stream else response
+    async def speech(*args, **kwargs):
+        await asyncio.sleep(CALL_SECONDS)
+        yield b"mp3"
+
+    clients = {name: MagicMock() for name in providers._FACTORIES}
+    clients["stability"].generate.side_effect = blocking(lambda: (answer for answer in ()))
+    clients["async_anthropic"].completions.create = awaiting
+    clients["async_openai"].chat.completions.create = awaiting
+    clients["async_elevenlabs"].text_to_speech.convert = speech
+    return clients
+
+async def max_loop_lag(coro) -> float:
+    """Await `coro` and return the longest the event loop went without running another task."""
+    import asyncio
+    loop = asyncio.get_running_loop()
+    lag = 0.0
+    async def heartbeat():
+        nonlocal lag
+        while True:
+            start = loop.time()
+            await asyncio.sleep(0.01)
+            lag = max(lag, loop.time() - start - 0.01)
+
+    task = asyncio.create_task(heartbeat())
+    await asyncio.sleep(0)
+    try:
+        await coro
+        await asyncio.sleep(0.02)  # Lets the heartbeat notice a block at the very end
+    finally:
+        task.cancel()
+    return lag
+
+def provider_calls(tmp_path):
+    from app.generators.anthropic_content import generate_story_anthropic
+    from app.generators.audio import _generate_voice_over
+    from app.generators.educational import generate_educational_content
+    from app.generators.image import _generate_image
+    from app.generators.podcast import generate_dialogue_content
+    from app.llm_clients import generate_text_completion, stream_text_completion
+
+    async def stream():
+        async for _ in stream_text_completion("Tell a story"):
+            pass
+
+    return {
+        "story": lambda: generate_story_anthropic("A knight"),
+        "educational": lambda: generate_educational_content("Queues"),
+        "text_completion": lambda: generate_text_completion("Tell a story"),
+        "text_stream": stream,
+        "dialogue": lambda: generate_dialogue_content("Queues"),
+        "image": lambda: _generate_image("A cat", str(tmp_path / "cat.jpg")),
+        "voice_over": lambda: _generate_voice_over("Hello", str(tmp_path / "hello.mp3"), "voice-id"),
+    }
+
+@pytest.mark.asyncio
+async def test_loop_lag_check_detects_blocking_calls():
+    import time
+    async def blocks():
+        time.sleep(CALL_SECONDS)
+    assert await max_loop_lag(blocks()) >= CALL_SECONDS * 0.9
+
+@pytest.mark.asyncio
+@pytest.mark.parametrize("name", ["story", "educational", "text_completion", "text_stream", "dialogue", "image", "voice_over"])
+@pytest.mark.parametrize("llm_provider", ["anthropic", "openai"])
+async def test_provider_calls_never_block_the_event_loop(monkeypatch, tmp_path, name, llm_provider):
+    import time
+    for module in ["anthropic_content", "audio", "educational", "image", "podcast"]:
+        monkeypatch.setattr(f"app.generators.{module}.TEST_MODE", False)
+    monkeypatch.setattr("app.llm_clients.LLM_PROVIDER", llm_provider)
+    clients = fake_clients()
+    monkeypatch.setattr(providers, "get_client", clients.__getitem__)
+
+    start = time.monotonic()
+    lag = await max_loop_lag(provider_calls(tmp_path)[name]())
+    # The (slow) provider was called, and other tasks kept running meanwhile
+    assert time.monotonic() - start >= CALL_SECONDS
+    assert lag < CALL_SECONDS / 2
+
+@pytest.mark.asyncio
+async def test_blocking_calls_run_on_the_bounded_provider_pool(monkeypatch):
+    import asyncio
+    import threading
+    import time
+    from app.cancellation import cancel_requested, current_cancel_event
+    monkeypatch.setattr(config, "PROVIDER_THREADS", 2)
+    monkeypatch.setattr(providers, "_executor", None)
+    running, most = 0, 0
+    lock = threading.Lock()
+    def call():
+        nonlocal running, most
+        with lock:
+            running += 1
+            most = max(most, running)
+        time.sleep(0.05)
+        with lock:
+            running -= 1
+        return threading.current_thread().name, cancel_requested()
+
+    event = threading.Event()
+    event.set()
+    current_cancel_event.set(event)
+    results = await asyncio.gather(*(providers.run_blocking(call) for _ in range(6)))
+    # The job's cancel event is visible on the provider threads
+    assert all(name.startswith("provider") and cancelled for name, cancelled in results)
+    assert most == 2
+    providers._executor.shutdown()
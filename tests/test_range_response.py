@@ -0,0 +1,89 @@
+import pytest
+from starlette.applications import Starlette
+from starlette.routing import Route
+from starlette.testclient import TestClient
+
+from app.utils.range_response import RangeFileResponse, RangeStaticFiles, parse_range_header
+
+CONTENT = bytes(range(256)) * 4  # 1024 bytes
+
+@pytest.fixture
+def client(tmp_path):
+    path = tmp_path / "video.mp4"
+    path.write_bytes(CONTENT)
+
+    async def video(request):
+        return RangeFileResponse(str(path), media_type="video/mp4")
+
+    return TestClient(Starlette(routes=[Route("/video", video, methods=["GET", "HEAD"])]))
+
+def test_parse_range_header():
+    assert parse_range_header("bytes=0-99", 1000) == [(0, 99)]
+    assert parse_range_header("bytes=900-", 1000) == [(900, 999)]
+    assert parse_range_header("bytes=-100", 1000) == [(900, 999)]
+    assert parse_range_header("bytes=0-5000", 1000) == [(0, 999)]
+    # Overlapping and adjacent ranges are merged
+    assert parse_range_header("bytes=50-99, 0-49, 200-300, 250-400", 1000) == [(0, 99), (200, 400)]
+    assert parse_range_header("bytes=1000-", 1000) == []
+    assert parse_range_header("items=0-1", 1000) is None
+    assert parse_range_header("bytes=5-1", 1000) is None
+
+def test_full_response_advertises_ranges(client):
+    response = client.get("/video")
+    assert response.status_code == 200
+    assert response.content == CONTENT
+    assert response.headers["accept-ranges"] == "bytes"
+    assert response.headers["content-length"] == "1024"
+
+def test_single_range_returns_206(client):
+    response = client.get("/video", headers={"Range": "bytes=100-199"})
+    assert response.status_code == 206
+    assert response.headers["content-range"] == "bytes 100-199/1024"
+    assert response.headers["content-length"] == "100"
+    assert response.content == CONTENT[100:200]
+
+def test_multiple_ranges_return_multipart_byteranges(client):
+    response = client.get("/video", headers={"Range": "bytes=0-9, 1000-"})
+    assert response.status_code == 206
+    content_type = response.headers["content-type"]
+    assert content_type.startswith("multipart/byteranges; boundary=")
+    boundary = content_type.split("boundary=")[1]
+    assert int(response.headers["content-length"]) == len(response.content)
+
+    parts = response.content.split(f"--{boundary}".encode())
+    assert parts[-1] == b"--\r\n"
+    assert parts[1].endswith(b"\r\n\r\n" + CONTENT[0:10] + b"\r\n")
+    assert b"Content-Range: bytes 1000-1023/1024" in parts[2]
+    assert parts[2].endswith(CONTENT[1000:] + b"\r\n")
+
+def test_unsatisfiable_range_returns_416(client):
+    response = client.get("/video", headers={"Range": "bytes=5000-"})
+    assert response.status_code == 416
+    assert response.headers["content-range"] == "bytes */1024"
+
+def test_if_range_and_if_none_match(client):
+    etag = client.get("/video").headers["etag"]
+
+    current = client.get("/video", headers={"Range": "bytes=0-9", "If-Range": etag})
+    assert current.status_code == 206
+    stale = client.get("/video", headers={"Range": "bytes=0-9", "If-Range": '"stale"'})
+    assert stale.status_code == 200
+    assert stale.content == CONTENT
+
+    assert client.get("/video", headers={"If-None-Match": etag}).status_code == 304
+
+def test_head_sends_headers_only(client):
+    response = client.head("/video", headers={"Range": "bytes=0-9"})
+    assert response.status_code == 206
+    assert response.headers["content-length"] == "10"
+    assert response.content == b""
+
+def test_static_files_answer_if_modified_since_with_304(tmp_path):
+    (tmp_path / "video.mp4").write_bytes(CONTENT)
+    client = TestClient(RangeStaticFiles(directory=str(tmp_path)))
+    last_modified = client.get("/video.mp4").headers["last-modified"]
+
+    response = client.get("/video.mp4", headers={"If-Modified-Since": last_modified, "Range": "bytes=0-9"})
+    assert response.status_code == 304
+    assert response.content == b""
+    assert client.get("/video.mp4", headers={"Range": "bytes=0-9"}).status_code == 206
@@ -0,0 +1,32 @@
+import httpx
+import pytest
+
+import app.main as main
+from app.jobs.queue import MemoryJobQueue
+from app.jobs.store import MemoryJobStore
+from app.models import JobRecord
+
+@pytest.fixture
+def store(monkeypatch, tmp_path):
+    store, queue = MemoryJobStore(), MemoryJobQueue()
+    monkeypatch.setattr(main, "job_store", store)
+    monkeypatch.setattr(main, "job_queue", queue)
+    monkeypatch.setattr(main.admission, "store", store)
+    monkeypatch.setattr(main.admission, "queue", queue)
+    store.create(JobRecord(job_id="job-1", status="failed", content_type="article", job_class="text",
+                           created_at="2024-01-01T00:00:00", output_dir=str(tmp_path), error="Timeout",
+                           request={"content_type": "article", "topic": "Queues"}))
+    return store
+
+@pytest.mark.asyncio
+async def test_a_failed_job_is_resumed_once(store):
+    async with httpx.AsyncClient(app=main.app, base_url="http://api") as client:
+        first = await client.post("/jobs/job-1/resume")
+        second = await client.post("/jobs/job-1/resume")
+
+    assert first.status_code == 200
+    assert second.status_code == 409
+    job = store.get("job-1")
+    assert (job.status, job.error) == ("queued", None)
+    assert main.job_queue.claim("text").job_id == "job-1"
+    assert main.job_queue.claim("text") is None
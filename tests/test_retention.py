@@ -0,0 +1,119 @@
+import os
+import pytest
+from datetime import datetime, timedelta
+
+from app.jobs.blobs import BlobStore
+from app.jobs.retention import RetentionManager, path_size
+from app.jobs.store import MemoryJobStore
+from app.models import JobRecord
+
+NOW = datetime(2024, 6, 1, 12, 0)
+
+def add_job(store, output_root, job_id, content_type="article", status="completed",
+            hours_ago=1.0, size=1000, last_accessed_hours_ago=None):
+    output_dir = os.path.join(output_root, job_id)
+    os.makedirs(output_dir, exist_ok=True)
+    with open(os.path.join(output_dir, "content.txt"), "wb") as f:
+        f.write(b"x" * size)
+    finished_at = (NOW - timedelta(hours=hours_ago)).isoformat()
+    store.create(JobRecord(
+        job_id=job_id,
+        status=status,
+        content_type=content_type,
+        created_at=finished_at,
+        output_dir=output_dir,
+        completed_at=finished_at if status == "completed" else None,
+        last_accessed_at=(NOW - timedelta(hours=last_accessed_hours_ago)).isoformat()
+        if last_accessed_hours_ago is not None else None
+    ))
+    return output_dir
+
+@pytest.fixture
+def setup(tmp_path):
+    store = MemoryJobStore()
+    output_root = str(tmp_path / "output")
+    public_dir = str(tmp_path / "videos")
+    os.makedirs(output_root)
+    os.makedirs(public_dir)
+    def manager(**kwargs):
+        kwargs.setdefault("ttl_hours", {"article": 24, "story": 48})
+        return RetentionManager(store, output_dir=output_root, public_dir=public_dir, **kwargs)
+    return store, output_root, public_dir, manager
+
+def test_expires_jobs_past_their_content_type_ttl(setup):
+    store, output_root, public_dir, manager = setup
+    old_article = add_job(store, output_root, "old-article", hours_ago=30)
+    add_job(store, output_root, "new-article", hours_ago=2)
+    story = add_job(store, output_root, "old-story", content_type="story", hours_ago=30)
+    open(os.path.join(public_dir, "old-article.mp4"), "wb").write(b"y" * 500)
+
+    report = manager().run_once(now=NOW)
+
+    assert report.expired_jobs == 1
+    assert report.reclaimed_bytes == 1500
+    assert not os.path.exists(old_article)
+    assert not os.path.exists(os.path.join(public_dir, "old-article.mp4"))
+    assert os.path.exists(story)  # Story TTL is 48 hours
+    assert store.get("old-article").status == "expired"
+    assert store.get("new-article").status == "completed"
+
+def test_never_touches_queued_or_running_jobs(setup):
+    store, output_root, _, manager = setup
+    running = add_job(store, output_root, "running", status="processing", hours_ago=100)
+    add_job(store, output_root, "queued", status="queued", hours_ago=100)
+
+    report = manager(quota_bytes=1).run_once(now=NOW)
+
+    assert report.expired_jobs == report.evicted_jobs == 0
+    assert os.path.exists(running)
+    assert store.get("running").status == "processing"
+
+def test_quota_evicts_least_recently_accessed_first(setup):
+    store, output_root, _, manager = setup
+    add_job(store, output_root, "a", hours_ago=3, last_accessed_hours_ago=0.5)
+    add_job(store, output_root, "b", hours_ago=2)
+    add_job(store, output_root, "c", hours_ago=1)
+
+    report = manager(ttl_hours={}, quota_bytes=2000).run_once(now=NOW)
+
+    assert report.evicted_jobs == 1
+    assert store.get("b").status == "expired"  # "a" is older but was read recently
+    assert {store.get(job_id).status for job_id in ("a", "c")} == {"completed"}
+    assert report.usage_bytes == path_size(output_root) <= 2000
+
+def test_removes_orphaned_job_directories(setup):
+    store, output_root, _, manager = setup
+    orphan = os.path.join(output_root, "0b9d6c1e-4a47-4c5e-9f1f-2d6f1b0f6a11")
+    os.makedirs(orphan)
+    open(os.path.join(orphan, "content.txt"), "wb").write(b"z" * 100)
+    old = (NOW - timedelta(hours=100)).timestamp()
+    os.utime(orphan, (old, old))
+    other = os.path.join(output_root, "not-a-job")
+    os.makedirs(other)
+
+    report = manager().run_once(now=NOW)
+
+    assert report.orphans_removed == 1
+    assert not os.path.exists(orphan)
+    assert os.path.exists(other)
+
+def test_shared_blobs_are_reclaimed_with_their_last_job(setup):
+    store, output_root, _, manager = setup
+    blobs = BlobStore(os.path.join(output_root, ".blobs"))
+    for job_id, hours_ago in (("old", 30), ("older", 40)):
+        add_job(store, output_root, job_id, hours_ago=hours_ago)
+        blobs.add(os.path.join(output_root, job_id, "content.txt"))
+    add_job(store, output_root, "new", hours_ago=1)
+    blobs.add(os.path.join(output_root, "new", "content.txt"))
+
+    report = manager(blob_store=blobs).run_once(now=NOW)
+
+    # The blob is still used by "new", so expiring both jobs frees nothing
+    assert report.expired_jobs == 2
+    assert (report.reclaimed_bytes, report.blobs_removed) == (0, 0)
+
+    store.update("new", completed_at=(NOW - timedelta(hours=30)).isoformat())
+    report = manager(blob_store=blobs).run_once(now=NOW)
+
+    assert (report.reclaimed_bytes, report.blobs_removed) == (1000, 1)
+    assert report.usage_bytes == 0
@@ -0,0 +1,84 @@
+import asyncio
+import httpx
+import pytest
+from unittest.mock import patch
+
+import app.main as main
+from app.jobs.queue import MemoryJobQueue
+from app.jobs.store import MemoryJobStore
+
+@pytest.fixture
+def backend(monkeypatch, tmp_path):
+    store, queue = MemoryJobStore(), MemoryJobQueue()
+    monkeypatch.setattr(main, "job_store", store)
+    monkeypatch.setattr(main, "job_queue", queue)
+    monkeypatch.setattr(main.admission, "store", store)
+    monkeypatch.setattr(main.admission, "queue", queue)
+    monkeypatch.setattr(main, "OUTPUT_DIR", str(tmp_path))
+    monkeypatch.setattr(main, "sync_slots", asyncio.Semaphore(2))
+    # Providers are faked, so the tests must not depend on the API keys set here
+    monkeypatch.setattr(main, "missing_keys", lambda content_type: [])
+    with patch('app.jobs.runner.get_job_store', return_value=store):
+        yield store, queue
+
+@pytest.fixture
+def client():
+    return httpx.AsyncClient(app=main.app, base_url="http://api")
+
+def article_stream(*chunks, gate: asyncio.Event = None):
+    async def stream_article(**kwargs):
+        if gate is not None:
+            await gate.wait()
+        for chunk in chunks:
+            yield chunk
+    return stream_article
+
+async def generate(client, **request):
+    return await client.post("/generate?mode=sync", json={"content_type": "article", "topic": "Queues", **request})
+
+@pytest.mark.asyncio
+async def test_sync_generation_returns_the_content(backend, client):
+    store, queue = backend
+    with patch('app.content_types.text.stream_article', new=article_stream("Queues ", "are lines.")):
+        response = await generate(client)
+
+    assert response.status_code == 200
+    assert response.text == "Queues are lines."
+    job = store.get(response.headers["X-Job-Id"])
+    assert (job.status, job.mode) == ("completed", "sync")
+    assert queue.running_owners() == []
+
+@pytest.mark.asyncio
+async def test_sync_mode_is_only_for_text(backend, client):
+    response = await client.post("/generate?mode=sync", json={"content_type": "story", "topic": "A knight"})
+    assert response.status_code == 400
+
+@pytest.mark.asyncio
+async def test_busy_slots_send_the_job_to_the_queue(backend, client, monkeypatch):
+    store, queue = backend
+    monkeypatch.setattr(main, "sync_slots", asyncio.Semaphore(0))
+    response = await generate(client)
+
+    assert response.status_code == 202
+    job_id = response.headers["X-Job-Id"]
+    assert store.get(job_id).status == "queued"
+    assert queue.claim("text").job_id == job_id
+
+@pytest.mark.asyncio
+async def test_slow_sync_jobs_continue_in_the_background(backend, client, monkeypatch):
+    store, queue = backend
+    monkeypatch.setattr(main, "SYNC_TIMEOUT_SECONDS", 0.05)
+    gate = asyncio.Event()
+    with patch('app.content_types.text.stream_article', new=article_stream("Queues.", gate=gate)):
+        response = await generate(client)
+        assert response.status_code == 202
+        assert "continues in the background" in response.json()["message"]
+        job_id = response.headers["X-Job-Id"]
+        # Held under the API's lease, so a worker re-queues it if the API stops
+        assert queue.running_owners() == [main.api_owner]
+
+        gate.set()
+        await asyncio.gather(*main.sync_tasks)
+
+    assert store.get(job_id).status == "completed"
+    assert queue.running_owners() == []
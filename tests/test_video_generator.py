@@ -0,0 +1,62 @@
+import os
+import pytest
+from unittest.mock import patch
+
+from app.cancellation import JobCancelledError
+from app.generators import video
+from app.generators.video import CancellableRenderLogger, RenderCrashedError, create_video_async
+
+# Module-level so the spawned render processes can unpickle them
+def crash_render(*args):
+    os._exit(1)
+
+def crash_once_render(*args):
+    marker = args[3] + ".crashed"
+    if not os.path.exists(marker):
+        open(marker, "w").close()
+        os._exit(1)
+    return args[3], 0.5
+
+@pytest.fixture(autouse=True)
+def fresh_pool():
+    yield
+    video.shutdown_render_pool()
+
+def test_logger_stops_render_when_marker_appears(tmp_path):
+    marker = tmp_path / "cancel"
+    logger = CancellableRenderLogger(str(marker))
+    logger(frame_index__total=3)
+    logger(frame_index__index=1)
+    marker.touch()
+    logger._checked_at = 0.0  # Skip the throttle
+    with pytest.raises(JobCancelledError):
+        logger(frame_index__index=2)
+
+@pytest.mark.asyncio
+async def test_crashed_render_is_retried_on_a_fresh_pool(tmp_path):
+    output_path = str(tmp_path / "video.mp4")
+    with patch("app.generators.video._render", new=crash_once_render):
+        assert await create_video_async([], "voice.mp3", "music.wav", output_path) == output_path
+    assert video.RENDER_JOBS.value(state="queued") == video.RENDER_JOBS.value(state="running") == 0
+
+@pytest.mark.asyncio
+async def test_render_that_keeps_crashing_fails_its_job(tmp_path):
+    with patch("app.generators.video._render", new=crash_render):
+        with pytest.raises(RenderCrashedError):
+            await create_video_async([], "voice.mp3", "music.wav", str(tmp_path / "video.mp4"))
+
+@pytest.mark.asyncio
+async def test_worker_stops_the_render_processes_at_shutdown(monkeypatch):
+    import asyncio
+    from app.jobs.queue import MemoryJobQueue
+    from app.jobs.store import MemoryJobStore
+    from app.worker import run_worker
+    monkeypatch.setattr("app.worker.get_job_queue", MemoryJobQueue)
+    monkeypatch.setattr("app.worker.get_job_store", MemoryJobStore)
+    pool = video._get_render_pool()
+    stop_event = asyncio.Event()
+    stop_event.set()
+    await asyncio.wait_for(run_worker(concurrency={"video": 1}, stop_event=stop_event), timeout=10)
+    assert video._render_pool is None
+    with pytest.raises(RuntimeError):
+        pool.submit(print)
@@ -0,0 +1,43 @@
+import io
+import os
+import zipfile
+import pytest
+
+from app.utils.zip_stream import artifact_files, stream_zip
+
+@pytest.fixture
+def job_dir(tmp_path):
+    files = {
+        "content.txt": b"Once upon a time " * 100,
+        "main.jpg": os.urandom(3000),
+        "content_video.mp4": os.urandom(10000),
+        "checkpoints/video.json": b"{}",
+        "main.jpg.1a2b3c4d.tmp": b"partial",
+    }
+    for name, content in files.items():
+        path = tmp_path / name
+        path.parent.mkdir(exist_ok=True)
+        path.write_bytes(content)
+    return tmp_path, files
+
+def test_streamed_zip_holds_every_artifact(job_dir):
+    directory, files = job_dir
+    chunks = list(stream_zip(artifact_files(str(directory), exclude_dirs=("checkpoints",)), chunk_size=1024))
+
+    archive = zipfile.ZipFile(io.BytesIO(b"".join(chunks)))
+    assert archive.namelist() == ["content.txt", "content_video.mp4", "main.jpg"]
+    for name in archive.namelist():
+        assert archive.read(name) == files[name]
+    # Media is stored as is, text is deflated
+    assert archive.getinfo("content_video.mp4").compress_type == zipfile.ZIP_STORED
+    assert archive.getinfo("content.txt").compress_type == zipfile.ZIP_DEFLATED
+    # Nothing is buffered beyond a chunk (plus entry headers)
+    assert max(len(chunk) for chunk in chunks) < 2048
+
+def test_artifact_filter(job_dir):
+    directory, _ = job_dir
+    assert [name for _, name in artifact_files(str(directory), kinds=["images", "text"])] == [
+        "content.txt", "main.jpg", "checkpoints/video.json"
+    ]
+    with pytest.raises(ValueError, match="slides"):
+        artifact_files(str(directory), kinds=["slides"])